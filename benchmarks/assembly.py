@@ -0,0 +1,84 @@
+"""
+    Memory benchmark for the report assembly.
+
+    Measures the peak memory allocated on top of the serialized findings while writing out reports with a growing amount of findings,
+    joining the report into one string (the previous behaviour) against streaming it through ReportCustomizer.stream_findings.
+    The serialized findings themselves grow with their amount, the bound on everything else is tested in tests/test_assembly.py.
+
+    Usage: python -m benchmarks.assembly [findings ...]
+"""
+
+from os import devnull
+
+from sys import argv
+
+from tracemalloc import get_traced_memory, start, stop
+
+from types import SimpleNamespace
+
+from compiloor.services.parser.template import CompiledTemplate
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.typings.finding import Severity
+
+
+TEMPLATE: str = "<html><head>{{stylesheet}}</head><body><h1>{{config.title}}</h1>{{findings}}</body></html>"
+
+FINDING: str = """
+    <div id="section-8-[[5_severity_index]]-{index}" class="finding">
+        <h1>[H-{index}] Reentrancy in withdraw</h1>
+        <p></p>
+        <table><tr><td>[H-{index}]</td><td>Open</td></tr></table>
+        <pre><code>{code}</code></pre>
+    </div>
+"""
+
+def create_customizer(findings: int) -> ReportCustomizer:
+    """
+        Creates a customizer with the given amount of already serialized findings, without reading a project.
+    """
+
+    customizer = ReportCustomizer.__new__(ReportCustomizer)
+
+    serialized = [
+        SimpleNamespace(severity=Severity.HIGH, render_fragment=FINDING.format(index=index, code="x = 1;\n" * 200))
+        for index in range(findings)
+    ]
+
+    customizer.finding_sections, customizer.shard_breaks, customizer.config_values = [("<div>", "</div>", 1, serialized)], set(), {}
+    customizer.template_values = { "{{stylesheet}}": "<style></style>", "{{config.title}}": "Report", "{{findings}}": customizer.stream_findings }
+    customizer.template = CompiledTemplate(TEMPLATE)
+
+    return customizer
+
+def write_joined(customizer: ReportCustomizer) -> None:
+    with open(devnull, "w") as file: file.write("".join(sanitize_html_stream([customizer.template.render(customizer.template_values)])))
+
+def write_streamed(customizer: ReportCustomizer) -> None:
+    with open(devnull, "w") as file:
+        for fragment in sanitize_html_stream(customizer.stream_report()): file.write(fragment)
+
+def measure(findings: int, write) -> tuple[int, int]:
+    """
+        Returns the memory in bytes held by the serialized findings and the peak memory allocated on top of them,
+        from before the findings are created until the report is written.
+    """
+
+    start()
+
+    customizer = create_customizer(findings)
+    write(customizer)
+
+    retained, peak = get_traced_memory()
+    stop()
+
+    return retained, peak - retained
+
+def main(counts: list[int]) -> None:
+    for findings in counts:
+        (_, joined), (retained, streamed) = measure(findings, write_joined), measure(findings, write_streamed)
+
+        print(f"{findings} findings ({retained / 1024:.0f} KiB): {joined / 1024:.0f} KiB joined vs {streamed / 1024:.0f} KiB streamed on top")
+
+if __name__ == "__main__":
+    main([int(count) for count in argv[1:]] or [250, 1000, 4000])
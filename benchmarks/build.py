@@ -0,0 +1,89 @@
+"""
+    Benchmark for the build graph of the PDF compile.
+
+    Compiles the report of a synthetic corpus (see benchmarks.corpus) from scratch, then again without any changes,
+    with only the indexing options changed and after editing a single finding. Prints how long each compile took,
+    and checks that the compile without changes reuses the last report as it is.
+
+    Usage: python -m benchmarks.build [--runs 3] [corpus arguments, see benchmarks.corpus]
+"""
+
+from argparse import ArgumentParser
+
+from glob import glob
+
+from os import makedirs
+from os.path import join
+
+from shutil import rmtree
+
+from statistics import median
+
+from time import perf_counter, sleep
+
+from benchmarks.corpus import add_corpus_arguments, create_benchmark_root, generate_project, get_corpus_options
+from benchmarks.server import serve_directory
+from compiloor.constants.environment import BUILD_DIRECTORY, FINDINGS_DIRECTORY
+from compiloor.services.compiler.pipeline import compile_pdf_report
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.chromium import ChromiumPool
+from compiloor.services.typings.compiler import CompileOptionsDict
+
+
+def edit_finding(project: str, run: int) -> None:
+    path: str = sorted(glob(join(project, FINDINGS_DIRECTORY, "*.md")))[0]
+    content: str = open(path, "r").read()
+
+    open(path, "w").write(content.replace("## Description\n", f"## Description\n\nEdited for the run {run}.\n", 1))
+
+def timed_compile(options: CompileOptionsDict) -> tuple[float, str]:
+    # The reports are timestamped by the second:
+    sleep(1)
+
+    start: float = perf_counter()
+    report_path: str = compile_pdf_report(options)
+
+    return perf_counter() - start, report_path
+
+def main() -> None:
+    parser = ArgumentParser(description="Times the compiles that reuse the steps of the last build against a compile from scratch.")
+    parser.add_argument("--runs", type=int, default=3)
+    add_corpus_arguments(parser)
+
+    arguments = parser.parse_args()
+
+    with create_benchmark_root() as root:
+        project: str = join(root, "project")
+        makedirs(join(project, "assets"))
+
+        with serve_directory(join(project, "assets")) as assets_url:
+            generate_project(project, assets_url=assets_url, **get_corpus_options(arguments))
+
+            # The browser launch is a one-off cost that isn't part of the compile:
+            for future in ChromiumPool.shared().warm(): future.result()
+
+            timings: dict[str, list[float]] = {}
+
+            with FileUtils.project_root(project):
+                for run in range(arguments.runs):
+                    rmtree(join(project, BUILD_DIRECTORY), ignore_errors=True)
+
+                    cold, report_path = timed_compile({})
+                    unchanged, reused_path = timed_compile({})
+
+                    assert open(reused_path, "rb").read() == open(report_path, "rb").read(), "The compile without changes didn't reuse the last report."
+
+                    indexing, _ = timed_compile({ "optimize": True })
+
+                    edit_finding(project, run)
+                    edited, _ = timed_compile({ "optimize": True })
+
+                    for name, timing in [("from scratch", cold), ("without changes", unchanged), ("indexing options changed", indexing), ("one finding edited", edited)]:
+                        timings.setdefault(name, []).append(timing)
+
+            for name, runs in timings.items(): print(f"{name:>24}: {median(runs) * 1000:.0f}ms")
+
+        ChromiumPool.shared().close()
+
+if __name__ == "__main__":
+    main()
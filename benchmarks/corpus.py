@@ -0,0 +1,322 @@
+"""
+    Synthetic report corpus generator.
+
+    Generates an initialized compiloor project with a configurable amount of findings, code block sizes, languages and severity mix.
+    The project is fully deterministic for a given seed, so the same corpus can be compiled by different versions of compiloor.
+    The template, the stylesheet and the cover image are written to the project's 'assets' directory and are expected to be served from the given URL
+    (i.e. through benchmarks.server or "python -m http.server 8765 -d <root>/assets").
+
+    Usage: python -m benchmarks.corpus ROOT [--findings 50] [--code-lines 20] [--languages solidity,rust] [--severities H=2,M=3]
+"""
+
+from argparse import ArgumentParser
+
+from contextlib import contextmanager
+
+from json import dumps
+
+from os import environ, makedirs
+from os.path import join
+
+from random import Random
+
+from struct import pack
+
+from tempfile import TemporaryDirectory
+
+from typing import Iterator
+
+from zlib import compress, crc32
+
+from compiloor.constants.environment import BASE_CONFIG_SCHEMA, CONFIG_NAME, FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.constants.report import REPORT_SECTION_HEADINGS
+from compiloor.services.parser.indexing import get_section_placeholder
+from compiloor.services.typings.finding import FindingStatusAnnotation, SeverityFolderIndex
+
+
+DEFAULT_ASSETS_URL: str = "http://127.0.0.1:8765"
+
+# The default severity mix, weighted roughly like a real audit:
+DEFAULT_SEVERITIES: dict[str, int] = { "C": 1, "H": 2, "M": 4, "L": 5, "QA": 3, "GAS": 2 }
+
+# The lines the code blocks are built from, "{name}" and "{value}" vary per line:
+LANGUAGE_LINES: dict[str, list[str]] = {
+    "solidity": [
+        "function {name}(uint256 amount) external {{",
+        "    require(balances[msg.sender] >= amount, \"{name}: insufficient balance\");",
+        "    balances[msg.sender] -= amount * {value};",
+        "    (bool success, ) = msg.sender.call{{value: amount}}(\"\");",
+        "    emit Withdrawn(msg.sender, amount, {value});",
+        "}}",
+    ],
+    "rust": [
+        "pub fn {name}(ctx: Context<Withdraw>, amount: u64) -> Result<()> {{",
+        "    let vault = &mut ctx.accounts.vault;",
+        "    vault.balance = vault.balance.checked_sub(amount * {value}).ok_or(ErrorCode::Underflow)?;",
+        "    msg!(\"{name}: {{}}\", amount);",
+        "    Ok(())",
+        "}}",
+    ],
+    "python": [
+        "def {name}(self, amount: int) -> None:",
+        "    if self.balances[self.sender] < amount:",
+        "        raise ValueError(\"{name}: insufficient balance\")",
+        "    self.balances[self.sender] -= amount * {value}",
+        "    self.emit(\"Withdrawn\", self.sender, amount)",
+    ],
+    "javascript": [
+        "async function {name}(contract, amount) {{",
+        "  const tx = await contract.withdraw(amount * {value});",
+        "  const receipt = await tx.wait();",
+        "  console.log(`{name}: ${{receipt.gasUsed}}`);",
+        "}}",
+    ],
+}
+
+WORDS: list[str] = (
+    "the vault withdraw reentrancy oracle price manipulation rounding error fee accounting missing check "
+    "slippage deadline access control upgrade storage collision signature replay liquidation reward "
+    "distribution overflow underflow governance timelock bridge message validation token approval"
+).split()
+
+TEMPLATE: str = """<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="utf-8">
+        {{{{stylesheet}}}}
+    </head>
+    <body>
+        <div class="cover page-break-after">
+            <img class="cover-image" src="{{{{config.cover_img_url}}}}">
+            <h1>{{{{config.title}}}}</h1>
+            <h2>{{{{config.sub_title}}}}</h2>
+            <p>{{{{config.protocol_name}}}} security review by {{{{config.company_name}}}}</p>
+        </div>
+        <div class="page-break-after">
+            <h1>Contents</h1>
+            {contents}
+            {{{{findings_legend}}}}
+        </div>
+        {sections}
+    </body>
+</html>
+"""
+
+# The content of every section of the template, keyed by its index:
+SECTION_CONTENTS: dict[str, str] = {
+    "1": "{{config.about_author_content}}",
+    "2": "{{config.disclaimer_content}}",
+    "3": "{{config.introduction_content}}",
+    "4": "{{config.about_protocol_content}}",
+    "5": "{{severity_classification_table}}",
+    "5.1": "<p>High, medium or low, depending on the loss of assets.</p>",
+    "5.2": "<p>High, medium or low, depending on the likelihood of the attack.</p>",
+    "5.3": "<p>Critical and high findings must be fixed, the remaining ones should be.</p>",
+    "6": "{{config.security_assessment_summary_content}}",
+    "7": "{{information_table}} {{findings_count_table}} <p>{{total_findings_amount}} findings.</p> {{findings_summary_table}}",
+    "8": "{{findings}}",
+}
+
+STYLESHEET: str = """
+body { font-family: sans-serif; font-size: 12px; }
+pre { white-space: pre-wrap; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #ccc; padding: 2px 4px; }
+a { color: inherit; text-decoration: none; }
+.page-break-after { page-break-after: always; }
+.no-wrap-column { white-space: nowrap; }
+.section-wrapper { display: flex; justify-content: space-between; }
+"""
+
+def create_template() -> str:
+    """
+        Returns a template with the sections and the placeholders of compiloor's default template.
+    """
+
+    contents: list[str] = []
+    sections: list[str] = []
+
+    for heading in REPORT_SECTION_HEADINGS:
+        # The protocol's name is appended to the 4th heading when the report gets assembled:
+        if heading == REPORT_SECTION_HEADINGS[3]: heading += " {{config.protocol_name}}"
+
+        index: str = heading.split(" ")[0].rstrip(".")
+
+        contents.append(f'<div class="section-wrapper"><p>{heading}</p>{get_section_placeholder(heading)}</div>')
+        sections.append(f'<div id="section-{index.replace(".", "-")}"><h1>{heading}</h1>{SECTION_CONTENTS[index]}</div>')
+
+    return TEMPLATE.format(contents="\n            ".join(contents), sections="\n        ".join(sections))
+
+def create_cover_image(width: int = 400, height: int = 300) -> bytes:
+    """
+        Returns a PNG image of a vertical gradient, so that the cover image is a real asset that the browser has to load.
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return pack(">I", len(data)) + kind + data + pack(">I", crc32(kind + data))
+
+    # Every row starts with its filter type (none), followed by its RGB pixels:
+    rows: bytes = b"".join(b"\0" + bytes([row * 255 // height, 64, 128]) * width for row in range(height))
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) + chunk(b"IDAT", compress(rows)) + chunk(b"IEND", b"")
+
+def create_sentence(random: Random, words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def create_paragraph(random: Random, sentences: int = 4) -> str:
+    return " ".join(create_sentence(random, random.randint(6, 16)) for _ in range(sentences))
+
+def create_code_block(random: Random, language: str, lines: int) -> str:
+    """
+        Returns a fenced code block in the given language with the given amount of lines.
+    """
+
+    source: list[str] = LANGUAGE_LINES[language]
+
+    code: list[str] = [
+        source[line % len(source)].format(name=f"{random.choice(WORDS)}_{line}", value=random.randint(1, 10 ** 6))
+        for line in range(lines)
+    ]
+
+    return f"```{language}\n" + "\n".join(code) + "\n```"
+
+def create_finding(random: Random, folder_sig: str, index: int, code_lines: int, languages: list[str]) -> str:
+    """
+        Returns the markdown of a finding in the layout of the finding template.
+    """
+
+    title: str = create_sentence(random, random.randint(4, 9)).rstrip(".")
+    status: FindingStatusAnnotation = random.choice(list(FindingStatusAnnotation))
+
+    table: str = "\n".join([
+        "| Contract | Function | Line |",
+        "| -------- | -------- | ---- |",
+        *(f"| {random.choice(WORDS).capitalize()}.sol | {random.choice(WORDS)}() | {random.randint(1, 999)} |" for _ in range(3))
+    ])
+
+    return f"""# [{folder_sig}-{index:02}] {title}
+
+## Severity
+
+**Impact:** {random.choice(["High", "Medium", "Low"])}
+
+**Likelihood:** {random.choice(["High", "Medium", "Low"])}
+
+## Description
+
+{create_paragraph(random)}
+
+{create_code_block(random, random.choice(languages), code_lines)}
+
+{table}
+
+## Recommendations
+
+{create_paragraph(random, 2)}
+
+{create_code_block(random, random.choice(languages), max(code_lines // 4, 1))}
+
+## _STATUS_={status.value}
+"""
+
+def generate_project(
+    root: str,
+    findings: int = 50,
+    code_lines: int = 20,
+    languages: list[str] = ["solidity"],
+    severities: dict[str, int] = DEFAULT_SEVERITIES,
+    assets_url: str = DEFAULT_ASSETS_URL,
+    seed: int = 0
+) -> None:
+    """
+        Generates an initialized compiloor project in the given root. \n
+        :param code_lines: The amount of lines of the main code block of each finding.
+        :param severities: The relative weight of each severity, keyed by its folder signature (i.e. "H").
+        :param assets_url: The URL the project's 'assets' directory is served from.
+    """
+
+    random = Random(seed)
+
+    for directory in [FINDINGS_DIRECTORY, f"{MAIN_DIRECTORY}/sections", f"{MAIN_DIRECTORY}/reports", "assets"]:
+        makedirs(join(root, directory), exist_ok=True)
+
+    open(join(root, "assets", "template.html"), "w").write(create_template())
+    open(join(root, "assets", "stylesheet.css"), "w").write(STYLESHEET)
+    open(join(root, "assets", "cover.png"), "wb").write(create_cover_image())
+
+    config: dict[str, str] = {
+        **BASE_CONFIG_SCHEMA,
+        "title": "Benchmark Security",
+        "sub_title": "Synthetic security review",
+        "company_name": "Benchmark",
+        "protocol_name": "Corpus",
+        "date": "01-01-2024",
+        "template_url": f"{assets_url}/template.html",
+        "stylesheet_url": f"{assets_url}/stylesheet.css",
+        "cover_img_url": f"{assets_url}/cover.png",
+    }
+
+    open(join(root, MAIN_DIRECTORY, CONFIG_NAME), "w").write(dumps(config, indent=4))
+
+    for section in ["about_author", "disclaimer", "introduction", "about_protocol", "security_assessment_summary"]:
+        open(join(root, MAIN_DIRECTORY, "sections", f"{section}_content.md"), "w").write(
+            "\n\n".join(create_paragraph(random) for _ in range(3))
+        )
+
+    # Validating the signatures before writing any of the findings:
+    signatures: list[str] = [SeverityFolderIndex(signature).value for signature in severities.keys()]
+    indexes: dict[str, int] = {}
+
+    for signature in random.choices(signatures, weights=list(severities.values()), k=findings):
+        indexes[signature] = indexes.get(signature, 0) + 1
+
+        open(join(root, FINDINGS_DIRECTORY, f"[{signature}-{indexes[signature]:02}].md"), "w").write(
+            create_finding(random, signature, indexes[signature], code_lines, languages)
+        )
+
+def parse_severities(severities: str) -> dict[str, int]:
+    """
+        Parses a severity mix in the "H=2,M=3" format.
+    """
+
+    return { signature.strip(): int(weight) for signature, weight in (pair.split("=") for pair in severities.split(",")) }
+
+@contextmanager
+def create_benchmark_root() -> Iterator[str]:
+    """
+        Yields a temporary directory for the benchmark's projects. \n
+        It also holds the caches of the benchmark, so that they never mix with the user's caches.
+    """
+
+    with TemporaryDirectory() as root:
+        environ["COMPILOOR_CACHE_DIR"] = join(root, ".cache")
+        yield root
+
+def add_corpus_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument("--findings", type=int, default=50)
+    parser.add_argument("--code-lines", type=int, default=20)
+    parser.add_argument("--languages", default="solidity", help=f"Any of: {', '.join(LANGUAGE_LINES)}.")
+    parser.add_argument("--severities", default=",".join(f"{key}={value}" for key, value in DEFAULT_SEVERITIES.items()))
+    parser.add_argument("--seed", type=int, default=0)
+
+def get_corpus_options(arguments) -> dict:
+    """
+        Returns the generate_project keyword arguments of the parsed corpus arguments.
+    """
+
+    return {
+        "findings": arguments.findings,
+        "code_lines": arguments.code_lines,
+        "languages": arguments.languages.split(","),
+        "severities": parse_severities(arguments.severities),
+        "seed": arguments.seed,
+    }
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Generates a synthetic compiloor project.")
+    parser.add_argument("root")
+    parser.add_argument("--assets-url", default=DEFAULT_ASSETS_URL)
+    add_corpus_arguments(parser)
+
+    arguments = parser.parse_args()
+    generate_project(arguments.root, assets_url=arguments.assets_url, **get_corpus_options(arguments))
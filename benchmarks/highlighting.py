@@ -0,0 +1,58 @@
+"""
+    Micro-benchmark for the per-code-block rendering overhead.
+
+    Compares building a fresh mistune parser, lexer and formatter on every call (the previous behaviour)
+    against the objects reused through the RendererRegistry.
+
+    Usage: python -m benchmarks.highlighting [blocks]
+"""
+
+from sys import argv
+
+from timeit import timeit
+
+from mistune import create_markdown as mistune_create_markdown
+
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from compiloor.services.parser.markdown import (
+    DefaultStyleExtended, HighlightRenderer, RendererRegistry, create_html_from_markdown
+)
+
+
+CODE_BLOCK: str = """function withdraw(uint256 amount) external {
+    require(balances[msg.sender] >= amount);
+    balances[msg.sender] -= amount;
+}"""
+
+FRAGMENT: str = f"# [M-01] Title\n\n## Description\n\n```solidity\n{CODE_BLOCK}\n```\n"
+
+def highlight_rebuilt() -> str:
+    return highlight(CODE_BLOCK, get_lexer_by_name("solidity", stripall=True), HtmlFormatter(style=DefaultStyleExtended, full=True))
+
+def highlight_reused() -> str:
+    return highlight(CODE_BLOCK, RendererRegistry.get_lexer("solidity"), RendererRegistry.get_formatter(DefaultStyleExtended))
+
+def render_rebuilt() -> str:
+    return mistune_create_markdown(renderer=HighlightRenderer())(FRAGMENT)
+
+def render_reused() -> str:
+    return create_html_from_markdown(FRAGMENT)
+
+def main(blocks: int = 500) -> None:
+    # Warming up the registry and Pygments' plugin discovery so that only the steady state gets measured:
+    highlight_rebuilt(), highlight_reused(), render_rebuilt(), render_reused()
+
+    for name, rebuilt, reused in [
+        ("code block", highlight_rebuilt, highlight_reused),
+        ("markdown fragment", render_rebuilt, render_reused),
+    ]:
+        rebuilt_time: float = timeit(rebuilt, number=blocks) / blocks * 1e6
+        reused_time: float = timeit(reused, number=blocks) / blocks * 1e6
+
+        print(f"{name}: {rebuilt_time:.0f}us rebuilt vs {reused_time:.0f}us reused ({rebuilt_time - reused_time:.0f}us saved per call)")
+
+if __name__ == "__main__":
+    main(int(argv[1]) if len(argv) > 1 else 500)
\ No newline at end of file
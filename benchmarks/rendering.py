@@ -0,0 +1,100 @@
+"""
+    Benchmark for the Chromium render with and without the asset router.
+
+    Serves the assets of a synthetic corpus (see benchmarks.corpus) from a local server that holds back every response,
+    standing in for a slow CDN, and adds an image from a second, unknown host to the template. The render is timed
+    loading the assets from the network, routed through the asset cache and with the assets inlined as data URIs,
+    each of them cold (with an empty asset cache) and warm (with the assets already cached).
+
+    Usage: python -m benchmarks.rendering [--latency 0.3] [--runs 3] [corpus arguments, see benchmarks.corpus]
+"""
+
+from argparse import ArgumentParser
+
+from os import makedirs
+from os.path import join
+
+from statistics import median
+
+from time import perf_counter
+
+from benchmarks.corpus import add_corpus_arguments, create_benchmark_root, create_cover_image, generate_project, get_corpus_options
+from benchmarks.server import serve_directory
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.chromium import ChromiumPool, create_chromium_document
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.utils.assets import AssetCache
+
+
+# How the page gets its assets in each of the measured modes:
+MODES: list[str] = ["network", "routed", "inlined"]
+
+def render(customizer: ReportCustomizer, output_dir: str, mode: str) -> tuple[float, float]:
+    """
+        Renders the report in the given mode and returns how long revalidating the assets and the render itself took.
+    """
+
+    router: AssetRouter | None = AssetRouter(customizer.asset_urls) if mode != "network" else None
+
+    start: float = perf_counter()
+    if router: router.prefetch()
+
+    rendered: float = perf_counter()
+    create_chromium_document(customizer.stream_report(), output_dir, router, mode == "inlined")
+
+    return rendered - start, perf_counter() - rendered
+
+def main() -> None:
+    parser = ArgumentParser(description="Times the render with the assets loaded from the network, routed through the cache and inlined.")
+    parser.add_argument("--latency", type=float, default=0.3, help="The seconds every asset response is held back for.")
+    parser.add_argument("--runs", type=int, default=3)
+    add_corpus_arguments(parser)
+
+    arguments = parser.parse_args()
+
+    with create_benchmark_root() as root:
+        project: str = join(root, "project")
+        makedirs(join(project, "assets"))
+        makedirs(join(root, "third-party"))
+
+        open(join(root, "third-party", "pixel.png"), "wb").write(create_cover_image(1, 1))
+
+        with (
+            serve_directory(join(project, "assets"), delay=arguments.latency) as assets_url,
+            serve_directory(join(root, "third-party"), delay=arguments.latency) as third_party_url
+        ):
+            generate_project(project, assets_url=assets_url, **get_corpus_options(arguments))
+
+            # An asset on a host the report doesn't know about, i.e. a tracking pixel:
+            template_path: str = join(project, "assets", "template.html")
+            open(template_path, "w").write(open(template_path, "r").read().replace("</body>", f'<img src="{third_party_url}/pixel.png"></body>'))
+
+            # The browser launch is a one-off cost that isn't part of the render:
+            for future in ChromiumPool.shared().warm(): future.result()
+
+            with FileUtils.project_root(project):
+                customizer = ReportCustomizer(False, jobs=1)
+
+                for mode in MODES:
+                    for cache in ["cold", "warm"]:
+                        timings: list[tuple[float, float]] = []
+
+                        for run in range(arguments.runs):
+                            if cache == "cold": AssetCache.clear()
+                            # The warm runs start with the assets cached by a previous render:
+                            elif not run:
+                                makedirs(join(root, "runs", mode, "priming"))
+                                render(customizer, join(root, "runs", mode, "priming"), mode)
+
+                            output_dir: str = join(root, "runs", mode, cache, str(run))
+                            makedirs(output_dir)
+                            timings.append(render(customizer, output_dir, mode))
+
+                        prefetch, rendered = median(timing[0] for timing in timings), median(timing[1] for timing in timings)
+                        print(f"{mode:>8} {cache}: {prefetch * 1000:.0f}ms revalidating the assets, {rendered * 1000:.0f}ms rendering")
+
+        ChromiumPool.shared().close()
+
+if __name__ == "__main__":
+    main()
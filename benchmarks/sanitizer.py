@@ -0,0 +1,76 @@
+"""
+    Benchmark for the HTML cleanup that runs before the report is handed to Chromium.
+
+    Assembles the report of a synthetic corpus (see benchmarks.corpus) and cleans it up with the previous approach,
+    a full-string replace pass per empty tag over the joined report, against the single-pass sanitize_html_stream.
+    Prints the time each one took and the size of the HTML Chromium has to parse, and checks that the sanitizer
+    gives the same output however the report is split into fragments.
+
+    Usage: python -m benchmarks.sanitizer [--findings 50] [corpus arguments, see benchmarks.corpus]
+"""
+
+from argparse import ArgumentParser
+
+from os import makedirs
+from os.path import join
+
+from random import Random
+
+from timeit import timeit
+
+from benchmarks.corpus import add_corpus_arguments, create_benchmark_root, generate_project, get_corpus_options
+from benchmarks.server import serve_directory
+from compiloor.constants.utils import EMPTY_TAGS
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+from compiloor.services.parser.utils import ReportCustomizer
+
+
+def remove_empty_tags(report: str) -> str:
+    """
+        The previous cleanup, which went over the whole report once per empty tag.
+    """
+
+    for tag in EMPTY_TAGS: report = report.replace(f"<{tag}></{tag}>", "")
+
+    return report
+
+def sanitize(fragments: list[str]) -> str:
+    return "".join(sanitize_html_stream(fragments))
+
+def split(report: str, seed: int, pieces: int = 500) -> list[str]:
+    cuts: list[int] = sorted(Random(seed).sample(range(1, len(report)), min(pieces, len(report) - 1)))
+    return [report[start:end] for start, end in zip([0] + cuts, cuts + [len(report)])]
+
+def main() -> None:
+    parser = ArgumentParser(description="Compares the HTML cleanup of the report against the previous one.")
+    parser.add_argument("--runs", type=int, default=5)
+    add_corpus_arguments(parser)
+
+    arguments = parser.parse_args()
+
+    with create_benchmark_root() as root:
+        project: str = join(root, "project")
+        makedirs(join(project, "assets"))
+
+        with serve_directory(join(project, "assets")) as assets_url, FileUtils.project_root(project):
+            generate_project(project, assets_url=assets_url, **get_corpus_options(arguments))
+            fragments: list[str] = list(ReportCustomizer(False, jobs=1).stream_report())
+
+    report: str = "".join(fragments)
+
+    replaced: float = timeit(lambda: remove_empty_tags("".join(fragments)), number=arguments.runs) / arguments.runs
+    sanitized: float = timeit(lambda: sanitize(fragments), number=arguments.runs) / arguments.runs
+
+    before, after = len(remove_empty_tags(report)), len(sanitize(fragments))
+
+    print(f"Replace passes: {replaced * 1000:.1f}ms, {before / 1024:.1f} KiB of HTML")
+    print(f"Sanitizer: {sanitized * 1000:.1f}ms, {after / 1024:.1f} KiB of HTML ({1 - after / before:.0%} smaller)")
+
+    # The output can't depend on where the fragments happen to be split:
+    for seed in range(10): assert sanitize(split(report, seed)) == sanitize(fragments), "The sanitizer's output depends on the fragments."
+
+    assert after <= before, "The sanitizer left more HTML than the replace passes."
+
+if __name__ == "__main__":
+    main()
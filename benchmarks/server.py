@@ -0,0 +1,47 @@
+"""
+    A local HTTP stand-in for the remote assets (i.e. the template and the stylesheet) of the benchmarked projects.
+"""
+
+from contextlib import contextmanager
+
+from functools import partial
+
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from threading import Thread
+
+from time import sleep
+
+from typing import Iterator
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+    delay: float = 0 # The seconds every response is held back for, to stand in for a slow CDN.
+
+    def __init__(self, *args, delay: float = 0, **kwargs) -> None:
+        self.delay = delay
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        if self.delay: sleep(self.delay)
+        return super().send_head()
+
+    def log_message(self, *args) -> None:
+        pass
+
+@contextmanager
+def serve_directory(directory: str, port: int = 0, delay: float = 0) -> Iterator[str]:
+    """
+        Serves the given directory on localhost inside of the wrapped block and yields its base URL. \n
+        :param port: The port to listen on, a free one by default.
+        :param delay: The seconds every response is held back for.
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(QuietRequestHandler, directory=directory, delay=delay))
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try: yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,100 @@
+"""
+    Benchmark for the sharded PDF render of huge reports.
+
+    Renders and indexes the report of a large synthetic corpus (see benchmarks.corpus) with a single Chromium print,
+    and then split into shards that are printed concurrently and merged. Prints the time each render and its indexing took,
+    and checks that the sharded report has the same pages, page numbers and legend as the one printed in one go.
+
+    Usage: python -m benchmarks.sharding [--shards 2 4] [--findings 400] [--runs 3] [corpus arguments, see benchmarks.corpus]
+"""
+
+from argparse import ArgumentParser
+
+from os import makedirs
+from os.path import join
+
+from statistics import median
+
+from time import perf_counter
+
+from fitz import Document
+
+from benchmarks.corpus import add_corpus_arguments, create_benchmark_root, generate_project, get_corpus_options
+from benchmarks.server import serve_directory
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.chromium import ChromiumPool, create_chromium_document
+from compiloor.services.parser.indexing import create_report_with_page_numbers_and_legend
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.sharding import create_sharded_chromium_document
+from compiloor.services.parser.utils import ReportCustomizer
+
+
+def render(customizer: ReportCustomizer, router: AssetRouter, output_dir: str, shards: int) -> tuple[float, float, str]:
+    """
+        Renders and indexes the report in the given amount of shards.
+        Returns how long the render and the indexing took along with the path of the report.
+    """
+
+    start: float = perf_counter()
+
+    if shards > 1: report_path: str = create_sharded_chromium_document(customizer.stream_report(shards), output_dir, router)
+    else: report_path = create_chromium_document(customizer.stream_report(), output_dir, router)
+
+    rendered: float = perf_counter()
+    create_report_with_page_numbers_and_legend(report_path, customizer.report_section_headings)
+
+    return rendered - start, perf_counter() - rendered, report_path
+
+def get_page_texts(report_path: str) -> list[str]:
+    with Document(report_path) as pdf: return [page.get_text() for page in pdf.pages()]
+
+def main() -> None:
+    parser = ArgumentParser(description="Times the sharded render of a huge report against a single print.")
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--runs", type=int, default=3)
+    add_corpus_arguments(parser)
+    parser.set_defaults(findings=400)
+
+    arguments = parser.parse_args()
+
+    with create_benchmark_root() as root:
+        project: str = join(root, "project")
+        makedirs(join(project, "assets"))
+
+        with serve_directory(join(project, "assets")) as assets_url:
+            generate_project(project, assets_url=assets_url, **get_corpus_options(arguments))
+
+            # The browser launches are a one-off cost that isn't part of the render:
+            for future in ChromiumPool.shared(max(arguments.shards)).warm(): future.result()
+
+            with FileUtils.project_root(project):
+                customizer = ReportCustomizer(False, jobs=1)
+
+                router = AssetRouter(customizer.asset_urls)
+                router.prefetch()
+
+                expected: list[str] | None = None
+
+                for shards in [1, *arguments.shards]:
+                    timings: list[tuple[float, float]] = []
+
+                    for run in range(arguments.runs):
+                        output_dir: str = join(root, "runs", str(shards), str(run))
+                        makedirs(output_dir)
+
+                        rendered, indexed, report_path = render(customizer, router, output_dir, shards)
+                        timings.append((rendered, indexed))
+
+                    # The shards end at forced page breaks, so the merged report can't differ from the single print:
+                    page_texts: list[str] = get_page_texts(report_path)
+
+                    if expected is None: expected = page_texts
+                    assert page_texts == expected, f"The report rendered in {shards} shards differs from the single print."
+
+                    rendered, indexed = median(timing[0] for timing in timings), median(timing[1] for timing in timings)
+                    print(f"{shards} shard(s): {rendered * 1000:.0f}ms rendering, {indexed * 1000:.0f}ms indexing, {len(page_texts)} pages")
+
+        ChromiumPool.shared().close()
+
+if __name__ == "__main__":
+    main()
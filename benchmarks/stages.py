@@ -0,0 +1,215 @@
+"""
+    Per-stage benchmark of a compile over a synthetic corpus.
+
+    Generates a project with benchmarks.corpus, serves its assets from a local HTTP stand-in and times every stage on its own:
+    the config read, the asset fetch, the finding parsing, the report assembly, the page's assets, the Chromium render and the PDF indexing.
+    The stages run one after another (unlike in a compile) so that their timings don't depend on each other.
+    The median timings are written to JSON so that they can be compared between versions,
+    and the text of the output is checked against a golden copy so that an optimization can't change the report.
+
+    Usage:
+        python -m benchmarks.stages [--runs 3] [--format pdf|html] [--output results.json] [--baseline previous.json]
+            [--golden-dir benchmarks/golden] [--update-golden] [corpus arguments, see benchmarks.corpus]
+"""
+
+from argparse import ArgumentParser
+
+from difflib import unified_diff
+
+from hashlib import sha256
+
+from json import dump, dumps, load
+
+from os import devnull, makedirs
+from os.path import dirname, isfile, join
+
+from platform import python_version
+
+from statistics import median
+
+from sys import exit
+
+from fitz import Document
+
+from benchmarks.corpus import add_corpus_arguments, create_benchmark_root, generate_project, get_corpus_options
+from benchmarks.server import serve_directory
+from compiloor.services.environment.utils import FileUtils, FindingUtils
+from compiloor.services.parser.cache import FragmentCache
+from compiloor.services.parser.chromium import ChromiumPool, create_chromium_document
+from compiloor.services.parser.finding import Finding
+from compiloor.services.parser.indexing import create_report_with_page_numbers_and_legend
+from compiloor.services.parser.preview import create_html_document
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.typings.finding import Severity
+from compiloor.services.utils.assets import AssetCache
+from compiloor.services.utils.timing import StageTimer
+
+
+# The directory the golden copies of the outputs are stored in by default:
+GOLDEN_DIRECTORY: str = join(dirname(__file__), "golden")
+
+# The slowdown of a stage, relative to the baseline, that gets reported as a regression:
+REGRESSION_THRESHOLD: float = 0.1
+
+def run_stages(root: str, output_dir: str, report_format: str, jobs: int) -> tuple[dict[str, float], str]:
+    """
+        Compiles the project in the given root stage by stage, without any of the caches. \n
+        Returns the duration of every stage and the path of the report.
+        :param output_dir: The directory the report's directory gets created in.
+    """
+
+    AssetCache.clear()
+    Finding._serialized.clear()
+
+    timer = StageTimer()
+
+    with FileUtils.project_root(root), FragmentCache.activate(False):
+        config = timer.run("config", FileUtils.read_config, True)
+
+        with timer.stage("asset fetch"):
+            remote_files: dict[str, str] = {
+                url: AssetCache.fetch(url).decode("utf-8") for url in [config["template_url"], config["stylesheet_url"]]
+            }
+
+        with timer.stage("finding parsing"):
+            _, _, findings = FindingUtils.get_finding_fragments()
+            Finding.serialize_all([fragment for severity in reversed(Severity) for fragment in findings[severity]], jobs)
+
+        # The customizer re-uses the findings that were just parsed and the fetched assets:
+        with timer.stage("assembly"):
+            customizer = ReportCustomizer(False, remote_files, jobs=jobs)
+
+            with open(devnull, "w") as file:
+                for fragment in customizer.stream_report(): file.write(fragment)
+
+        if report_format == "html":
+            report_path: str = timer.run("render", create_html_document, customizer.stream_report(), output_dir)
+        else:
+            # Like in a compile, the page's assets are revalidated before the render and served to it from the cache:
+            router = AssetRouter(customizer.asset_urls)
+            timer.run("assets", router.prefetch)
+
+            report_path: str = timer.run("render", create_chromium_document, customizer.stream_report(), output_dir, router)
+            timer.run("indexing", create_report_with_page_numbers_and_legend, report_path, customizer.report_section_headings)
+
+    return get_durations(timer), report_path
+
+def get_durations(timer: StageTimer) -> dict[str, float]:
+    return { name: end - start for name, (start, end) in timer.stages.items() }
+
+def get_report_text(report_path: str, report_format: str) -> str:
+    """
+        Returns the text of the given report. The pages of a PDF are separated by form feeds.
+    """
+
+    if report_format == "html": return open(report_path, "r").read()
+
+    with Document(report_path) as pdf: return "\f".join(page.get_text() for page in pdf)
+
+def check_golden(text: str, path: str, update: bool) -> bool:
+    """
+        Compares the given text against the golden copy at the given path, or replaces the golden copy if update is set.
+    """
+
+    if update or not isfile(path):
+        makedirs(dirname(path), exist_ok=True)
+        open(path, "w").write(text)
+        print(f"Wrote the golden output to {path}.")
+        return True
+
+    golden: str = open(path, "r").read()
+
+    if golden == text:
+        print(f"The output matches the golden output at {path}.")
+        return True
+
+    print(f"The output differs from the golden output at {path}:")
+    print("".join(list(unified_diff(golden.splitlines(True), text.splitlines(True), "golden", "current"))[:60]))
+
+    return False
+
+def compare(results: dict, baseline: dict) -> None:
+    """
+        Prints the change of every stage's median against the baseline results.
+    """
+
+    if baseline["corpus"] != results["corpus"]: print("Warning: the baseline was measured on a different corpus.")
+
+    for name, stage in results["stages"].items():
+        if not name in baseline["stages"]: continue
+
+        previous: float = baseline["stages"][name]["median"]
+        change: float = stage["median"] / previous - 1 if previous else 0
+
+        print(f"{name:>16}: {previous:.3f}s -> {stage['median']:.3f}s ({change:+.0%}){' REGRESSION' if change > REGRESSION_THRESHOLD else ''}")
+
+def main() -> None:
+    parser = ArgumentParser(description="Times every stage of a compile over a synthetic corpus.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--format", choices=["pdf", "html"], default="pdf")
+    parser.add_argument("--output", help="The JSON file the results are written to.")
+    parser.add_argument("--baseline", help="The JSON results of a previous version to compare against.")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIRECTORY)
+    parser.add_argument("--update-golden", action="store_true")
+    add_corpus_arguments(parser)
+
+    arguments = parser.parse_args()
+    corpus: dict = get_corpus_options(arguments)
+
+    with create_benchmark_root() as root:
+        project: str = join(root, "project")
+        makedirs(join(project, "assets"))
+
+        with serve_directory(join(project, "assets")) as assets_url:
+            generate_project(project, assets_url=assets_url, **corpus)
+
+            # The browser launch is a one-off cost that isn't part of the render:
+            if arguments.format == "pdf":
+                for future in ChromiumPool.shared().warm(): future.result()
+
+            runs: list[dict[str, float]] = []
+
+            for run in range(arguments.runs):
+                # Every run gets its own output directory, so that the reports of quick runs never collide:
+                makedirs(join(root, "runs", str(run)))
+                durations, report_path = run_stages(project, join(root, "runs", str(run)), arguments.format, arguments.jobs)
+                runs.append(durations)
+                print(f"Run {run + 1}: " + ", ".join(f"{name} {duration:.3f}s" for name, duration in durations.items()))
+
+            text: str = get_report_text(report_path, arguments.format)
+
+        if arguments.format == "pdf": ChromiumPool.shared().close()
+
+    results: dict = {
+        "python": python_version(),
+        "corpus": corpus,
+        "format": arguments.format,
+        "runs": arguments.runs,
+        "jobs": arguments.jobs,
+        "stages": {
+            name: {
+                "median": median(run[name] for run in runs),
+                "min": min(run[name] for run in runs),
+                "max": max(run[name] for run in runs),
+            }
+            for name in runs[0]
+        },
+        "total": median(sum(run.values()) for run in runs),
+        "output_hash": sha256(text.encode()).hexdigest(),
+    }
+
+    print(dumps(results["stages"], indent=4))
+
+    if arguments.output:
+        with open(arguments.output, "w") as file: dump(results, file, indent=4)
+    if arguments.baseline: compare(results, load(open(arguments.baseline, "r")))
+
+    # Every corpus and format has its own golden output:
+    golden_key: str = sha256(dumps(corpus, sort_keys=True).encode()).hexdigest()[:12]
+
+    if not check_golden(text, join(arguments.golden_dir, f"corpus-{golden_key}.{arguments.format}.txt"), arguments.update_golden): exit(1)
+
+if __name__ == "__main__":
+    main()
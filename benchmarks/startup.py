@@ -0,0 +1,113 @@
+"""
+    Startup benchmark of the CLI commands.
+
+    Runs every command in a fresh interpreter with "-X importtime" and sums the import time of the modules it loaded.
+    The lightweight commands (i.e. "compiloor add-finding", which gets scripted in bulk) must stay within their import budget
+    and must not load any of the rendering stack, which is only imported by the commands that render.
+
+    Usage: python -m benchmarks.startup [--runs 5] [--scale 1.0]
+"""
+
+from argparse import ArgumentParser
+
+from os import environ, makedirs
+from os.path import join
+
+from shutil import rmtree
+
+from subprocess import run
+
+from sys import executable, exit
+
+from benchmarks.corpus import create_benchmark_root, generate_project
+
+
+# The modules of the rendering stack, which the lightweight commands must never import.
+# Pygments isn't one of them, since typer's help formatting (through rich) already imports it:
+RENDERING_MODULES: list[str] = ["playwright", "fitz", "bs4", "mistune", "tabulate", "requests"]
+
+# The commands, their import budget in milliseconds and whether they're allowed to load the rendering stack.
+# "init" and "add-finding" run in a scratch directory (their templates have no titles), the rest in a generated project:
+COMMANDS: list[tuple[list[str], float, bool]] = [
+    (["--help"], 150, False),
+    (["init", "--force"], 150, False),
+    (["add-finding", "--severity", "high"], 150, False),
+    (["set-config"], 150, False),
+    (["cache", "ls"], 150, False),
+    (["cache", "clear"], 150, False),
+    (["compile", "--format", "md"], 400, True),
+]
+
+def measure(arguments: list[str], cwd: str) -> tuple[float, set[str]]:
+    """
+        Runs the given command and returns its import time in milliseconds along with the top-level packages it imported.
+    """
+
+    result = run(
+        [executable, "-X", "importtime", "-c", f"from compiloor.services.cli.cli import cli; cli({arguments!r})"],
+        cwd=cwd, capture_output=True, text=True
+    )
+
+    if result.returncode:
+        errors: str = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"'compiloor {' '.join(arguments)}' failed:\n{result.stdout}{errors}")
+
+    total: float = 0
+    packages: set[str] = set()
+
+    # The lines look like "import time: <self us> | <cumulative us> | <indentation><module>":
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+
+        _, cumulative, module = line.split("|")
+
+        packages.add(module.strip().split(".")[0])
+        # Only the modules that were imported at the top level, since their time includes the time of their imports:
+        if module[1] != " ": total += int(cumulative) / 1000
+
+    return total, packages
+
+def main() -> None:
+    parser = ArgumentParser(description="Checks the import time of every CLI command against its budget.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Scales the budgets, i.e. for slower machines.")
+
+    arguments = parser.parse_args()
+    failed: bool = False
+
+    with create_benchmark_root() as root:
+        # "compiloor set-config" writes the base config in the home directory:
+        environ["HOME"] = root
+
+        # The markdown export never fetches the assets, so they don't need to be served:
+        generate_project(join(root, "project"), findings=10)
+        makedirs(join(root, "scratch"))
+
+        for command, budget, renders in COMMANDS:
+            cwd: str = join(root, "scratch" if command[0] in ("init", "add-finding") else "project")
+
+            measurements: list[tuple[float, set[str]]] = []
+
+            for _ in range(arguments.runs):
+                # The reports are timestamped by the second, so the reports of the previous runs are removed:
+                rmtree(join(cwd, "compiloor-report", "reports"), ignore_errors=True)
+                makedirs(join(cwd, "compiloor-report", "reports"), exist_ok=True)
+
+                measurements.append(measure(command, cwd))
+
+            # The fastest run is the one least disturbed by the rest of the machine:
+            import_time, packages = min(measurements, key=lambda measurement: measurement[0])
+
+            loaded: list[str] = [module for module in RENDERING_MODULES if module in packages]
+            over_budget: bool = import_time > budget * arguments.scale
+
+            print(f"compiloor {' '.join(command)}: {import_time:.1f}ms of imports (budget {budget * arguments.scale:.0f}ms)"
+                + (f", loads {', '.join(loaded)}" if loaded else "")
+                + (" OVER BUDGET" if over_budget else ""))
+
+            if over_budget or (loaded and not renders): failed = True
+
+    if failed: exit(1)
+
+if __name__ == "__main__":
+    main()
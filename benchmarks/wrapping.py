@@ -0,0 +1,72 @@
+"""
+    Benchmark for the code line wrapping on very long lines (i.e. minified or generated code in PoCs).
+
+    Highlights single lines of growing length with and without wrap_tokens, checks that every wrapped line fits
+    and that no code was lost, and asserts that the wrapping stays linear in the length of the line.
+
+    Usage: python -m benchmarks.wrapping [characters ...]
+"""
+
+from sys import argv
+
+from timeit import timeit
+
+from pygments import format, highlight
+
+from compiloor.constants.utils import CODE_LINE_MAX_LENGTH
+from compiloor.services.parser.markdown import DefaultStyleExtended, RendererRegistry
+from compiloor.services.parser.wrapping import wrap_tokens
+
+
+# Repeated until the line reaches the measured length:
+LINES: dict[str, tuple[str, str]] = {
+    "minified call chain": ("javascript", "a.b(c,d).e(f+g*h,[i,j],{k:l}).m(function(n){return n&&o(n,p)})"),
+    "long expression": ("solidity", "amount * totalSupply / totalAssets() + fee - rewards[msg.sender] + "),
+    "long comment": ("solidity", "// the vault rounds the shares down when withdrawing "),
+    "hex blob": ("solidity", "abcdef0123456789"),
+}
+
+def create_line(kind: str, characters: int) -> tuple[str, str]:
+    language, fragment = LINES[kind]
+    line: str = (fragment * (characters // len(fragment) + 1))[:characters]
+
+    return language, (f'bytes memory data = hex"{line}";' if kind == "hex blob" else line)
+
+def wrap(language: str, line: str) -> str:
+    lexer = RendererRegistry.get_lexer(language)
+    return format(wrap_tokens(lexer.get_tokens(line)), RendererRegistry.get_formatter(DefaultStyleExtended))
+
+def check(language: str, line: str) -> None:
+    """
+        Checks that every wrapped line fits and that the code itself is left untouched.
+    """
+
+    lexer = RendererRegistry.get_lexer(language)
+    wrapped: str = "".join(token[1] for token in wrap_tokens(lexer.get_tokens(line)))
+
+    assert max(len(wrapped_line) for wrapped_line in wrapped.split("\n")) <= CODE_LINE_MAX_LENGTH, "A wrapped line doesn't fit."
+
+    # The wrapping only adds line breaks, indentation and the repeated comment markers:
+    assert "".join(line.split()) == "".join(wrapped.replace("\n// ", "").split()), "The wrapping changed the code."
+
+def main(counts: list[int]) -> None:
+    for kind in LINES:
+        timings: list[float] = []
+
+        for characters in counts:
+            language, line = create_line(kind, characters)
+            check(language, line)
+
+            lexer, formatter = RendererRegistry.get_lexer(language), RendererRegistry.get_formatter(DefaultStyleExtended)
+
+            highlighted: float = timeit(lambda: highlight(line, lexer, formatter), number=5) / 5
+            wrapped: float = timeit(lambda: wrap(language, line), number=5) / 5
+            timings.append(wrapped)
+
+            print(f"{kind}, {characters} characters: {highlighted * 1000:.1f}ms highlighted, {wrapped * 1000:.1f}ms highlighted and wrapped")
+
+        # Ten times the characters can't take much more than ten times as long:
+        assert timings[-1] / timings[0] < counts[-1] / counts[0] * 2, f"Wrapping a {kind} isn't linear in its length."
+
+if __name__ == "__main__":
+    main([int(count) for count in argv[1:]] or [1000, 10000, 100000])
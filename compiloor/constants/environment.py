@@ -4,6 +4,8 @@ from os.path import abspath
 FINDING_TEMPLATE_NAME: str = "finding-template.md"
 CONFIG_NAME: str = "config.json"
 COMPILOOR_CACHE_DIRECTORY: str = "compiloor"
+FRAGMENT_CACHE_DIRECTORY: str = "fragments"
+ASSET_CACHE_DIRECTORY: str = "assets"
 
 INITIALIZED: bool = True
 NOT_INITIALIZED: bool = False
@@ -17,6 +19,16 @@ TEMPLATE_DIRECTORY: str = "templates"
 
 CONFIG_DIRECTORY: str = MAIN_DIRECTORY + "/" + CONFIG_NAME
 
+# The artifacts of the last build (see BuildGraph), reused by the compiles whose inputs didn't change:
+BUILD_DIRECTORY: str = MAIN_DIRECTORY + "/.build"
+# Bump whenever the build state or the output of a build step changes:
+BUILD_STATE_VERSION: int = 1
+
+FINDINGS_MANIFEST_NAME: str = ".manifest.json"
+FINDINGS_MANIFEST_DIRECTORY: str = MAIN_DIRECTORY + "/" + FINDINGS_MANIFEST_NAME
+# Bump whenever the format of the findings manifest changes:
+FINDINGS_MANIFEST_VERSION: int = 2
+
 FINDING_LIST_TABLE_COLUMNS = ["ID", "Title", "Severity", "Status"]
 
 BASE_CONFIG_SCHEMA: dict[str, str] = {
@@ -30,7 +42,7 @@ BASE_CONFIG_SCHEMA: dict[str, str] = {
     "type": "-",
     "commit": "-",
     "sloc": "-",
-    # Sections of the report. They go trough an md renderer.
+    # Sections of the report. They go through an md renderer.
     # "about_author_content": "ABOUT SECTION",
     # "disclaimer_content": "DISCLAIMER CONTENT",
     # "introduction_content": "INTRODUCTION CONTENT",
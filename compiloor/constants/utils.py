@@ -4,9 +4,52 @@ PAGE_NUMBER_FONT_SIZE: int = 14
 PRIMARY_COLOR_IN_PERCENTAGES: tuple[int] = (0.129, 0.145, 0.161)
 
 REPORT_EXTENSION = ".pdf"
+HTML_REPORT_EXTENSION = ".html"
+MARKDOWN_REPORT_EXTENSION = ".md"
+
+# The tags that get removed from the report when the parser leaves them empty:
+EMPTY_TAGS: list[str] = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "ul"]
+
+# The tags whose content is copied as-is when the report gets sanitized, since their whitespace is significant:
+RAW_TEXT_TAGS: list[str] = ["pre", "code", "textarea", "script", "style"]
+
+# The tags that never have any content or a closing tag:
+VOID_TAGS: list[str] = ["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"]
+
+# Marks where the streamed report gets split into the shards that are rendered concurrently:
+SHARD_BREAK: str = "<!--compiloor:shard-->"
 
 MAIN_REPORT_SECTIONS: list[str] = [
     "findings",
     "total_findings_amount",
     "stylesheet",
-]
\ No newline at end of file
+]
+
+# The amount of warm Chromium workers kept alive by the browser pool:
+CHROMIUM_POOL_SIZE: int = 1
+# The amount of renders after which a Chromium worker gets recycled:
+CHROMIUM_POOL_MAX_RENDERS: int = 50
+
+# The quiet period after the last saved file before "compiloor watch" recompiles:
+WATCH_DEBOUNCE_SECONDS: float = 0.3
+# The interval between directory scans when inotify is not available:
+WATCH_POLLING_INTERVAL_SECONDS: float = 0.5
+
+# Bump whenever the markdown rendering changes in a way that invalidates previously cached fragments:
+RENDERER_VERSION: str = "3"
+
+# The length after which the lines of the code blocks get wrapped:
+CODE_LINE_MAX_LENGTH: int = 80
+# The size after which the least recently used cached fragments get evicted:
+FRAGMENT_CACHE_MAX_SIZE: int = 256 * 1024 * 1024
+
+# The timeout for fetching remote assets such as the template and the stylesheet:
+ASSET_REQUEST_TIMEOUT_SECONDS: float = 15
+# The time for which a revalidated asset is trusted without asking its server again, so that back-to-back compiles stay offline:
+ASSET_FRESHNESS_SECONDS: float = 60
+
+# The size of the chunks a build artifact (i.e. the assembled report) is streamed in:
+BUILD_ARTIFACT_CHUNK_SIZE: int = 64 * 1024
+
+# The minimum amount of fragments for which rendering them in a process pool pays off:
+PARALLEL_RENDER_MIN_FRAGMENTS: int = 8
\ No newline at end of file
@@ -1,2 +0,0 @@
-from .cli.cli import cli
-from . import *
\ No newline at end of file
@@ -1,12 +1,11 @@
-from typer import Typer, Option
+from typer import Argument, Typer, Option
 
 from typing_extensions import Annotated
 
 from compiloor.services.environment.utils import FileUtils
 from compiloor.services.logger import Logger
-from compiloor.services.parser.chromium import create_chromium_document
-from compiloor.services.parser.indexing import create_report_with_page_numbers_and_legend
-from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.parser.parallel import RenderPool
+from compiloor.services.typings.compiler import ReportFormat
 from compiloor.services.typings.finding import SeverityAnnotation
 from compiloor.services.environment import (
     current_directory_initialized, findings_directory_not_empty, initialize_directory,
@@ -15,7 +14,12 @@ from compiloor.services.environment import (
 from compiloor.constants.environment import INITIALIZED, NOT_INITIALIZED
 from compiloor.services.utils.config import ConfigUtils
 
+
+# The rendering stack (Playwright, PyMuPDF, mistune, Pygments...) is only imported by the commands that render,
+# so that the lightweight commands (i.e. "compiloor add-finding") start quickly:
 cli = Typer()
+cache_cli = Typer()
+cli.add_typer(cache_cli, name="cache")
 
 @cli.command("init")
 def init(force: Annotated[bool, "force"] = False):
@@ -32,26 +36,108 @@ def add_finding(severity: Annotated[SeverityAnnotation, "severity"] = SeverityAn
     add_finding_template(severity.cast_to_severity())
 
 @cli.command("compile")
-def compile_report(markdown: Annotated[bool, "markdown"] = False):
+def compile_report(
+    markdown: Annotated[bool, "markdown"] = False,
+    no_cache: Annotated[bool, Option("--no-cache")] = False,
+    offline: Annotated[bool, Option("--offline")] = False,
+    jobs: Annotated[int, Option("--jobs", "-j")] = RenderPool.get_default_jobs(),
+    optimize: Annotated[bool, Option("--optimize")] = False,
+    linearize: Annotated[bool, Option("--linearize")] = False,
+    inline_assets: Annotated[bool, Option("--inline-assets", help="Inline the report's remote assets as data URIs before rendering.")] = False,
+    shards: Annotated[int, Option("--shards", min=1, help="Split the PDF at the severity sections and render up to this many shards concurrently.")] = 1,
+    format: Annotated[ReportFormat, Option("--format")] = ReportFormat.PDF.value,
+    profile: Annotated[bool, Option("--profile", help="Log the timings of every stage and sub-stage.")] = False,
+    trace: Annotated[str, Option("--trace", help="Write a Chrome trace of the stages to the given file.")] = None,
+    profile_stage: Annotated[str, Option("--profile-stage", help="Profile the given stage with cProfile, i.e. 'indexing/redactions'.")] = None
+):
+    from compiloor.services.compiler.pipeline import compile_pdf_report
+    
     current_directory_initialized(INITIALIZED)
     findings_directory_not_empty()
     ConfigUtils.validate_config_template_urls(FileUtils.read_config(json=True))
     
-    # The customizer creates the base report and handles almost all serialization:
-    customizer = ReportCustomizer(markdown)
+    compile_pdf_report({
+        "markdown": markdown, "use_cache": not no_cache, "offline": offline,
+        "jobs": jobs, "optimize": optimize, "linearize": linearize, "inline_assets": inline_assets, "shards": shards, "format": format,
+        "profile": profile, "trace": trace, "profile_stage": profile_stage
+    })
+
+@cli.command("compile-all")
+def compile_all(
+    roots: Annotated[list[str], Argument(help="The project roots or glob patterns matching them, i.e. 'audits/*'.")],
+    markdown: Annotated[bool, "markdown"] = False,
+    no_cache: Annotated[bool, Option("--no-cache")] = False,
+    offline: Annotated[bool, Option("--offline")] = False,
+    jobs: Annotated[int, Option("--jobs", "-j")] = RenderPool.get_default_jobs(),
+    optimize: Annotated[bool, Option("--optimize")] = False,
+    linearize: Annotated[bool, Option("--linearize")] = False,
+    inline_assets: Annotated[bool, Option("--inline-assets", help="Inline the report's remote assets as data URIs before rendering.")] = False,
+    shards: Annotated[int, Option("--shards", min=1, help="Split the PDF at the severity sections and render up to this many shards concurrently.")] = 1,
+    format: Annotated[ReportFormat, Option("--format")] = ReportFormat.PDF.value,
+    parallel: Annotated[int, Option("--parallel", "-p")] = 4
+):
+    from compiloor.services.compiler.batch import compile_all_reports, find_project_roots
+    
+    projects = find_project_roots(roots)
     
-    # Save the initial report to a PDF file:
-    report_path = create_chromium_document(customizer.report)
+    if not projects:
+        Logger.error("No initialized projects were found!")
+        exit(1)
     
-    # Finalize the report by adding page numbers and a legend:
-    create_report_with_page_numbers_and_legend(report_path, customizer.report_section_headings)
+    results = compile_all_reports(projects, {
+        "markdown": markdown, "use_cache": not no_cache, "offline": offline,
+        "jobs": jobs, "optimize": optimize, "linearize": linearize, "inline_assets": inline_assets, "shards": shards, "format": format
+    }, parallel)
     
-    Logger.success(f"Successfully compiled the report to {report_path}!")
+    if any(result["error"] for result in results): exit(1)
 
-    if not customizer.config["render_markdown"]: return
+@cli.command("watch")
+def watch(
+    markdown: Annotated[bool, "markdown"] = False,
+    no_cache: Annotated[bool, Option("--no-cache")] = False,
+    offline: Annotated[bool, Option("--offline")] = False,
+    jobs: Annotated[int, Option("--jobs", "-j")] = RenderPool.get_default_jobs(),
+    optimize: Annotated[bool, Option("--optimize")] = False,
+    linearize: Annotated[bool, Option("--linearize")] = False,
+    inline_assets: Annotated[bool, Option("--inline-assets", help="Inline the report's remote assets as data URIs before rendering.")] = False,
+    shards: Annotated[int, Option("--shards", min=1, help="Split the PDF at the severity sections and render up to this many shards concurrently.")] = 1,
+    format: Annotated[ReportFormat, Option("--format")] = ReportFormat.PDF.value
+):
+    from compiloor.services.watcher.watcher import ReportWatcher
     
-    file_paths: str = report_path.replace(".pdf", ".md")
-    open(file_paths, "w").write(customizer.config["markdown_report"])
-    Logger.success(f"Successfully compiled the markdown report to {file_paths}!")
-        
+    current_directory_initialized(INITIALIZED)
+    
+    # Recompiles the report on every change to the findings, the sections or the config:
+    ReportWatcher({
+        "markdown": markdown, "use_cache": not no_cache, "offline": offline,
+        "jobs": jobs, "optimize": optimize, "linearize": linearize, "inline_assets": inline_assets, "shards": shards, "format": format
+    }).watch()
 
+@cache_cli.command("ls")
+def cache_ls():
+    from compiloor.services.parser.cache import FragmentCache
+    from compiloor.services.utils.assets import AssetCache
+    
+    assets = AssetCache.read_index()
+    
+    for url, entry in assets.items():
+        Logger.info(f"{url} ({entry['size']} bytes, ETag: {entry.get('etag') or '-'}, Last-Modified: {entry.get('last_modified') or '-'})")
+    
+    fragments = FragmentCache.get_entries()
+    
+    Logger.info(f"{len(assets)} cached assets in {AssetCache.get_directory()}")
+    Logger.info(f"{len(fragments)} cached fragments ({sum(fragment[1] for fragment in fragments)} bytes) in {FragmentCache.get_directory()}")
+
+@cache_cli.command("clear")
+def cache_clear():
+    from shutil import rmtree
+
+    from compiloor.constants.environment import BUILD_DIRECTORY
+    from compiloor.services.parser.cache import FragmentCache
+    from compiloor.services.utils.assets import AssetCache
+    
+    AssetCache.clear()
+    FragmentCache.clear()
+    # The artifacts of the current project's last build:
+    rmtree(FileUtils.get_path(BUILD_DIRECTORY), ignore_errors=True)
+    Logger.success("Successfully cleared the cache!")
@@ -0,0 +1,2 @@
+from .pipeline import *
+from .batch import *
\ No newline at end of file
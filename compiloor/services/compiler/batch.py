@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from glob import glob
+
+from os.path import abspath, isdir, join, relpath
+
+from time import perf_counter
+
+from compiloor.constants.environment import FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.services.compiler.pipeline import compile_pdf_report
+from compiloor.services.environment.setup import findings_directory_not_empty
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.logger import Logger
+from compiloor.services.parser.chromium import ChromiumPool
+from compiloor.services.typings.compiler import CompileOptionsDict, CompileResultDict, ReportFormat
+from compiloor.services.utils.config import ConfigUtils
+from compiloor.services.utils.utils import validate_url
+
+
+def find_project_roots(patterns: list[str]) -> list[str]:
+    """
+        Returns the initialized project roots matching the given paths or glob patterns (i.e. "audits/*"), without duplicates.
+    """
+
+    roots: dict[str, None] = {}
+
+    for pattern in patterns:
+        matches: list[str] = sorted(glob(pattern))
+
+        if not matches: Logger.warning(f'No project matches "{pattern}".')
+
+        for match in matches:
+            if not isdir(join(match, MAIN_DIRECTORY)) or not isdir(join(match, FINDINGS_DIRECTORY)):
+                Logger.warning(f"Skipping {match} since it's not an initialized project.")
+                continue
+
+            roots[abspath(match)] = None
+
+    return list(roots)
+
+def compile_all_reports(roots: list[str], options: CompileOptionsDict, parallel: int) -> list[CompileResultDict]:
+    """
+        Compiles the reports of the given projects concurrently, with at most the given amount of compiles at once. \n
+        The projects share the browser pool, the render pool and the fetched template and stylesheet.
+    """
+
+    parallel = max(1, min(parallel, len(roots)))
+
+    # Every concurrent compile gets its own warm browser:
+    if options.get("format", ReportFormat.PDF) == ReportFormat.PDF: ChromiumPool.shared(parallel).warm()
+
+    remote_files: dict[str, str] = prefetch_remote_files(roots)
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        results = list(executor.map(lambda root: compile_project(root, options, remote_files), roots))
+
+    log_compile_results(results)
+
+    return results
+
+def prefetch_remote_files(roots: list[str]) -> dict[str, str]:
+    """
+        Fetches the templates and the stylesheets of the given projects once, keyed by their URL.
+        Projects that share the same template therefore don't each fetch it. \n
+        :note: Failures are left to the compile of the affected project, which reports them.
+    """
+
+    urls: set[str] = set()
+
+    for root in roots:
+        try:
+            with FileUtils.project_root(root): config = FileUtils.read_config(json=True)
+        except (OSError, ValueError): continue
+
+        urls.update(config[key] for key in ("template_url", "stylesheet_url") if validate_url(config.get(key, "")))
+
+    remote_files: dict[str, str] = {}
+
+    def fetch(url: str) -> None:
+        try: remote_files[url] = FileUtils.read_file(url, is_url=True)
+        except SystemExit: pass
+
+    with ThreadPoolExecutor(max_workers=8) as executor: list(executor.map(fetch, urls))
+
+    return remote_files
+
+def compile_project(root: str, options: CompileOptionsDict, remote_files: dict[str, str]) -> CompileResultDict:
+    """
+        Compiles the report of the project at the given root. Never raises, failures are returned instead.
+    """
+
+    started: float = perf_counter()
+    report_path, error = None, None
+
+    try:
+        with FileUtils.project_root(root):
+            findings_directory_not_empty()
+            ConfigUtils.validate_config_template_urls(FileUtils.read_config(json=True))
+
+            report_path = compile_pdf_report(options, remote_files)
+    # The failing step already logged why it exited:
+    except SystemExit:
+        error = "The compile exited early, see the errors above."
+    except Exception as err:
+        error = str(err) or type(err).__name__
+        Logger.error(f"An error occured while compiling the report in {root}: {error}")
+
+    return { "root": root, "report_path": report_path, "duration": perf_counter() - started, "error": error }
+
+def log_compile_results(results: list[CompileResultDict]) -> None:
+    rows: list[list[str]] = [
+        [
+            relpath(result["root"]),
+            "[red]failed[/red]" if result["error"] else "[green]compiled[/green]",
+            f'{result["duration"]:.2f}s',
+            # Only the first line of the error, the whole error was already logged:
+            result["error"].strip().splitlines()[0] if result["error"] else relpath(result["report_path"], result["root"])
+        ]
+        for result in results
+    ]
+
+    Logger.table("Compiled reports", ["Project", "Status", "Duration", "Report"], rows)
+
+    failed: int = len([result for result in results if result["error"]])
+
+    if failed: Logger.warning(f"{failed} out of {len(results)} reports failed to compile.")
+    else: Logger.success(f"Successfully compiled {len(results)} reports!")
@@ -0,0 +1,175 @@
+from contextlib import contextmanager
+
+from hashlib import sha256
+
+from json import dump, dumps, load
+
+from os import makedirs
+from os.path import isfile, join
+
+from shutil import copyfile
+
+from typing import Iterator
+
+from compiloor.constants.environment import BUILD_DIRECTORY, BUILD_STATE_VERSION
+from compiloor.constants.utils import ASSET_FRESHNESS_SECONDS, BUILD_ARTIFACT_CHUNK_SIZE
+from compiloor.services.environment.manifest import FindingManifest
+from compiloor.services.environment.utils import FileUtils, FindingUtils, ReportUtils
+from compiloor.services.parser.markdown import get_renderer_version
+from compiloor.services.parser.routing import AssetRouter, get_report_asset_urls
+from compiloor.services.typings.compiler import BuildStateDict, CompileOptionsDict
+from compiloor.services.typings.config import ProtocolInformationConfigDict
+from compiloor.services.utils.assets import AssetCache
+from compiloor.services.utils.timing import StageTimer
+from compiloor.services.utils.utils import get_markdown_asset_urls, write_atomically
+
+
+# The file every build step with an artifact keeps it in:
+BUILD_ARTIFACTS: dict[str, str] = {
+    "html": "report.html", # The assembled report, before it's sanitized.
+    "markdown": "report.md", # The markdown copy of the report.
+    "pdf": "report.pdf", # The report as Chromium printed it.
+    "indexed": "final.pdf", # The report with its page numbers and legend.
+}
+
+def get_key(*inputs: str) -> str:
+    return sha256("\0".join(inputs).encode()).hexdigest()
+
+class BuildGraph:
+    """
+        The steps of a PDF compile and the keys of their inputs: config → assets → findings → html → pdf → indexed,
+        with the markdown copy of the report branching off the findings. \n
+        Every key is a hash of the step's own inputs and of the key of the step it depends on, so a change invalidates
+        everything downstream of it. The artifacts of the last build are kept in the project's build directory,
+        so a compile resumes from the first step whose key changed and a compile without changes just copies the last report.
+        The config, the assets and the findings have no artifacts of their own, they're already cached by the asset and fragment caches.
+    """
+
+    directory: str
+    keys: dict[str, str] # The key of every step of the current compile.
+    state: BuildStateDict # The keys of the last build's artifacts.
+
+    config: ProtocolInformationConfigDict
+    manifest: FindingManifest
+    remote_files: dict[str, str] # The template and the stylesheet keyed by their URL, passed on to the customizer.
+    asset_urls: list[str] # The remote assets the report loads when it's rendered.
+    shards: int # The amount of shards the report gets split into.
+
+    def __init__(self, options: CompileOptionsDict, remote_files: dict[str, str] | None = None) -> None:
+        self.directory = FileUtils.get_path(BUILD_DIRECTORY)
+        self.remote_files = remote_files if remote_files is not None else {}
+        self.state, self.keys = self.read_state(), {}
+
+        timer: StageTimer = StageTimer.current()
+
+        timer.run("config", self.add_config_key)
+        # The manifest revalidates the hash of an unchanged finding by its modification time and size alone:
+        self.manifest = timer.run("manifest", FindingUtils.get_manifest)
+        timer.run("assets", self.add_assets_key)
+        timer.run("findings", self.add_findings_key)
+
+        # The stored report embeds the breaks between its shards:
+        self.shards = ReportUtils.get_shard_count(options.get("shards", 1), self.manifest)
+        self.keys["html"] = get_key("html", self.keys["findings"], str(self.shards))
+        self.keys["markdown"] = get_key("markdown", self.keys["findings"])
+        self.keys["pdf"] = get_key("pdf", self.keys["html"])
+        self.keys["indexed"] = get_key("indexed", self.keys["pdf"], str(options.get("optimize", False)), str(options.get("linearize", False)))
+
+    def add_config_key(self) -> None:
+        # The config includes the sections, which are read from their own files.
+        # The markdown copy of the report branches off the findings, so toggling it never invalidates the render:
+        self.config = FileUtils.read_config(json=True)
+
+        self.keys["config"] = get_key(str(BUILD_STATE_VERSION), dumps(self.config, sort_keys=True))
+
+    def add_assets_key(self) -> None:
+        """
+            Keys the template, the stylesheet and the page's assets by their content. \n
+            The assets that were revalidated within the freshness window are trusted as they are,
+            so that back-to-back compiles never wait on the network.
+        """
+
+        template: str = self.read_remote_file(self.config["template_url"])
+        stylesheet: str = self.read_remote_file(self.config["stylesheet_url"])
+
+        # The images of the findings and the sections are only known from their markdown, since they're not rendered yet:
+        sections: list[str] = [str(self.config[key]) for key in self.config if "_content" in key]
+
+        self.asset_urls = list(dict.fromkeys([
+            *get_report_asset_urls(self.config["cover_img_url"], template, stylesheet),
+            *(url for section in sections for url in get_markdown_asset_urls(section)),
+            *self.manifest.get_asset_urls()
+        ]))
+
+        # The render serves the page's assets from the cache, so they're revalidated here instead:
+        AssetRouter(self.asset_urls).prefetch(ASSET_FRESHNESS_SECONDS)
+        index: dict[str, dict] = AssetCache.read_index()
+
+        self.keys["assets"] = get_key(
+            self.keys["config"], template, stylesheet, *(index.get(url, {}).get("digest", "") for url in self.asset_urls)
+        )
+
+    def add_findings_key(self) -> None:
+        entries = self.manifest.entries
+
+        self.keys["findings"] = get_key(
+            self.keys["assets"], get_renderer_version(), *(f"{finding_id}:{entries[finding_id]['hash']}" for finding_id in sorted(entries))
+        )
+
+    def read_remote_file(self, url: str) -> str:
+        if not url in self.remote_files: self.remote_files[url] = FileUtils.read_url(url, ASSET_FRESHNESS_SECONDS)
+        return self.remote_files[url]
+
+    def get_artifact(self, step: str) -> str:
+        return join(self.directory, BUILD_ARTIFACTS[step])
+
+    def is_fresh(self, step: str) -> bool:
+        """
+            Returns whether the last build's artifact of the given step was built from the same inputs.
+        """
+
+        return self.state["keys"].get(step) == self.keys[step] and isfile(self.get_artifact(step))
+
+    @contextmanager
+    def update(self, step: str) -> Iterator[str]:
+        """
+            Yields the path the artifact of the given step gets written to. \n
+            The step's key is only stored once the block completes, so a failed compile never leaves a partial artifact behind as fresh.
+        """
+
+        makedirs(self.directory, exist_ok=True)
+
+        self.state["keys"].pop(step, None)
+        self.write_state()
+
+        yield self.get_artifact(step)
+
+        self.state["keys"][step] = self.keys[step]
+        self.write_state()
+
+    def store(self, step: str, path: str) -> None:
+        with self.update(step) as artifact: copyfile(path, artifact)
+
+    def restore(self, step: str, path: str) -> str:
+        return copyfile(self.get_artifact(step), path)
+
+    def read_fragments(self, step: str) -> Iterator[str]:
+        """
+            Yields the artifact of the given step in chunks, so that it's never held in memory as a whole.
+        """
+
+        with open(self.get_artifact(step), "r") as file:
+            while (chunk := file.read(BUILD_ARTIFACT_CHUNK_SIZE)): yield chunk
+
+    def read_state(self) -> BuildStateDict:
+        try:
+            state = load(open(join(self.directory, "state.json"), "r"))
+            if state.get("version") == BUILD_STATE_VERSION: return state
+        # A missing or corrupted state just means that nothing gets reused:
+        except (OSError, ValueError, AttributeError): pass
+
+        return { "version": BUILD_STATE_VERSION, "keys": {}, "report_section_headings": [] }
+
+    def write_state(self) -> None:
+        with write_atomically(join(self.directory, "state.json")) as temp_path, open(temp_path, "w") as file:
+            dump(self.state, file, indent=4)
@@ -0,0 +1,205 @@
+from os.path import splitext
+
+from compiloor.constants.utils import CHROMIUM_POOL_SIZE, MARKDOWN_REPORT_EXTENSION, REPORT_EXTENSION
+from compiloor.services.compiler.build import BuildGraph
+from compiloor.services.environment.utils import ReportUtils
+from compiloor.services.logger import Logger
+from compiloor.services.parser.cache import FragmentCache
+from compiloor.services.parser.chromium import ChromiumPool, create_chromium_document
+from compiloor.services.parser.exporter import create_markdown_document, write_markdown_report
+from compiloor.services.parser.indexing import create_report_with_page_numbers_and_legend
+from compiloor.services.parser.parallel import RenderPool
+from compiloor.services.parser.preview import create_html_document
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.sharding import create_sharded_chromium_document
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.typings.compiler import CompileOptionsDict, ReportFormat
+from compiloor.services.utils.assets import AssetCache
+from compiloor.services.utils.timing import StageTimer
+
+
+def compile_pdf_report(options: CompileOptionsDict, remote_files: dict[str, str] | None = None) -> str:
+    """
+        Compiles the report in the current directory and returns the path of the PDF (or the HTML or markdown report). \n
+        :param remote_files: Remote files fetched by previous compiles, keyed by their URL. Gets populated with the newly fetched ones.
+    """
+
+    timer = StageTimer(options.get("profile_stage"))
+
+    # Makes the timer and the caches' settings and statistics reachable from the nested stages (i.e. the Chromium render and the indexing).
+    # They are scoped to the current context, so the concurrent compiles of a batch never share them:
+    with timer.activate(), FragmentCache.activate(options.get("use_cache", True)), AssetCache.activate(options.get("offline", False)):
+        report_format: ReportFormat = options.get("format", ReportFormat.PDF)
+
+        # The markdown export reads the sources directly, so it needs neither the customizer nor a browser:
+        if report_format == ReportFormat.MD: report_path = timer.run("export", create_markdown_document)
+        else: report_path = render_report(options, remote_files, timer, report_format)
+
+    Logger.success(f"Successfully compiled the report to {report_path}!")
+    timer.log()
+
+    if options.get("profile"): timer.log_table()
+    if options.get("trace"): timer.write_trace(options["trace"])
+
+    return report_path
+
+def render_report(
+    options: CompileOptionsDict,
+    remote_files: dict[str, str] | None,
+    timer: StageTimer,
+    report_format: ReportFormat
+) -> str:
+    """
+        Renders the report to HTML and, for a PDF, prints and indexes it through Chromium. Returns the path of the report. \n
+        Without the caches (i.e. "--no-cache") the PDF is rebuilt from scratch instead of going through the build graph.
+    """
+
+    markdown, use_cache = options.get("markdown", False), options.get("use_cache", True)
+
+    # The PDF is built step by step, reusing whatever the last build already did:
+    if report_format == ReportFormat.PDF and use_cache: return build_report(options, remote_files, timer)
+
+    shards: int = ReportUtils.get_shard_count(options.get("shards", 1))
+
+    # Launching the browsers in the background while the report gets assembled, one per shard:
+    if report_format == ReportFormat.PDF:
+        for future in ChromiumPool.shared(max(shards, CHROMIUM_POOL_SIZE)).warm(): timer.track("chromium launch", future)
+
+    customizer = create_customizer(options, remote_files, timer)
+
+    if report_format == ReportFormat.HTML:
+        # The preview is written as-is, without a browser or page numbers:
+        report_path = timer.run("preview", create_html_document, customizer.stream_report())
+    else:
+        # The page's assets are revalidated up front, so that the render serves them from the cache without touching the network:
+        router = AssetRouter(customizer.asset_urls)
+        timer.run("assets", router.prefetch)
+
+        # Save the initial report to a PDF file. A sharded report gets printed by several browsers at once and merged:
+        report_path = timer.run(
+            "render",
+            create_sharded_chromium_document if shards > 1 else create_chromium_document,
+            customizer.stream_report(shards),
+            None,
+            router,
+            options.get("inline_assets", False)
+        )
+
+        # Finalize the report by adding page numbers and a legend:
+        timer.run(
+            "indexing",
+            create_report_with_page_numbers_and_legend,
+            report_path,
+            customizer.report_section_headings,
+            options.get("optimize", False),
+            options.get("linearize", False)
+        )
+
+    if not markdown: return report_path
+
+    # The markdown copy of the report is exported next to it from the findings that were already parsed:
+    timer.run(
+        "export",
+        write_markdown_report,
+        splitext(report_path)[0] + MARKDOWN_REPORT_EXTENSION,
+        customizer.config,
+        customizer.serialized_findings,
+        customizer.finding_amounts_by_severity
+    )
+
+    return report_path
+
+def build_report(options: CompileOptionsDict, remote_files: dict[str, str] | None, timer: StageTimer) -> str:
+    """
+        Builds the PDF report through the build graph and returns its path. \n
+        The steps whose inputs didn't change since the last build are skipped and their artifacts are reused instead,
+        so a compile without changes only copies the last report.
+    """
+
+    markdown = options.get("markdown", False)
+
+    graph: BuildGraph = timer.run("keys", BuildGraph, options, remote_files)
+    shards: int = graph.shards
+
+    if graph.is_fresh("indexed") and (not markdown or graph.is_fresh("markdown")):
+        Logger.info("Nothing changed since the last build, reusing its report.")
+        report_path: str = f"{ReportUtils.create_report_directory()}/final{REPORT_EXTENSION}"
+
+        timer.run("restore", graph.restore, "indexed", report_path)
+        if markdown: graph.restore("markdown", splitext(report_path)[0] + MARKDOWN_REPORT_EXTENSION)
+
+        return report_path
+
+    # Launching the browsers in the background while the report gets assembled, one per shard:
+    if not graph.is_fresh("pdf"):
+        for future in ChromiumPool.shared(max(shards, CHROMIUM_POOL_SIZE)).warm(): timer.track("chromium launch", future)
+
+    if not graph.is_fresh("html") or (markdown and not graph.is_fresh("markdown")):
+        customizer = create_customizer(options, graph.remote_files, timer)
+
+        # The report is stored as it's assembled, so that the render can be repeated without the customizer:
+        with graph.update("html") as html_path:
+            timer.run("write", ReportUtils.write_report, html_path, customizer.stream_report(shards))
+            graph.state["report_section_headings"] = customizer.report_section_headings
+
+        if markdown:
+            with graph.update("markdown") as markdown_path:
+                timer.run(
+                    "export",
+                    write_markdown_report,
+                    markdown_path,
+                    customizer.config,
+                    customizer.serialized_findings,
+                    customizer.finding_amounts_by_severity
+                )
+    else:
+        Logger.info("The report didn't change since the last build, reusing it.")
+
+    if graph.is_fresh("pdf"):
+        Logger.info("The rendered report didn't change since the last build, only indexing it again.")
+        report_path = f"{ReportUtils.create_report_directory()}/final{REPORT_EXTENSION}"
+
+        timer.run("restore", graph.restore, "pdf", report_path)
+    else:
+        # The page's assets were already revalidated while the keys were computed:
+        report_path = timer.run(
+            "render",
+            create_sharded_chromium_document if shards > 1 else create_chromium_document,
+            graph.read_fragments("html"),
+            None,
+            AssetRouter(graph.asset_urls),
+            options.get("inline_assets", False)
+        )
+
+        # The indexing edits the report in place, so the print is stored before it:
+        graph.store("pdf", report_path)
+
+    timer.run(
+        "indexing",
+        create_report_with_page_numbers_and_legend,
+        report_path,
+        graph.state["report_section_headings"],
+        options.get("optimize", False),
+        options.get("linearize", False),
+        # An incremental save would keep the timestamps of the print in the report:
+        True
+    )
+
+    graph.store("indexed", report_path)
+
+    if markdown: graph.restore("markdown", splitext(report_path)[0] + MARKDOWN_REPORT_EXTENSION)
+
+    return report_path
+
+def create_customizer(options: CompileOptionsDict, remote_files: dict[str, str] | None, timer: StageTimer) -> ReportCustomizer:
+    """
+        Assembles the report with the customizer, which creates the base report and handles almost all serialization.
+    """
+
+    customizer = ReportCustomizer(options.get("markdown", False), remote_files, timer, options.get("jobs") or RenderPool.get_default_jobs())
+
+    if options.get("use_cache", True):
+        Logger.info(f"Rendered the findings with {FragmentCache.get_stats()}.")
+        FragmentCache.evict()
+
+    return customizer
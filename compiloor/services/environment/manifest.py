@@ -0,0 +1,141 @@
+from hashlib import sha256
+
+from json import dump, load
+
+from os import scandir
+from os.path import join
+
+from re import compile as re_compile
+
+from compiloor.constants.environment import FINDINGS_MANIFEST_VERSION
+from compiloor.services.logger import Logger
+from compiloor.services.typings.finding import FindingManifestEntryDict, Severity, SeverityFolderIndex
+from compiloor.services.utils.utils import get_markdown_asset_urls, write_atomically
+
+
+# Matches the file names of the findings, i.e. '[M-03].md':
+FINDING_FILE_NAME_PATTERN = re_compile(r"\[(GAS|QA|C|H|M|L)-(\d+)\]\.md")
+
+class FindingManifest:
+    """
+        An index of the findings directory built from a single scan of it. \n
+        The findings are keyed by the ID parsed from their file names (i.e. "M-03"), so gaps in the indexes never hide a finding.
+        The manifest is cached next to the config, so an unchanged finding is revalidated by its modification time and size alone.
+    """
+
+    directory: str
+    cache_path: str
+
+    entries: dict[str, FindingManifestEntryDict]
+
+    # The contents of the findings that had to be read to be hashed, so that they aren't read twice:
+    contents: dict[str, str]
+
+    def __init__(self, directory: str, cache_path: str) -> None:
+        self.directory, self.cache_path = directory, cache_path
+        self.entries, self.contents = {}, {}
+
+        cached: dict[str, FindingManifestEntryDict] = self.read_cache()
+
+        with scandir(directory) as files:
+            for file in files:
+                if not file.name.endswith(".md") or not file.is_file(): continue
+
+                match = FINDING_FILE_NAME_PATTERN.fullmatch(file.name)
+
+                if not match:
+                    Logger.warning(f"Skipping the finding '{file.name}', its name should be its ID (i.e. '[M-01].md').")
+                    continue
+
+                finding_id: str = FindingManifest.get_id(SeverityFolderIndex(match.group(1)).cast_to_severity(), int(match.group(2)))
+
+                if finding_id in self.entries:
+                    Logger.warning(f"Skipping the finding '{file.name}', its ID is already used by '{self.entries[finding_id]['name']}'.")
+                    continue
+
+                stat = file.stat()
+                entry: FindingManifestEntryDict | None = cached.get(finding_id)
+
+                if not entry or (entry["name"], entry["mtime"], entry["size"]) != (file.name, stat.st_mtime_ns, stat.st_size):
+                    self.contents[finding_id] = open(file.path, "r").read()
+
+                    entry = {
+                        "name": file.name,
+                        "mtime": stat.st_mtime_ns,
+                        "size": stat.st_size,
+                        "hash": sha256(self.contents[finding_id].encode()).hexdigest(),
+                        "asset_urls": get_markdown_asset_urls(self.contents[finding_id])
+                    }
+
+                self.entries[finding_id] = entry
+
+        if self.entries != cached: self.write_cache()
+
+    @staticmethod
+    def get_id(severity: Severity, index: int) -> str:
+        return f"{severity.cast_to_folder_sig().value}-{index}"
+
+    def get_indexes(self, severity: Severity) -> list[int]:
+        """
+            Returns the indexes of the findings with the given severity in ascending order.
+        """
+
+        prefix: str = f"{severity.cast_to_folder_sig().value}-"
+
+        return sorted(int(finding_id.removeprefix(prefix)) for finding_id in self.entries if finding_id.startswith(prefix))
+
+    def get_severities(self) -> list[Severity]:
+        """
+            Returns the severities that have at least one finding, i.e. the severity sections of the report.
+        """
+
+        return [severity for severity in Severity if self.get_indexes(severity)]
+
+    def get_next_index(self, severity: Severity) -> int:
+        """
+            Returns the index of a new finding with the given severity. Follows the highest index, so a gap never gets overwritten.
+        """
+
+        return max(self.get_indexes(severity), default=0) + 1
+
+    def read(self, severity: Severity) -> list[str]:
+        """
+            Returns the contents of the findings with the given severity in the order of their indexes.
+        """
+
+        findings: list[str] = []
+
+        for index in self.get_indexes(severity):
+            finding_id: str = FindingManifest.get_id(severity, index)
+
+            if not finding_id in self.contents:
+                self.contents[finding_id] = open(join(self.directory, self.entries[finding_id]["name"]), "r").read()
+
+            findings.append(self.contents[finding_id])
+
+        return findings
+
+    def get_asset_urls(self) -> list[str]:
+        """
+            Returns the remote assets referenced by any of the findings, without reading them.
+        """
+
+        return list(dict.fromkeys(url for entry in self.entries.values() for url in entry["asset_urls"]))
+
+    def get_hash(self, severity: Severity, index: int) -> str | None:
+        entry: FindingManifestEntryDict | None = self.entries.get(FindingManifest.get_id(severity, index))
+        return entry["hash"] if entry else None
+
+    def read_cache(self) -> dict[str, FindingManifestEntryDict]:
+        try:
+            cache = load(open(self.cache_path, "r"))
+            return cache["findings"] if cache.get("version") == FINDINGS_MANIFEST_VERSION else {}
+        # A missing or corrupted manifest just gets rebuilt:
+        except (OSError, ValueError, KeyError, AttributeError): return {}
+
+    def write_cache(self) -> None:
+        # A failure to write the manifest should never fail the compile:
+        try:
+            with write_atomically(self.cache_path) as temp_path, open(temp_path, "w") as file:
+                dump({ "version": FINDINGS_MANIFEST_VERSION, "findings": self.entries }, file, indent=4)
+        except OSError: pass
@@ -1,7 +1,7 @@
 from json import dumps
 
 from os import listdir, mkdir
-from os.path import abspath, isdir, isfile, join
+from os.path import isdir, isfile, join
 
 from shutil import rmtree
 
@@ -23,13 +23,13 @@ def current_directory_initialized(initialized: bool = True, force: bool = False)
     exit(1)
 
 def _current_directory_initialized() -> bool:
-    return isdir(abspath(MAIN_DIRECTORY)) and isdir(abspath(FINDINGS_DIRECTORY))
+    return isdir(FileUtils.get_path(MAIN_DIRECTORY)) and isdir(FileUtils.get_path(FINDINGS_DIRECTORY))
 
 def initialize_directory(force: bool = False) -> None:
     # erase everything if force:
     
-    _abs_main_dir = abspath(MAIN_DIRECTORY)
-    _abs_findings_dir = abspath(FINDINGS_DIRECTORY)
+    _abs_main_dir = FileUtils.get_path(MAIN_DIRECTORY)
+    _abs_findings_dir = FileUtils.get_path(FINDINGS_DIRECTORY)
     
     if force: rmtree(_abs_main_dir, ignore_errors=True)
 
@@ -37,7 +37,7 @@ def initialize_directory(force: bool = False) -> None:
         if not isdir(_abs_findings_dir): mkdir(_abs_findings_dir)
 
         mkdir(_abs_main_dir)
-        mkdir(abspath(REPORTS_DIRECTORY))
+        mkdir(FileUtils.get_path(REPORTS_DIRECTORY))
         mkdir(join(_abs_main_dir, "sections"))
 
         config: str
@@ -69,13 +69,13 @@ def add_finding_template(severity: Severity) -> None:
 
         folder_sig = severity.cast_to_folder_sig().value
         
-        index = FileUtils.get_fs_sig_index(FindingUtils.get_current_finding_amount(severity) + 1)
+        index = FileUtils.get_fs_sig_index(FindingUtils.get_next_finding_index(severity))
 
         # setting the index and severity:
         finding_template = finding_template.replace("{{finding_severity}}", folder_sig)
         finding_template = finding_template.replace("{{finding_index}}", index)    
         
-        open(join(abspath(FINDINGS_DIRECTORY), f"[{folder_sig}-{index}].md"), "w").write(finding_template)
+        open(join(FileUtils.get_path(FINDINGS_DIRECTORY), f"[{folder_sig}-{index}].md"), "w").write(finding_template)
         
         Logger.success(f'Successfully added a finding template for severity "{severity.name}"!')
     except Exception as err:
@@ -87,7 +87,7 @@ def findings_directory_not_empty() -> None:
     """
         Raises an exception if the findings directory is empty.
     """
-    dir: list[str] = listdir(abspath(FINDINGS_DIRECTORY))
+    dir: list[str] = listdir(FileUtils.get_path(FINDINGS_DIRECTORY))
     if '.DS_Store' in dir: dir.remove('.DS_Store')
 
     if dir: return
@@ -1,66 +1,99 @@
+from contextlib import contextmanager
+
+from contextvars import ContextVar
+
 from datetime import datetime
 
 from json import dumps, loads
 
-from os import listdir
-from os.path import abspath
+from os import listdir, mkdir
+from os.path import abspath, getsize, isdir, join
 
-from typing import Tuple
-
-from requests import get
+from typing import Iterable, Iterator, Tuple
 
 from compiloor.constants.utils import REPORT_EXTENSION
 from compiloor.constants.environment import (
-    CONFIG_DIRECTORY, FINDINGS_DIRECTORY, REPORTS_DIRECTORY, MAIN_DIRECTORY
+    CONFIG_DIRECTORY, FINDINGS_DIRECTORY, FINDINGS_MANIFEST_DIRECTORY, REPORTS_DIRECTORY, MAIN_DIRECTORY
 )
+from compiloor.services.environment.manifest import FindingManifest
 from compiloor.services.typings.config import ProtocolInformationConfigDict
 from compiloor.services.typings.finding import Severity
+from compiloor.services.logger import Logger
+from compiloor.services.utils.assets import AssetCache
+
 
+# The root of the project that is being compiled. Defaults to the current directory.
+# It's a context variable so that concurrent compiles (i.e. "compiloor compile-all") can each use their own project:
+PROJECT_ROOT: ContextVar[str | None] = ContextVar("project_root", default=None)
 
 class FileUtils:
     """
         Utility class for file operations.
     """
     
+    @staticmethod
+    def get_path(name: str) -> str:
+        """
+            Returns the absolute path of the given file relative to the root of the current project.
+        """
+        
+        root: str | None = PROJECT_ROOT.get()
+        return abspath(join(root, name) if root else name)
+    
+    @staticmethod
+    @contextmanager
+    def project_root(root: str) -> Iterator[None]:
+        """
+            Resolves the project files relative to the given root inside of the wrapped block.
+        """
+        
+        token = PROJECT_ROOT.set(abspath(root))
+        try: yield
+        finally: PROJECT_ROOT.reset(token)
+    
     @staticmethod
     def read_config(json: bool = False) -> str | ProtocolInformationConfigDict:
         """
             Returns the serialized contents of the config file.
         """
         
-        _config = open(abspath(CONFIG_DIRECTORY), "r").read()
+        _config = open(FileUtils.get_path(CONFIG_DIRECTORY), "r").read()
         
         _config = loads(_config) 
         
-        for file in listdir(abspath(MAIN_DIRECTORY+ "/sections")):
+        for file in listdir(FileUtils.get_path(MAIN_DIRECTORY + "/sections")):
             if not file.endswith(".md"): continue
             
-            _config[file.replace(".md", "")] = open(abspath(MAIN_DIRECTORY + f"/sections/{file}"), "r").read()
+            _config[file.replace(".md", "")] = open(FileUtils.get_path(MAIN_DIRECTORY + f"/sections/{file}"), "r").read()
         
         if not json and isinstance(_config, dict): _config = dumps(_config, indent=4)
         
         return _config
     
-    @staticmethod
-    def read_finding(severity: Severity, index: int) -> str:
-        """
-            Returns the contents of the finding with the given severity and index.
-        """
-        
-        return open(abspath(FINDINGS_DIRECTORY) + f"/[{severity.cast_to_folder_sig().value}-{FileUtils.get_fs_sig_index(index)}].md", "r").read()
-    
     @staticmethod
     def read_file(name: str, is_url: bool = False, html_tag: str | None = None) -> str:
         """
             Returns the contents of the file with the given name. Wrapps them in the given HTML tag if provided.
         """
 
-        file: str = open(abspath(name), "r").read() if not is_url else get(name).content.decode("utf-8")
+        file: str = FileUtils.read_url(name) if is_url else open(FileUtils.get_path(name), "r").read()
         
         if html_tag: file = f"<{html_tag}>{file}</{html_tag}>"
         
         return file
     
+    @staticmethod
+    def read_url(url: str, max_age: float = 0) -> str:
+        """
+            Returns the contents of the file at the given URL. Goes through the local asset cache.
+            :param max_age: The seconds for which a revalidated copy is served without asking the server again.
+        """
+        
+        try: return AssetCache.fetch(url, max_age).decode("utf-8")
+        except ConnectionError as err:
+            Logger.error(str(err))
+            exit(1)
+    
     @staticmethod
     def get_fs_sig_index(index: int) -> str:
         """
@@ -84,7 +117,7 @@ class FileUtils:
         """
         _timestamp = FileUtils.get_current_timestamp()
         return FileUtils.get_fs_sig_index(
-            len([occurence for occurence in listdir() if _timestamp in occurence])
+            len([occurence for occurence in listdir(FileUtils.get_path("")) if _timestamp in occurence])
         )
 
 class FindingUtils:
@@ -93,17 +126,20 @@ class FindingUtils:
     """
     
     @staticmethod
-    def get_current_finding_amount(severity: Severity) -> int:
-        """ 
-            Returns the current amount of findings for the given severity.
+    def get_manifest() -> FindingManifest:
         """
-        return len(
-            list(
-                filter(
-                    lambda x: x.endswith(".md") and x.startswith(f"[{severity.cast_to_folder_sig().value}"), listdir(abspath(FINDINGS_DIRECTORY))
-                )
-            )
-        )
+            Returns the manifest of the current project's findings, built from a single scan of the findings directory.
+        """
+        
+        return FindingManifest(FileUtils.get_path(FINDINGS_DIRECTORY), FileUtils.get_path(FINDINGS_MANIFEST_DIRECTORY))
+    
+    @staticmethod
+    def get_next_finding_index(severity: Severity) -> int:
+        """
+            Returns the index of a new finding for the given severity.
+        """
+        
+        return FindingUtils.get_manifest().get_next_index(severity)
     
     @staticmethod
     def get_finding_fragments() -> Tuple[int, dict[Severity, int], dict[Severity, list[str]]]:
@@ -119,13 +155,13 @@ class FindingUtils:
         findings_by_severity_amount: dict[Severity, int] = {}
         findings_by_severity: dict[Severity, str] = {}
         
+        # Every severity is served from the same scan of the findings directory:
+        manifest: FindingManifest = FindingUtils.get_manifest()
+        
         for _severity in Severity:
-            findings_amount_by_severity = FindingUtils.get_current_finding_amount(_severity)
-            findings_by_severity_amount[_severity] = findings_amount_by_severity
-            total_findings += findings_amount_by_severity
-            findings_by_severity[_severity] = [
-                FileUtils.read_finding(_severity, finding) for finding in range(1, findings_amount_by_severity + 1)
-            ] 
+            findings_by_severity[_severity] = manifest.read(_severity)
+            findings_by_severity_amount[_severity] = len(findings_by_severity[_severity])
+            total_findings += findings_by_severity_amount[_severity]
             
         return [
             total_findings, findings_by_severity_amount, findings_by_severity
@@ -142,7 +178,7 @@ class ReportUtils:
             Returns the current report count.
         """
         
-        return len(listdir(abspath(REPORTS_DIRECTORY)))
+        return len(listdir(FileUtils.get_path(REPORTS_DIRECTORY)))
     
     @staticmethod
     def get_report_name(index: int | None) -> str:
@@ -151,4 +187,46 @@ class ReportUtils:
         """
         
         if not index: index = ReportUtils.get_current_report_count()
-        return f'{abspath(REPORTS_DIRECTORY)}/report-{FileUtils.get_fs_sig_index(index)}{REPORT_EXTENSION}'
\ No newline at end of file
+        return f'{FileUtils.get_path(REPORTS_DIRECTORY)}/report-{FileUtils.get_fs_sig_index(index)}{REPORT_EXTENSION}'
+    
+    @staticmethod
+    def get_shard_count(shards: int, manifest: FindingManifest | None = None) -> int:
+        """
+            Returns the amount of shards the report gets split into, at most one per severity section (see ReportCustomizer.get_shard_breaks),
+            so that no more browsers get launched than there are shards.
+        """
+        
+        return max(1, min(shards, len((manifest or FindingUtils.get_manifest()).get_severities())))
+    
+    @staticmethod
+    def write_report(path: str, fragments: Iterable[str]) -> None:
+        """
+            Writes the report (i.e. its HTML) to the given path as it's generated, so that it's never held in memory as a whole.
+        """
+        
+        with open(path, "w") as file:
+            for fragment in fragments: file.write(fragment)
+        
+        Logger.info(f"Wrote {getsize(path) / 1024:.1f} KiB to {path}.")
+    
+    @staticmethod
+    def create_report_directory(dir: str | None = None) -> str:
+        """
+            Creates a timestamped directory for a new report in the given directory and returns its path.
+            Defaults to the reports directory of the current project.
+        """
+        
+        dir = dir or FileUtils.get_path(REPORTS_DIRECTORY)
+        
+        # report_index = ReportUtils.get_current_report_count() + 1 # Adding 1 for the new index
+
+        # dir: str = f'{dir}/report-{FileUtils.get_fs_sig_index(report_index)}'
+        
+        if isdir(f'{dir}/report-{FileUtils.get_current_timestamp()}'):
+            dir = f'{dir}/report-{FileUtils.get_timestamp_fs_sig_index()}'
+        else:
+            dir = f'{dir}/report-{FileUtils.get_current_timestamp()}'
+        
+        mkdir(dir)
+        
+        return dir
\ No newline at end of file
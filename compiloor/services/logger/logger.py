@@ -1,4 +1,5 @@
 from rich import print as rich_print
+from rich.table import Table
 
 
 class Logger:
@@ -19,6 +20,19 @@ class Logger:
     def QA(message: str = "", *args, **kwargs) -> None:
         rich_print(f"[bold blue]QA: [/bold blue][white]{message}", *args, **kwargs)
         
+    @staticmethod
+    def info(message: str = "", *args, **kwargs) -> None:
+        rich_print(f"[bold cyan]Info: [/bold cyan][white]{message}", *args, **kwargs)
+        
     @staticmethod
     def success(message: str = "", *args, **kwargs) -> None:
-        rich_print(f"[bold green]Success: [/bold green][white]{message}", *args, **kwargs)
\ No newline at end of file
+        rich_print(f"[bold green]Success: [/bold green][white]{message}", *args, **kwargs)
+        
+    @staticmethod
+    def table(title: str, columns: list[str], rows: list[list[str]]) -> None:
+        table = Table(title=title, title_justify="left")
+        
+        for column in columns: table.add_column(column)
+        for row in rows: table.add_row(*row)
+        
+        rich_print(table)
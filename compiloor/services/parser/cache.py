@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+
+from contextvars import ContextVar
+
+from hashlib import sha256
+
+from os import makedirs, remove, scandir, utime
+from os.path import join
+
+from shutil import rmtree
+
+from typing import Iterator
+
+from compiloor.constants.environment import FRAGMENT_CACHE_DIRECTORY
+from compiloor.constants.utils import FRAGMENT_CACHE_MAX_SIZE
+from compiloor.services.utils.config import ConfigUtils
+from compiloor.services.utils.stats import CacheStats
+from compiloor.services.utils.utils import write_atomically
+
+
+# Whether the compile running in the current context uses the cache, and its statistics.
+# They are context variables so that the concurrent compiles of "compiloor compile-all" can each have their own:
+FRAGMENT_CACHE_ENABLED: ContextVar[bool] = ContextVar("fragment_cache_enabled", default=True)
+FRAGMENT_CACHE_STATS: ContextVar[CacheStats | None] = ContextVar("fragment_cache_stats", default=None)
+
+class FragmentCache:
+    """
+        A persistent, content-addressed cache of the HTML rendered from markdown fragments. \n
+        The entries are keyed by a hash of the fragment and the renderer version,
+        so editing a finding or upgrading the renderer never serves stale HTML.
+        The least recently used entries get evicted once the cache outgrows its maximum size.
+        The renderer is only imported once a fragment gets rendered, so that managing the cache stays lightweight.
+    """
+
+    @staticmethod
+    @contextmanager
+    def activate(enabled: bool = True) -> Iterator[CacheStats]:
+        """
+            Enables or disables the cache for the current context inside of the wrapped block and counts its hits and misses from scratch.
+        """
+
+        enabled_token, stats_token = FRAGMENT_CACHE_ENABLED.set(enabled), FRAGMENT_CACHE_STATS.set(CacheStats())
+
+        try: yield FRAGMENT_CACHE_STATS.get()
+        finally:
+            FRAGMENT_CACHE_ENABLED.reset(enabled_token)
+            FRAGMENT_CACHE_STATS.reset(stats_token)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return FRAGMENT_CACHE_ENABLED.get()
+
+    @staticmethod
+    def get_stats() -> CacheStats:
+        """
+            Returns the statistics of the compile running in the current context.
+            Outside of a compile the hits and misses get counted by a throwaway instance.
+        """
+
+        return FRAGMENT_CACHE_STATS.get() or CacheStats()
+
+    @staticmethod
+    def get_directory() -> str:
+        """
+            Returns the location of the cached fragments.
+        """
+
+        return ConfigUtils.get_cache_directory(FRAGMENT_CACHE_DIRECTORY)
+
+    @staticmethod
+    def get_key(fragment: str) -> str:
+        from compiloor.services.parser.markdown import get_renderer_version
+
+        return sha256(f"{get_renderer_version()}\0{fragment}".encode()).hexdigest()
+
+    @staticmethod
+    def render(fragment: str) -> str:
+        """
+            Returns the HTML rendered from the given markdown fragment, rendering it only if it isn't cached.
+        """
+
+        from compiloor.services.parser.markdown import create_html_from_markdown
+
+        if not FragmentCache.is_enabled(): return create_html_from_markdown(fragment)
+
+        path: str = join(FragmentCache.get_directory(), FragmentCache.get_key(fragment) + ".html")
+
+        try:
+            html = open(path, "r").read()
+            utime(path) # Marking the entry as recently used.
+            FragmentCache.get_stats().add(hits=1)
+            return html
+        except OSError: pass
+
+        FragmentCache.get_stats().add(misses=1)
+        html = create_html_from_markdown(fragment)
+
+        # A failure to write to the cache should never fail the compile:
+        try: FragmentCache.write(path, html)
+        except OSError: pass
+
+        return html
+
+    @staticmethod
+    def write(path: str, html: str) -> None:
+        makedirs(FragmentCache.get_directory(), exist_ok=True)
+
+        with write_atomically(path) as temp_path, open(temp_path, "w") as file: file.write(html)
+
+    @staticmethod
+    def get_entries() -> list[tuple[float, int, str]]:
+        """
+            Returns the last use time, the size and the path of every cached fragment.
+        """
+
+        try:
+            with scandir(FragmentCache.get_directory()) as entries:
+                return [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries if entry.name.endswith(".html")]
+        except FileNotFoundError: return []
+
+    @staticmethod
+    def evict(max_size: int = FRAGMENT_CACHE_MAX_SIZE) -> None:
+        """
+            Removes the least recently used entries until the cache fits into the given size.
+        """
+
+        files = FragmentCache.get_entries()
+
+        size: int = sum(file[1] for file in files)
+        if size <= max_size: return
+
+        # Evicting down to 90% of the maximum size so that the next compiles don't immediately evict again:
+        for _, file_size, path in sorted(files):
+            if size <= max_size * 0.9: break
+
+            try: remove(path)
+            except OSError: continue
+
+            size -= file_size
+
+    @staticmethod
+    def clear() -> None:
+        rmtree(FragmentCache.get_directory(), ignore_errors=True)
@@ -1,44 +1,237 @@
-from bs4 import BeautifulSoup
-
-from os import mkdir
-from os.path import abspath, isdir
-
-from playwright.sync_api import sync_playwright
-
-from compiloor.services.environment.utils import FileUtils, ReportUtils
-from compiloor.constants.environment import REPORTS_DIRECTORY
-from compiloor.constants.utils import REPORT_EXTENSION
-
-
-def create_chromium_document(fragment: str, dir: str = abspath(REPORTS_DIRECTORY)) -> str:
-    """
-        Creates a PDF document from the given HTML fragment and saves it in the given directory.
-    """
-    
-    # This cleans empty tags added by the parser:
-    for tag in ["h1", "h2", "h3", "h4", "h5", "h6", "p", "ul"]: fragment = fragment.replace(f"<{tag}></{tag}>", "")
-    fragment = BeautifulSoup(fragment, "html.parser")
-    
-    # Using a context manager just because the documentation says so:
-    with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(headless=True)
-        document = browser.new_page()
-        document.set_content(str(fragment), wait_until="networkidle") # Wait until the page is fully loaded.
-        # report_index = ReportUtils.get_current_report_count() + 1 # Adding 1 for the new index
-        
-        # dir: str = f'{dir}/report-{FileUtils.get_fs_sig_index(report_index)}'
-        
-        if isdir(abspath(f'{dir}/report-{FileUtils.get_current_timestamp()}')):
-            dir = f'{dir}/report-{FileUtils.get_timestamp_fs_sig_index()}'
-        else: 
-            dir = f'{dir}/report-{FileUtils.get_current_timestamp()}'
-            
-        mkdir(dir)
-        pdf_dir: str = f'{dir}/final{REPORT_EXTENSION}'
-        document.emulate_media(media="screen")
-        document.pdf(path=pdf_dir, print_background=True, prefer_css_page_size=True, format="A4")
-        # Keeping the html digest for debugging purposes:
-        # open("report.html", "w").write(document.content())
-        
-        browser.close()
-    return pdf_dir
\ No newline at end of file
+from atexit import register as register_atexit
+
+from concurrent.futures import Future
+
+from contextvars import copy_context
+
+from os import remove
+
+from pathlib import Path
+
+from queue import Queue
+
+from tempfile import NamedTemporaryFile
+
+from threading import Lock, Thread
+
+from typing import Any, Callable, Iterable
+
+from playwright.sync_api import Browser, Error as PlaywrightError, Page, Playwright, sync_playwright
+
+from compiloor.services.environment.utils import ReportUtils
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+from compiloor.services.utils.timing import StageTimer
+from compiloor.constants.utils import CHROMIUM_POOL_MAX_RENDERS, CHROMIUM_POOL_SIZE, HTML_REPORT_EXTENSION, REPORT_EXTENSION
+
+
+class ChromiumWorker:
+    """
+        A warm headless Chromium instance with a pre-created page. \n
+        :note: Playwright's sync API can only be used from the thread that started it,
+        so every task is dispatched to the worker's own thread.
+    """
+
+    max_renders: int # The amount of renders after which the browser gets recycled.
+    renders: int # The amount of renders since the browser was last (re)started.
+    crashed: bool # Set by the page's "crash" event.
+
+    playwright: Playwright | None
+    browser: Browser | None
+    page: Page | None
+
+    def __init__(self, max_renders: int = CHROMIUM_POOL_MAX_RENDERS) -> None:
+        self.max_renders = max_renders
+        self.renders, self.crashed = 0, False
+        self.playwright, self.browser, self.page = None, None, None
+
+        self.tasks: Queue = Queue()
+        self.thread = Thread(target=self._loop, name="compiloor-chromium", daemon=True)
+        self.thread.start()
+
+    def submit(self, task: Callable[[Page], Any], is_render: bool = True) -> Future:
+        """
+            Schedules the given task on the worker's thread. The task receives the warm page.
+        """
+
+        future: Future = Future()
+        self.tasks.put((task, future, is_render))
+        return future
+
+    def warm(self) -> Future:
+        """
+            Starts the browser and creates the page without rendering anything.
+        """
+
+        return self.submit(lambda page: None, is_render=False)
+
+    def close(self, timeout: float = 10) -> None:
+        self.tasks.put(None)
+        self.thread.join(timeout)
+
+    def _loop(self) -> None:
+        while True:
+            item = self.tasks.get()
+            if item is None: break
+
+            task, future, is_render = item
+            if not future.set_running_or_notify_cancel(): continue
+
+            try: future.set_result(self._run(task, is_render))
+            except BaseException as err: future.set_exception(err)
+
+        self._stop()
+
+    def _run(self, task: Callable[[Page], Any], is_render: bool) -> Any:
+        if not self._healthy(): self._restart()
+
+        try:
+            result = task(self.page)
+        except PlaywrightError:
+            # The browser or the page died mid-render. Retrying once on a fresh instance:
+            self._restart()
+            result = task(self.page)
+
+        if is_render: self.renders += 1
+        return result
+
+    def _healthy(self) -> bool:
+        return (
+            self.browser is not None and self.browser.is_connected()
+            and self.page is not None and not self.page.is_closed()
+            and not self.crashed and self.renders < self.max_renders
+        )
+
+    def _restart(self) -> None:
+        self._stop(keep_playwright=True)
+
+        if not self.playwright: self.playwright = sync_playwright().start()
+
+        self.browser = self.playwright.chromium.launch(headless=True)
+        self.page = self.browser.new_page()
+        self.page.on("crash", lambda _: setattr(self, "crashed", True))
+        self.renders, self.crashed = 0, False
+
+    def _stop(self, keep_playwright: bool = False) -> None:
+        # The browser might have already crashed, so errors while closing are not relevant:
+        try:
+            if self.browser: self.browser.close()
+        except PlaywrightError: pass
+
+        self.browser, self.page = None, None
+
+        if keep_playwright or not self.playwright: return
+
+        try: self.playwright.stop()
+        except PlaywrightError: pass
+
+        self.playwright = None
+
+class ChromiumPool:
+    """
+        A pool of warm Chromium workers that get reused across renders.
+        Repeated renders only pay for loading the content and printing the PDF.
+    """
+
+    _shared: "ChromiumPool | None" = None
+    _shared_lock: Lock = Lock()
+
+    workers: list[ChromiumWorker]
+
+    def __init__(self, size: int = CHROMIUM_POOL_SIZE, max_renders: int = CHROMIUM_POOL_MAX_RENDERS) -> None:
+        self.workers = [ChromiumWorker(max_renders) for _ in range(max(size, 1))]
+        self.idle: Queue[ChromiumWorker] = Queue()
+
+        for worker in self.workers: self.idle.put(worker)
+
+    @staticmethod
+    def shared(size: int = CHROMIUM_POOL_SIZE) -> "ChromiumPool":
+        """
+            Returns the process-wide pool. It gets created on first use and closed when the process exits. \n
+            :param size: The amount of workers, only used when the pool gets created.
+        """
+
+        with ChromiumPool._shared_lock:
+            if not ChromiumPool._shared:
+                ChromiumPool._shared = ChromiumPool(size)
+                register_atexit(ChromiumPool._shared.close)
+
+        return ChromiumPool._shared
+
+    def warm(self) -> list[Future]:
+        """
+            Starts all of the workers' browsers in the background.
+        """
+
+        return [worker.warm() for worker in self.workers]
+
+    def render(self, task: Callable[[Page], Any]) -> Any:
+        """
+            Runs the given task on the first idle worker and blocks until it's done.
+        """
+
+        worker = self.idle.get()
+        try: return worker.submit(task).result()
+        finally: self.idle.put(worker)
+
+    def close(self) -> None:
+        for worker in self.workers: worker.close()
+
+def create_chromium_document(
+    report: Iterable[str],
+    dir: str | None = None,
+    router: AssetRouter | None = None,
+    inline_assets: bool = False
+) -> str:
+    """
+        Creates a PDF document from the given HTML fragments and saves it in the given directory.
+        Defaults to the reports directory of the current project. \n
+        The fragments are streamed into a file that Chromium loads, so the report is never held in memory as a whole.
+        :param router: Serves the page's requests from the asset cache and blocks the unknown hosts. Without it the page loads from the network.
+        :param inline_assets: Whether the assets known to the router are inlined into the report as data URIs.
+    """
+
+    dir = ReportUtils.create_report_directory(dir)
+    pdf_dir: str = f'{dir}/final{REPORT_EXTENSION}'
+
+    with NamedTemporaryFile("w", dir=dir, suffix=HTML_REPORT_EXTENSION, delete=False) as file: html_dir: str = file.name
+
+    try:
+        # This drops the empty tags added by the parser and the indentation of the fragments, so Chromium has less to parse:
+        fragments: Iterable[str] = sanitize_html_stream(report)
+        if router and inline_assets: fragments = router.inline(fragments)
+
+        StageTimer.current().run("write", ReportUtils.write_report, html_dir, fragments)
+
+        # The browser is kept warm between renders, so only the content loading and printing happen here.
+        # The task runs in a copy of the current context so that its stages are timed as a part of the current one:
+        context = copy_context()
+        ChromiumPool.shared().render(lambda document: context.run(print_chromium_document, document, html_dir, pdf_dir, router))
+    finally:
+        remove(html_dir)
+
+    if router: router.log()
+    return pdf_dir
+
+def print_chromium_document(document: Page, html_dir: str, pdf_dir: str, router: AssetRouter | None = None) -> None:
+    """
+        Loads the given HTML file into the page and prints it to a PDF file.
+    """
+
+    timer: StageTimer = StageTimer.current()
+
+    # The page is shared by the renders, so the router only handles the requests of this one:
+    if router: document.route("**/*", router.handle)
+
+    try:
+        with timer.stage("load"):
+            document.goto(Path(html_dir).as_uri(), wait_until="networkidle") # Wait until the page is fully loaded.
+            document.emulate_media(media="screen")
+
+        with timer.stage("print"):
+            document.pdf(path=pdf_dir, print_background=True, prefer_css_page_size=True, format="A4")
+    finally:
+        if router: document.unroute("**/*", router.handle)
+
+    # Keeping the html digest for debugging purposes:
+    # open("report.html", "w").write(document.content())
\ No newline at end of file
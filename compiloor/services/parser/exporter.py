@@ -0,0 +1,147 @@
+from re import compile as re_compile
+
+from typing import Iterator
+
+from tabulate import tabulate
+
+from compiloor.constants.environment import FINDING_LIST_TABLE_COLUMNS
+from compiloor.constants.report import (
+    FINDING_COUNT_TABLE_COLUMNS,
+    INFORMATION_TABLE_VARIABLES,
+    REPORT_SECTION_HEADINGS,
+    RISK_CLASSIFICATION_MAIN_CONTENT_MD,
+    RISK_CLASSIFICATION_IMPACT_CONTENT_MD,
+    RISK_CLASSIFICATION_LIKELIHOOD_CONTENT_MD,
+    RISK_CLASSIFICATION_ACTION_REQUIRED_CONTENT_MD
+)
+from compiloor.constants.utils import MARKDOWN_REPORT_EXTENSION
+from compiloor.services.environment.utils import FileUtils, FindingUtils, ReportUtils
+from compiloor.services.parser.finding import Finding
+from compiloor.services.parser.table import TableUtils
+from compiloor.services.typings.config import ProtocolInformationConfigDict
+from compiloor.services.typings.finding import Severity
+
+
+# Matches the headings of a finding, which get nested under the severity sections of the findings:
+FINDING_HEADING_PATTERN = re_compile(r"#{1,4} ")
+# Matches the start and the end of a fenced code block, the headings inside of it are code:
+CODE_FENCE_PATTERN = re_compile(r"\s*(```|~~~)")
+
+def create_markdown_document(dir: str | None = None) -> str:
+    """
+        Exports the report of the current project as markdown and saves it in the given directory. \n
+        The findings and the sections are read straight from their markdown sources,
+        so nothing gets rendered to HTML and neither the template nor a browser are needed.
+    """
+
+    config: ProtocolInformationConfigDict = FileUtils.read_config(json=True)
+    _, amounts_by_severity, fragments = FindingUtils.get_finding_fragments()
+
+    # The findings are only parsed for their IDs, titles and statuses:
+    findings: list[Finding] = [
+        Finding(fragment, render=False) for severity in reversed(list(Severity)) for fragment in fragments[severity]
+    ]
+
+    md_dir: str = f'{ReportUtils.create_report_directory(dir)}/final{MARKDOWN_REPORT_EXTENSION}'
+    write_markdown_report(md_dir, config, findings, amounts_by_severity)
+
+    return md_dir
+
+def write_markdown_report(
+    path: str,
+    config: ProtocolInformationConfigDict,
+    findings: list[Finding],
+    amounts_by_severity: dict[Severity, int]
+) -> None:
+    """
+        Writes the markdown report to the given path as it's generated.
+        :param findings: The findings ordered from the highest to the lowest severity.
+    """
+
+    ReportUtils.write_report(path, stream_markdown_report(config, findings, amounts_by_severity))
+
+def stream_markdown_report(
+    config: ProtocolInformationConfigDict,
+    findings: list[Finding],
+    amounts_by_severity: dict[Severity, int]
+) -> Iterator[str]:
+    """
+        Yields the markdown report section by section and finding by finding.
+        The sections follow the headings of the PDF report, the tables are GitHub tables.
+    """
+
+    heading_to_content: dict[str, str] = {
+        "About": config["about_author_content"],
+        "Disclaimer": config["disclaimer_content"],
+        "Introduction": config["introduction_content"],
+        f"About {config['protocol_name']}": config["about_protocol_content"],
+        "Risk Classification": RISK_CLASSIFICATION_MAIN_CONTENT_MD,
+        "Impact": RISK_CLASSIFICATION_IMPACT_CONTENT_MD,
+        "Likelihood": RISK_CLASSIFICATION_LIKELIHOOD_CONTENT_MD,
+        "Action required for severity levels": RISK_CLASSIFICATION_ACTION_REQUIRED_CONTENT_MD,
+        "Security Assessment Summary": config["security_assessment_summary_content"],
+    }
+
+    for heading in REPORT_SECTION_HEADINGS:
+        # The heading's level comes from its index, i.e. '5.1.' is a second level heading:
+        index, title = heading.split(" ", 1)
+        title = f"{title} {config['protocol_name']}" if heading == REPORT_SECTION_HEADINGS[3] else title
+
+        yield f"{'#' * index.count('.')} {title}\n\n"
+
+        if title == "Executive Summary": yield from stream_executive_summary(config, findings, amounts_by_severity)
+        elif title == "Findings": yield from stream_findings(findings)
+        else: yield f"{heading_to_content[title].strip()}\n\n"
+
+def stream_executive_summary(
+    config: ProtocolInformationConfigDict,
+    findings: list[Finding],
+    amounts_by_severity: dict[Severity, int]
+) -> Iterator[str]:
+    # The information table skips the values that weren't filled in, just like the PDF:
+    information: list[list[str]] = [
+        [INFORMATION_TABLE_VARIABLES[key], escape_table_cell(str(config[TableUtils.clean_row(key)]))]
+        for key in INFORMATION_TABLE_VARIABLES.keys() if config[TableUtils.clean_row(key)] != "-"
+    ]
+
+    counts: list[list[str]] = [
+        [severity.cast_to_display_case(), str(amounts_by_severity[severity])]
+        for severity in reversed(list(Severity)) if amounts_by_severity.get(severity)
+    ]
+
+    summary: list[list[str]] = [[escape_table_cell(cell) for cell in TableUtils.finding_to_table_row(finding)] for finding in findings]
+
+    yield f"## Protocol Summary\n\n{tabulate(information, headers=['', ''], tablefmt='github')}\n\n"
+    yield f"## Findings Count\n\n{tabulate(counts + [['Total Findings', str(len(findings))]], headers=FINDING_COUNT_TABLE_COLUMNS, tablefmt='github')}\n\n"
+    yield f"## Summary of Findings\n\n{tabulate(summary, headers=FINDING_LIST_TABLE_COLUMNS, tablefmt='github')}\n\n"
+
+def stream_findings(findings: list[Finding]) -> Iterator[str]:
+    """
+        Yields the findings under a section for each severity, with their headings nested under it.
+    """
+
+    current_severity: Severity | None = None
+
+    for finding in findings:
+        if finding.severity != current_severity:
+            current_severity = finding.severity
+            yield f"## {current_severity.cast_to_display_case()} Findings\n\n"
+
+        yield f"{nest_finding_headings(finding.fragment).strip()}\n\n**Status:** {finding.status.value}\n\n"
+
+def nest_finding_headings(fragment: str, levels: int = 2) -> str:
+    """
+        Moves the headings of the given finding the given amount of levels deeper, leaving its code blocks untouched.
+    """
+
+    lines: list[str] = fragment.split("\n")
+    is_code: bool = False
+
+    for index, line in enumerate(lines):
+        if CODE_FENCE_PATTERN.match(line): is_code = not is_code
+        elif not is_code and FINDING_HEADING_PATTERN.match(line): lines[index] = "#" * levels + line
+
+    return "\n".join(lines)
+
+def escape_table_cell(cell: str) -> str:
+    return cell.replace("|", "\\|").replace("\n", " ")
@@ -1,5 +1,9 @@
-from compiloor.services.parser.markdown import create_html_from_markdown
+from functools import partial
+
+from compiloor.services.parser.cache import FragmentCache
+from compiloor.services.parser.parallel import RenderPool
 from compiloor.constants.environment import FINDING_RESOLUTION_STATUS_HEADING
+from compiloor.services.environment.utils import FileUtils
 from compiloor.services.logger import Logger
 from compiloor.services.typings.finding import Severity, SeverityFolderIndex, FindingStatusAnnotation
 
@@ -21,7 +25,38 @@ class Finding:
     # This is the fragment that will be inserted into the report.
     render_fragment: str 
     
-    def __init__(self, fragment: str) -> None:
+    # The findings serialized during the last compile of each project, keyed by their markdown fragment.
+    # Lets long-running commands (i.e. "compiloor watch") re-parse only the findings that changed,
+    # while the concurrent compiles of "compiloor compile-all" never evict each other's findings:
+    _serialized: dict[str, dict[str, "Finding"]] = {}
+    
+    @staticmethod
+    def serialize_all(fragments: list[str], jobs: int = 1) -> list["Finding"]:
+        """
+            Serializes the given finding fragments, re-using the findings from the last call whose fragments didn't change. \n
+            :param jobs: The amount of processes that parse and highlight the changed findings.
+        """
+        
+        root: str = FileUtils.get_path(".")
+        last: dict[str, Finding] = Finding._serialized.get(root, {})
+        
+        serialized: dict[str, Finding] = { fragment: last[fragment] for fragment in fragments if fragment in last }
+        
+        missing: list[str] = [fragment for fragment in dict.fromkeys(fragments) if not fragment in serialized]
+        
+        # The results keep the order of the fragments, so the output is identical to the serial path:
+        results = RenderPool.map(partial(serialize_finding, use_cache=FragmentCache.is_enabled()), missing, jobs)
+        
+        for fragment, (finding, hits, misses) in zip(missing, results):
+            serialized[fragment] = finding
+            FragmentCache.get_stats().add(hits, misses)
+        
+        # Only keeping the project's current findings so that edited ones don't pile up:
+        Finding._serialized[root] = serialized
+        
+        return [serialized[fragment] for fragment in fragments]
+    
+    def __init__(self, fragment: str, render: bool = True) -> None:
         self.fragment = fragment
         _fragment: list[str] = fragment.split("\n")
         first_row = _fragment[0]
@@ -61,11 +96,26 @@ class Finding:
 
         if not self.status: self.status = FindingStatusAnnotation.UNRESOLVED # Resolved is the default status. TODO: Make this configurable.
 
+        # The markdown export only needs the finding's metadata and its markdown:
+        if not render: return
+
         # TODO: Abstract away the CSS classes into a modular system.
         # The fragment used for adding to the report:
         # Contains the rendered markdown and code blocks rendered with pygments for syntax-highlighting:
+        # Unchanged findings are served from the on-disk fragment cache.
         self.render_fragment = f'''
             <div id="section-8-[[{self.severity.value}_severity_index]]-{self.id_num}" class="finding">
-                {create_html_from_markdown(self.fragment)}
+                {FragmentCache.render(self.fragment)}
             </div>
-        '''
\ No newline at end of file
+        '''
+
+def serialize_finding(fragment: str, use_cache: bool = True) -> tuple[Finding, int, int]:
+    """
+        Serializes a single finding. Runs in the render pool's worker processes. \n
+        Returns the finding and the fragment cache hits and misses it caused, since the workers' statistics are not shared.
+    """
+    
+    # Counting the finding's own statistics, which the caller adds to the compile's instead of counting them twice when running in-process:
+    with FragmentCache.activate(use_cache) as stats: finding = Finding(fragment)
+    
+    return (finding, stats.hits, stats.misses)
\ No newline at end of file
@@ -1,106 +1,243 @@
+from bisect import bisect_left
+
+from re import compile as re_compile
+
 from fitz import (
-    Document, Page, Rect, TEXT_ALIGN_CENTER,
+    Document, Page, Rect, LINK_GOTO, LINK_NAMED, TEXT_ALIGN_CENTER,
     TEXT_ALIGN_RIGHT, PDF_REDACT_IMAGE_NONE, PDF_ENCRYPT_KEEP
 )
 
+from typing import Iterable
+
 from compiloor.constants.utils import (
     PAGE_NUMBER_FONT_SIZE, PAGE_NUMBER_FOR_SECTION_FONT_SIZE, PRIMARY_COLOR_IN_PERCENTAGES
 )
-
-# Rewrite this method with more elegant code.    
-def create_report_with_page_numbers_and_legend(report_path: str, report_section_headings: list[str]) -> None:
+from compiloor.services.parser.optimization import remove_timestamps, save_optimized_pdf, save_reproducible_pdf
+from compiloor.services.utils.timing import StageTimer
+
+# Matches the '{{[index]_page}}' and '{{index_page}}' placeholders left in the table of contents:
+PAGE_PLACEHOLDER_PATTERN = re_compile(r"\{\{\[?[\w.\-]+\]?_page\}\}")
+
+def create_report_with_page_numbers_and_legend(
+    report_path: str,
+    report_section_headings: list[str],
+    optimize: bool = False,
+    linearize: bool = False,
+    reproducible: bool = False
+) -> None:
     """
-        Creates a new report with page numbers and a legend for the findings.
+        Creates a new report with page numbers and a legend for the findings. \n
+        The pages of the linked sections (i.e. the findings in the legend) come from the destinations Chromium emitted for them.
+        The remaining sections are looked up in the text of the pages, which is extracted once and resolved in memory.
+        :param optimize: Whether the report should be rewritten with garbage collection, compression and subset fonts.
+        :param linearize: Whether the optimized report should be linearized for fast web view.
+        :param reproducible: Whether the report should be rewritten in full, so that the same print is always saved to the same bytes.
     """
 
+    timer: StageTimer = StageTimer.current()
+
     new_pdf = Document(report_path) # Using fitz to edit the PDF.
-        
+
+    page: Page
+
+    page_texts: list[str] = []
     pages_to_delete: list[int] = []
-    
-    page: Page    
-    
-    page_to_index: dict[str, int] = {}
-    page_to_index_occurences: dict[str, int] = {}
-    
-    for page in new_pdf.pages():
-        if page.get_textpage().extractText() == "": 
-            pages_to_delete.append(page.number) 
-            continue
-        page.clean_contents()
-        
-    if len(pages_to_delete): new_pdf.delete_pages(pages_to_delete) # Deleting empty pages.
-
-    # Normalizing the page orientations:    
-    for page in new_pdf.pages():
-        if page.number == 0: continue         
-        x1, y1 = page.cropbox.x1, page.cropbox.y1 # Getting the dimensions of the page.
-
-        page.clean_contents()
-        
-        # Insert page numbers on each page:
-        page.insert_textbox(
-            # The whole width of the page for the last 25th of the page vertically:
-            Rect(0, y1 - y1 / 25, x1, y1),
-            str(page.number),
-            align = TEXT_ALIGN_CENTER,
-            fontsize = PAGE_NUMBER_FONT_SIZE,
-            color = PRIMARY_COLOR_IN_PERCENTAGES
-        )
-                    
-        page_text: str = page.get_textpage().extractText().replace("\n", " ").replace("  ", " ")
-                                            
-        for index in range(len(report_section_headings)):
-            heading = report_section_headings[index]
-
-            # Chopping the heading if it's too long so that we can find a complete fragment in the page:
-            if len(heading) > 38:
-                heading = heading[:38]
-                report_section_headings[index] = heading
-
-            if "`" in heading: 
-                heading = heading.split("`")[0]
-                report_section_headings[index] = heading
-
-            if not heading in page_text:
+    pages_with_placeholders: list[int] = []
+
+    with timer.stage("text extraction"):
+        for page in new_pdf.pages():
+            page_text: str = page.get_textpage().extractText()
+
+            if page_text == "":
+                pages_to_delete.append(page.number)
                 continue
-                                    
-            if heading in page_to_index: continue
-            
-            if not heading in page_to_index_occurences: 
-                page_to_index_occurences[heading] = 0
 
-            page_to_index_occurences[heading] += 1
+            if "_page}}" in page_text: pages_with_placeholders.append(page.number)
 
-            # Different if statements to avoid long lines of logic:
-            if page_to_index_occurences[heading] < 2: continue
+            page_texts.append(page_text.replace("\n", " ").replace("  ", " "))
 
-            if page_to_index_occurences[heading] < 3 and heading.startswith("["): continue
+    # The links point to the pages before the empty ones are deleted:
+    linked_placeholders: dict[str, tuple[int, Rect, int]] = timer.run(
+        "destinations", get_linked_placeholders, new_pdf, pages_with_placeholders, pages_to_delete
+    )
 
-            # Setting the page number for the section:
-            page_to_index[heading] = page.number
+    with timer.stage("page numbers"):
+        if len(pages_to_delete): new_pdf.delete_pages(pages_to_delete) # Deleting empty pages.
 
-    for section in page_to_index.keys():
         for page in new_pdf.pages():
-            index = section.split(" ")[0]
-
-            index = index if not "." in index else index[:-1]
-            
-            search_fragment: str = '{{[' + index + ']_page}}' if not '[' in index and not ']' in index else '{{' + index + '_page}}'
-
-            # Trying to find the fragment's coordiantes on the page:
-            fragment = page.search_for(search_fragment)
-                
-            if not fragment: continue
-
-            page.add_redact_annot(
-                fragment[0],
-                str(page_to_index[section]),
-                cross_out=False,
-                align=TEXT_ALIGN_RIGHT,
-                fontsize = PAGE_NUMBER_FOR_SECTION_FONT_SIZE,
-                text_color = PRIMARY_COLOR_IN_PERCENTAGES
+            page.clean_contents()
+
+            if page.number == 0: continue
+            x1, y1 = page.cropbox.x1, page.cropbox.y1 # Getting the dimensions of the page.
+
+            # Insert page numbers on each page:
+            page.insert_textbox(
+                # The whole width of the page for the last 25th of the page vertically:
+                Rect(0, y1 - y1 / 25, x1, y1),
+                str(page.number),
+                align = TEXT_ALIGN_CENTER,
+                fontsize = PAGE_NUMBER_FONT_SIZE,
+                color = PRIMARY_COLOR_IN_PERCENTAGES
             )
+
+    # The page number replacements grouped by the page they are on:
+    replacements: dict[int, list[tuple[Rect, str]]] = {}
+
+    for page_index, rect, page_number in linked_placeholders.values():
+        replacements.setdefault(page_index, []).append((rect, str(page_number)))
+
+    # Only the sections without a linked placeholder have to be looked up in the text of the pages:
+    report_section_headings = [
+        heading for heading in report_section_headings
+        if not get_section_placeholder(normalize_section_heading(heading)) in linked_placeholders
+    ]
+
+    with timer.stage("section search"):
+        section_pages: dict[str, int] = get_section_pages(page_texts, report_section_headings) if report_section_headings else {}
+        placeholder_locations: dict[str, list[tuple[int, Rect]]] = get_placeholder_locations(new_pdf, page_texts, linked_placeholders.keys())
+
+    for section, page_number in section_pages.items():
+        locations = placeholder_locations.get(get_section_placeholder(section))
+
+        if not locations: continue
+
+        # Every placeholder occurrence gets used up by a single section:
+        page_index, rect = locations.pop(0)
+        replacements.setdefault(page_index, []).append((rect, str(page_number)))
+
+    with timer.stage("redactions"):
+        for page_index, page_replacements in replacements.items():
+            page = new_pdf[page_index]
+
+            for rect, text in page_replacements:
+                page.add_redact_annot(
+                    rect,
+                    text,
+                    cross_out=False,
+                    align=TEXT_ALIGN_RIGHT,
+                    fontsize = PAGE_NUMBER_FOR_SECTION_FONT_SIZE,
+                    text_color = PRIMARY_COLOR_IN_PERCENTAGES
+                )
+
+            # Applying all of the page's replacements at once:
             page.apply_redactions(images=PDF_REDACT_IMAGE_NONE)
-            break
-        
-    new_pdf.save(report_path, incremental=True, encryption=PDF_ENCRYPT_KEEP)
\ No newline at end of file
+
+    with timer.stage("save"):
+        remove_timestamps(new_pdf)
+
+        if optimize or linearize: save_optimized_pdf(new_pdf, report_path, linearize)
+        elif reproducible: save_reproducible_pdf(new_pdf, report_path)
+        else: new_pdf.save(report_path, incremental=True, encryption=PDF_ENCRYPT_KEEP)
+
+def normalize_section_heading(heading: str) -> str:
+    """
+        Chops the heading so that a complete fragment of it can be found in the page text.
+    """
+
+    if len(heading) > 38: heading = heading[:38]
+
+    return heading.split("`")[0]
+
+def get_section_pages(page_texts: list[str], report_section_headings: list[str]) -> dict[str, int]:
+    """
+        Returns the page number of every section heading found in the given page texts. \n
+        The first occurrence of a heading is the table of contents, so a section starts at its second occurrence
+        (or the third one for the findings, whose titles are also in the findings summary).
+    """
+
+    headings: list[str] = [normalize_section_heading(heading) for heading in report_section_headings]
+
+    section_pages: dict[str, int] = {}
+    occurences: dict[str, int] = {}
+
+    # The cover page is never indexed:
+    for page_number, page_text in enumerate(page_texts[1:], start=1):
+        for heading in headings:
+            if heading in section_pages or not heading in page_text: continue
+
+            occurences[heading] = occurences.get(heading, 0) + 1
+
+            # Different if statements to avoid long lines of logic:
+            if occurences[heading] < 2: continue
+
+            if occurences[heading] < 3 and heading.startswith("["): continue
+
+            # Setting the page number for the section:
+            section_pages[heading] = page_number
+
+        # Headings that were already resolved don't need to be looked for on the following pages:
+        headings = [heading for heading in headings if not heading in section_pages]
+
+        if not headings: break
+
+    return section_pages
+
+def get_section_placeholder(section: str) -> str:
+    """
+        Returns the page number placeholder of the section with the given heading.
+    """
+
+    index: str = section.split(" ")[0]
+    index = index if not "." in index else index[:-1]
+
+    return '{{[' + index + ']_page}}' if not '[' in index and not ']' in index else '{{' + index + '_page}}'
+
+def get_linked_placeholders(pdf: Document, page_indexes: list[int], pages_to_delete: list[int]) -> dict[str, tuple[int, Rect, int]]:
+    """
+        Returns the page index and the coordinates of every page number placeholder inside of a link (i.e. the findings legend),
+        along with the page number of the linked section. \n
+        Chromium emits a named destination for every linked element while laying out the printed pages,
+        so the page of the section comes straight from the layout instead of a search for its heading.
+        :param page_indexes: The pages that contain placeholders.
+        :note: The returned page indexes are the ones after the given empty pages get deleted.
+    """
+
+    placeholders: dict[str, tuple[int, Rect, int]] = {}
+
+    def get_page_number(original_index: int) -> int:
+        # An empty page gets deleted, so its content starts on the next page:
+        return original_index - bisect_left(pages_to_delete, original_index)
+
+    for page_index in page_indexes:
+        page = pdf[page_index]
+        links = [link for link in page.get_links() if link["kind"] in (LINK_GOTO, LINK_NAMED)]
+
+        if not links: continue
+
+        words = [word for word in page.get_text("words") if PAGE_PLACEHOLDER_PATTERN.fullmatch(word[4])]
+
+        for word in words:
+            rect = Rect(word[:4])
+            link = next((link for link in links if link["from"].contains((rect.tl + rect.br) / 2)), None)
+
+            if not link or word[4] in placeholders: continue
+
+            target: int = link["page"] if link["kind"] == LINK_GOTO else pdf.resolve_link("#" + link["name"])[0]
+
+            if target < 0: continue
+
+            placeholders[word[4]] = (get_page_number(page.number), rect, get_page_number(target))
+
+    return placeholders
+
+def get_placeholder_locations(pdf: Document, page_texts: list[str], excluded: Iterable[str] = ()) -> dict[str, list[tuple[int, Rect]]]:
+    """
+        Returns the page index and the coordinates of every occurrence of the page number placeholders, in page order. \n
+        Only the pages whose text contains placeholders are searched.
+        :param excluded: The placeholders that were already located.
+    """
+
+    locations: dict[str, list[tuple[int, Rect]]] = {}
+
+    for page_index, page_text in enumerate(page_texts):
+        if not "_page}}" in page_text: continue
+
+        page = pdf[page_index]
+
+        for placeholder in dict.fromkeys(PAGE_PLACEHOLDER_PATTERN.findall(page_text)):
+            if placeholder in excluded: continue
+
+            for rect in page.search_for(placeholder):
+                locations.setdefault(placeholder, []).append((page_index, rect))
+
+    return locations
@@ -16,7 +16,7 @@ def create_finding_severities_legend_html(findings_section_index: str, findings:
     # TODO: This should be re-done after the class modularization process is complete.
     fragments = []
     
-    current_severity, current_severity_index, current_severity_finding_index = None, 0, 0
+    current_severity, current_severity_index = None, 0
 
     severity_to_index: dict[Severity, int] = {}
 
@@ -26,7 +26,6 @@ def create_finding_severities_legend_html(findings_section_index: str, findings:
             current_severity = finding.severity
             
             current_severity_index += 1 # The severity's index in the legend.
-            current_severity_finding_index = 0 # The finding's index in the legend.
             
             # The severities are indexed with sub-section indexes (i.e. 8.1) and the findings are indexed with their own identifiers: i.e. [H-01], etc.:
             section_index = f'[{findings_section_index}.{current_severity_index}]_page'
@@ -53,7 +52,6 @@ def create_finding_severities_legend_html(findings_section_index: str, findings:
                 '''
             )
 
-        current_severity_finding_index += 1
         section_index = f'[{finding.id}]_page'
 
         # TODO: Can we isolate the html fragments in some seperate place?
@@ -62,7 +60,7 @@ def create_finding_severities_legend_html(findings_section_index: str, findings:
             # The finding's legend entry in html:
             f'''
             <div class="sub-sub-paragraph">
-                <a href="#section-{findings_section_index}-{current_severity_index}-{current_severity_finding_index}">
+                <a href="#section-{findings_section_index}-{current_severity_index}-{finding.id_num}">
                     <div class="section-wrapper">
                         <p class="legend-section-heading">[{finding.id}] {finding.title.replace("`", "")}</p>
                         <p class="page-number">{{{{{section_index}}}}}</p>
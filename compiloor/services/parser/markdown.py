@@ -1,14 +1,23 @@
+from functools import cache
+
+from hashlib import sha256
+
 from mistune import (
-    create_markdown as mistune_create_markdown, HTMLRenderer
+    __version__ as mistune_version, create_markdown as mistune_create_markdown, HTMLRenderer, Markdown
 )
 
-from pygments import highlight
+from pygments import __version__ as pygments_version, format
 from pygments.formatters.html import HtmlFormatter
+from pygments.lexer import Lexer
 from pygments.lexers import get_lexer_by_name
+from pygments.style import Style
 from pygments.token import Error
 from pygments.styles.default import DefaultStyle
 
-from textwrap import wrap
+from threading import Lock, local
+
+from compiloor.constants.utils import RENDERER_VERSION
+from compiloor.services.parser.wrapping import wrap_tokens
 
 class DefaultStyleExtended(DefaultStyle):
     """
@@ -34,103 +43,81 @@ class HighlightRenderer(HTMLRenderer):
             # return '<pre><code>' + escape(code) + '</code></pre>'
             info = "solidity"
         
-        lexer = get_lexer_by_name(info, stripall=True)
-        formatter = HtmlFormatter(style=DefaultStyleExtended, full=True)
-            
-        code = code.split("\n")
-        for index in range(len(code)):
-            code[index] = split_line_if_too_long(code[index])
-        
-        code = "\n".join(code)
+        lexer = RendererRegistry.get_lexer(info)
+        formatter = RendererRegistry.get_formatter(DefaultStyleExtended)
         
-        highlighted_code: str = highlight(code, lexer, formatter)
+        # The code is lexed once, the long lines are wrapped on the token stream before it gets formatted:
+        highlighted_code: str = format(wrap_tokens(lexer.get_tokens(code)), formatter)
         
         # TODO: Abstract away the CSS classes into a modular system.
         return f'<div class="code-border no-underline-heading">{highlighted_code}</div>'
     
-def create_html_from_markdown(fragment: str, remove_newlines: bool = False) -> str:
+class RendererRegistry:
     """
-        Creates a Markdown fragment with syntax-highlighted code blocks.
+        Builds the markdown parsers, lexers and formatters once and reuses them across calls. \n
+        Lexers and formatters don't keep any state between highlights, so they are shared between threads.
+        The markdown parsers are kept per thread instead, since mistune doesn't guarantee their thread-safety.
     """
-
-    markdown: str = mistune_create_markdown(renderer=HighlightRenderer())(fragment)
     
-    return markdown.replace("\n", "") if remove_newlines else markdown
-
-def split_line_if_too_long(line: str, recursion_index: int = 0) -> str:
-    if len(line) <= 80 or recursion_index > 10: return line
-    
-    recursion_index += 1
+    _lock: Lock = Lock()
+    _local: local = local()
     
-    indentation: int = len(line) - len(line.lstrip())
+    _lexers: dict[str, Lexer] = {} # The lexers keyed by the code block language.
+    _formatters: dict[type[Style], HtmlFormatter] = {} # The formatters keyed by their style.
     
-    def new_line(index0: int, index1: int, indentation: int, prefix: str = "") -> str:
-        return line[:index0 + 1] + "\n" + " " * indentation + prefix + line[index1:]
-
-    last_line_index = 80
-    _line = ""
-
-    for symbol in ["+", "-"]:
-        if not line.startswith(symbol): continue
+    @staticmethod
+    def get_markdown() -> Markdown:
+        markdown: Markdown | None = getattr(RendererRegistry._local, "markdown", None)
         
-        _indentation = " " * (indentation + 1)  
-        if not "(" in line:
-            for index in range(last_line_index, 0, -1):
-                if line[index] != " ": continue
-                _line = new_line(index, index, 0, f"{symbol}" + _indentation)
-
-        for index in range(last_line_index):
-            if line[index] != "(": continue
-            _line = new_line(index - 1, index, 0, f"{symbol}" + _indentation)
-        
-        if len(_line.split("\n")) > 80:
-            _line = _line.split("\n")[0] + split_line_if_too_long(_line, recursion_index)
+        if not markdown: markdown = RendererRegistry._local.markdown = mistune_create_markdown(renderer=HighlightRenderer())
         
-        return _line
+        return markdown
     
-    if "//" in line:
+    @staticmethod
+    def get_lexer(language: str) -> Lexer:
+        if language in RendererRegistry._lexers: return RendererRegistry._lexers[language]
         
-        if not "(" in line and not " " in line:
-            _line = wrap(line, width=80, placeholder="...")                   
+        with RendererRegistry._lock:
+            # Unknown languages raise here and are never stored:
+            if not language in RendererRegistry._lexers: RendererRegistry._lexers[language] = get_lexer_by_name(language, stripall=True)
             
-        if not "(" in line:
-            for index in range(last_line_index, 0, -1):
-                if line[index] != " ": continue
-                _line = new_line(index, index, indentation, "//")
-                break
-
-        for index in range(last_line_index):
-            if line[index] != "(": continue
-            _line = new_line(index - 1, index, indentation, "//")
-
-        if len(line.split("\n")) > 80:
-            _line = line.split("\n")[0] + split_line_if_too_long(line, recursion_index)
-        
-        _line = _line if _line.count("//") == 1 else _line.replace("//   ", "")
-        return _line
+            return RendererRegistry._lexers[language]
+    
+    @staticmethod
+    def get_formatter(style: type[Style]) -> HtmlFormatter:
+        if style in RendererRegistry._formatters: return RendererRegistry._formatters[style]
         
-    if not "(" in line and not " " in line:
-        _line = wrap(line, width=80, placeholder="...")
+        with RendererRegistry._lock:
+            # Only the highlighted markup gets emitted, the styles are shared through get_highlight_stylesheet:
+            if not style in RendererRegistry._formatters: RendererRegistry._formatters[style] = HtmlFormatter(style=style)
+            
+            return RendererRegistry._formatters[style]
     
-    if not "(" in line:
-        for index in range(last_line_index, 0, -1):
-            if line[index] != " ": continue
-            _line = new_line(index, index, indentation + 2)
+def create_html_from_markdown(fragment: str, remove_newlines: bool = False) -> str:
+    """
+        Creates a Markdown fragment with syntax-highlighted code blocks.
+    """
+
+    markdown: str = RendererRegistry.get_markdown()(fragment)
     
-    for index in range(last_line_index):
-        if line[index] != "(": continue
-        _line = new_line(index - 1, index, indentation + 2)
+    return markdown.replace("\n", "") if remove_newlines else markdown
 
-    line_ = _line.split("\n")
+@cache
+def get_highlight_stylesheet(style: type[Style] = DefaultStyleExtended) -> str:
+    """
+        Returns the stylesheet for the highlighted code blocks. It gets added to the report once instead of to every code block. \n
+        :note: The rules are scoped to 'body' just like the ones Pygments used to embed in each block, so the report looks the same.
+    """
     
-    if len(line_[-1]) > 80:
-        if "," in _line and "(" in _line:
-            arguments = _line.split("(")[1].split(")")[0].replace(" ", "").split(",")
-            fragments_after_arguments = _line.split(")")[1]
+    return f'<style>{RendererRegistry.get_formatter(style).get_style_defs("body")}</style>'
 
-            for index in range(len(arguments)):
-                arguments[index] = (indentation + 2) * " " + arguments[index]
-                arguments[index] = arguments[index] + "," if len(arguments) - 1 > index else arguments[index]
-            _line = line_[0] + "(" + " " * (indentation + 2) + "\n" + (("\n").join(arguments) + "\n") + " " * indentation + ")" + fragments_after_arguments\
-        
-    return _line
\ No newline at end of file
+@cache
+def get_renderer_version() -> str:
+    """
+        Returns a fingerprint of everything that affects the HTML rendered from a markdown fragment:
+        the renderer itself, the mistune and Pygments versions and the code style.
+    """
+    
+    style: str = sha256(repr(sorted(DefaultStyleExtended.styles.items(), key=str)).encode()).hexdigest()[:16]
+    
+    return f"{RENDERER_VERSION}-{mistune_version}-{pygments_version}-{style}"
@@ -0,0 +1,68 @@
+from os.path import getsize
+
+from time import perf_counter
+
+from fitz import Document
+
+from compiloor.services.logger import Logger
+from compiloor.services.utils.utils import write_atomically
+
+
+def save_optimized_pdf(pdf: Document, report_path: str, linearize: bool = False) -> None:
+    """
+        Saves the given document to the report path with a full rewrite instead of an incremental save. \n
+        The unused objects (i.e. the revisions left by the redactions) are dropped, the streams are deflated
+        and the embedded fonts are subset to the glyphs that are actually used in the report.
+        :param linearize: Whether the PDF should be linearized for fast web view.
+    """
+
+    size_before: int = getsize(report_path)
+    start: float = perf_counter()
+
+    # Subsetting needs fontTools, a failure to subset should never fail the compile:
+    try: pdf.subset_fonts()
+    except Exception as err: Logger.warning(f"Couldn't subset the report's fonts: {err}")
+
+    # The report is never left partially written:
+    with write_atomically(report_path) as temp_path:
+        pdf.save(
+            temp_path,
+            garbage=4,
+            clean=True,
+            deflate=True,
+            deflate_images=True,
+            deflate_fonts=True,
+            linear=linearize,
+            no_new_id=True
+        )
+        pdf.close()
+
+    size_after: int = getsize(report_path)
+
+    Logger.info(
+        f"Optimized the report from {size_before / 1024:.1f} KiB to {size_after / 1024:.1f} KiB "
+        f"({(size_after / size_before - 1) * 100:+.0f}%) in {perf_counter() - start:.2f}s."
+    )
+
+
+def save_reproducible_pdf(pdf: Document, report_path: str) -> None:
+    """
+        Saves the given document to the report path with a full rewrite, without its timestamps and a new random ID. \n
+        An incremental save would keep the revision Chromium printed, whose info dictionary still has the date of the render.
+    """
+
+    remove_timestamps(pdf)
+
+    # A document can only be saved to its own file incrementally, so it's written to a temporary file first:
+    with write_atomically(report_path) as temp_path:
+        pdf.save(temp_path, no_new_id=True)
+        pdf.close()
+
+def remove_timestamps(pdf: Document) -> None:
+    """
+        Clears the creation and modification dates Chromium stamps the document with,
+        so that the same report is always saved with the same metadata.
+    """
+
+    metadata: dict[str, str] = { key: value for key, value in pdf.metadata.items() if not key in ("format", "encryption") }
+    pdf.set_metadata({ **metadata, "creationDate": "", "modDate": "" })
@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from multiprocessing import get_all_start_methods, get_context
+
+from os import cpu_count
+
+from threading import Lock
+
+from typing import Any, Callable
+
+from compiloor.constants.utils import PARALLEL_RENDER_MIN_FRAGMENTS
+
+
+class RenderPool:
+    """
+        A process pool for the CPU-bound rendering of markdown fragments (parsing and syntax highlighting). \n
+        The pool is created on first use and kept alive, so long-running commands only pay for the worker startup once.
+    """
+
+    _executor: ProcessPoolExecutor | None = None
+    _jobs: int = 0
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def get_default_jobs() -> int:
+        return cpu_count() or 1
+
+    @staticmethod
+    def get_executor(jobs: int) -> ProcessPoolExecutor:
+        with RenderPool._lock:
+            if RenderPool._executor and RenderPool._jobs == jobs: return RenderPool._executor
+            if RenderPool._executor: RenderPool._executor.shutdown()
+
+            # Forking a process that already runs threads (i.e. the Chromium workers) is unsafe,
+            # so the workers are forked from a clean server process that has the renderer preloaded instead:
+            if "forkserver" in get_all_start_methods():
+                context = get_context("forkserver")
+                context.set_forkserver_preload(["compiloor.services.parser.finding"])
+            else:
+                context = get_context("spawn")
+
+            RenderPool._executor = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+            RenderPool._jobs = jobs
+
+            return RenderPool._executor
+
+    @staticmethod
+    def map(function: Callable[[Any], Any], items: list, jobs: int) -> list:
+        """
+            Maps the function over the items in the process pool. The results keep the order of the items. \n
+            Single jobs and small batches are mapped in the current process, since the result is identical either way.
+        """
+
+        if jobs <= 1 or not items: return [function(item) for item in items]
+
+        # Small batches are only worth it once the workers are already running:
+        if len(items) < PARALLEL_RENDER_MIN_FRAGMENTS and RenderPool._jobs != jobs: return [function(item) for item in items]
+
+        # Sending multiple items per task to amortize the pickling overhead while still balancing the load:
+        chunksize: int = max(1, len(items) // (jobs * 4))
+
+        return list(RenderPool.get_executor(jobs).map(function, items, chunksize=chunksize))
\ No newline at end of file
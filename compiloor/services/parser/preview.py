@@ -0,0 +1,50 @@
+from re import Match, compile as re_compile
+
+from typing import Iterable, Iterator
+
+from compiloor.constants.utils import HTML_REPORT_EXTENSION
+from compiloor.services.environment.utils import ReportUtils
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+
+
+# Matches the opening and closing links and the '{{[index]_page}}' placeholders, in document order:
+PREVIEW_PATTERN = re_compile(r'<a\b[^>]*>|</a>|\{\{\[?([\w.\-]+?)\]?_page\}\}')
+LINK_ANCHOR_PATTERN = re_compile(r'href="#(section-[\w\-]+)"')
+
+def create_html_document(report: Iterable[str], dir: str | None = None) -> str:
+    """
+        Saves the given HTML fragments as a self-contained HTML preview in the given directory. \n
+        The preview skips Chromium and the PDF indexing, so it's written almost instantly.
+    """
+
+    html_dir: str = f'{ReportUtils.create_report_directory(dir)}/final{HTML_REPORT_EXTENSION}'
+    ReportUtils.write_report(html_dir, sanitize_html_stream(replace_page_placeholders(report)))
+
+    return html_dir
+
+def replace_page_placeholders(fragments: Iterable[str]) -> Iterator[str]:
+    """
+        Replaces the page number placeholders with the index of the section they point to, in a single pass over the fragments. \n
+        There are no pages in the preview, so the legend's links to the sections (i.e. '#section-8-1-2') act as the anchors
+        and the placeholders inside of them show the section's index (i.e. '8.1.2') instead of its page number.
+    """
+
+    anchor: str | None = None # The section the enclosing link points to.
+
+    def replace(match: Match) -> str:
+        nonlocal anchor
+        token: str = match.group(0)
+
+        if token.startswith("<a"):
+            link = LINK_ANCHOR_PATTERN.search(token)
+            anchor = link.group(1) if link else None
+            return token
+
+        if token == "</a>":
+            anchor = None
+            return token
+
+        index: str = anchor.removeprefix("section-").replace("-", ".") if anchor else match.group(1)
+        return f'<span class="page-anchor">{index}</span>'
+
+    for fragment in fragments: yield PREVIEW_PATTERN.sub(replace, fragment)
@@ -0,0 +1,163 @@
+from base64 import b64encode
+
+from concurrent.futures import ThreadPoolExecutor
+
+from mimetypes import guess_type
+
+from re import IGNORECASE, Match, compile as re_compile
+
+from threading import Lock
+
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from urllib.parse import urljoin, urlparse
+
+from compiloor.services.logger import Logger
+from compiloor.services.utils.assets import AssetCache
+from compiloor.services.utils.utils import validate_url
+
+# The router only handles Playwright's routes, so the customizer can discover the assets without importing Playwright:
+if TYPE_CHECKING: from playwright.sync_api import Route
+
+# Matches the remote assets the page loads: the sources of the embedded elements, the stylesheet links and the CSS 'url()'s and imports.
+# Links to other pages (i.e. '<a href="...">') are not assets, so they're left alone:
+ASSET_URL_PATTERN = re_compile(
+    r"""<(?:img|image|script|source|link|video|audio|iframe|embed)\b[^>]*?\b(?:src|href)\s*=\s*["']([^"']+)["']"""
+    r"""|url\(\s*["']?([^"')\s]+)["']?\s*\)"""
+    r"""|@import\s+["']([^"']+)["']""",
+    IGNORECASE
+)
+
+def get_asset_urls(content: str, base_url: str | None = None) -> list[str]:
+    """
+        Returns the remote assets referenced by the given HTML or CSS, resolving the relative ones against the given URL.
+    """
+
+    urls: list[str] = []
+
+    for match in ASSET_URL_PATTERN.finditer(content):
+        url: str = next(group for group in match.groups() if group)
+        if base_url: url = urljoin(base_url, url)
+
+        if urlparse(url).scheme in ("http", "https"): urls.append(url)
+
+    return list(dict.fromkeys(urls))
+
+def get_report_asset_urls(cover_img_url: str, template: str, stylesheet: str, fragments: Iterable[str] = ()) -> list[str]:
+    """
+        Returns the remote assets the report loads when it's rendered: the cover image, whatever the template and the stylesheet reference
+        and the images of the given HTML fragments (i.e. the rendered findings and sections). \n
+        The template and the stylesheet themselves are inlined into the report, so only their absolute asset URLs are remote.
+    """
+
+    return list(dict.fromkeys([
+        cover_img_url, *get_asset_urls(template), *get_asset_urls(stylesheet), *(url for fragment in fragments for url in get_asset_urls(fragment))
+    ]))
+
+class AssetRouter:
+    """
+        Serves the requests of the page that renders the report from the local asset cache, so that the render never waits on the network. \n
+        Only the hosts of the report's own assets (the cover image, whatever the template and the stylesheet reference and the images
+        of the findings and the sections) are known, the requests to any other host are blocked so that the page settles as soon as its known assets are served.
+        An asset that isn't cached yet is fetched through the cache once and then served locally by every later render.
+    """
+
+    hosts: set[str] # The hosts the page is allowed to load assets from.
+    urls: list[str] # The assets the report is known to reference.
+
+    # Statistics for the current render:
+    served: int
+    blocked: int
+
+    def __init__(self, urls: Iterable[str]) -> None:
+        self.urls = [url for url in dict.fromkeys(urls) if validate_url(url)]
+        self.hosts = { urlparse(url).netloc for url in self.urls }
+        self.served, self.blocked = 0, 0
+        self._lock = Lock()
+
+    def handle(self, route: "Route") -> None:
+        """
+            The Playwright route handler, it serves or blocks every request the page makes.
+        """
+
+        url: str = route.request.url
+        parsed = urlparse(url)
+
+        # The report itself and the inlined assets are local:
+        if not parsed.scheme in ("http", "https"): return route.continue_()
+
+        if not parsed.netloc in self.hosts:
+            with self._lock: self.blocked += 1
+
+            Logger.warning(f"Blocked {url}, it isn't one of the report's known assets so it's left out of the report.")
+            return route.abort("blockedbyclient")
+
+        content: bytes | None = self.read(url)
+
+        if content is None:
+            Logger.warning(f"Couldn't load {url}, it's left out of the report.")
+            return route.abort("failed")
+
+        content_type: str = self.get_content_type(url)
+
+        # The hosts of the assets a stylesheet references (i.e. its fonts) are known as well:
+        if content_type.startswith("text/css"):
+            with self._lock: self.hosts.update(urlparse(asset).netloc for asset in get_asset_urls(content.decode("utf-8", "replace"), url))
+
+        with self._lock: self.served += 1
+        route.fulfill(status=200, body=content, headers={ "Content-Type": content_type, "Access-Control-Allow-Origin": "*" })
+
+    def read(self, url: str) -> bytes | None:
+        """
+            Returns the cached copy of the given asset, fetching it only if it was never cached.
+        """
+
+        cached: bytes | None = AssetCache.read_cached(url)
+        if cached is not None: return cached
+
+        try: return AssetCache.fetch(url)
+        except ConnectionError: return None
+
+    def get_content_type(self, url: str) -> str:
+        return AssetCache.read_index().get(url, {}).get("content_type") or guess_type(urlparse(url).path)[0] or "application/octet-stream"
+
+    def prefetch(self, max_age: float = 0) -> None:
+        """
+            Revalidates the cached copies of the known assets, so that the render serves their latest versions without touching the network. \n
+            :param max_age: The seconds for which a revalidated copy is served without asking the server again.
+        """
+
+        def fetch(url: str) -> None:
+            try: AssetCache.fetch(url, max_age)
+            except ConnectionError as err: Logger.warning(f"{err} The asset is left out of the report.")
+
+        with ThreadPoolExecutor(max_workers=4) as executor: list(executor.map(fetch, self.urls))
+
+    def get_data_uri(self, url: str) -> str | None:
+        if not urlparse(url).netloc in self.hosts: return None
+
+        content: bytes | None = self.read(url)
+        if content is None: return None
+
+        return f"data:{self.get_content_type(url).split(';')[0]};base64,{b64encode(content).decode()}"
+
+    def inline(self, fragments: Iterable[str]) -> Iterator[str]:
+        """
+            Replaces the references to the known assets in the given HTML fragments with data URIs, so that the page makes no requests at all. \n
+            :note: The fragments must not split a tag, which the sanitizer already guarantees.
+        """
+
+        def replace(match: Match) -> str:
+            index: int = next(index for index, group in enumerate(match.groups(), 1) if group)
+            data_uri: str | None = self.get_data_uri(match.group(index))
+
+            if not data_uri: return match.group(0)
+
+            start, end = match.start(index) - match.start(0), match.end(index) - match.start(0)
+            return match.group(0)[:start] + data_uri + match.group(0)[end:]
+
+        for fragment in fragments: yield ASSET_URL_PATTERN.sub(replace, fragment)
+
+    def log(self) -> None:
+        Logger.info(f"Served {self.served} of the page's requests from the asset cache and blocked {self.blocked} to unknown hosts.")
+        self.served, self.blocked = 0, 0
@@ -0,0 +1,186 @@
+from re import DOTALL, IGNORECASE, compile as re_compile
+
+from typing import Iterable, Iterator
+
+from compiloor.constants.utils import EMPTY_TAGS, RAW_TEXT_TAGS
+from compiloor.services.logger import Logger
+
+
+# Matches a single token of the HTML: a comment, a tag, a run of text or a stray '<':
+HTML_TOKEN_PATTERN = re_compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|[^<]+|<", DOTALL)
+# Matches a run of whitespace that contains a line break:
+LINE_BREAK_WHITESPACE_PATTERN = re_compile(r"[^\S\n]*\n\s*")
+# Matches the closing tag of each raw text element:
+RAW_TEXT_CLOSING_PATTERNS = { tag: re_compile(f"</{tag}", IGNORECASE) for tag in RAW_TEXT_TAGS }
+
+def sanitize_html_stream(fragments: Iterable[str]) -> Iterator[str]:
+    """
+        Cleans up a stream of HTML fragments in a single pass and logs the amount of bytes it saved. \n
+        Drops the elements that the parser left empty (i.e. '<p></p>') and collapses the indentation
+        of the f-string fragments (the legend, the tables and the findings), which Chromium would otherwise have to parse.
+    """
+
+    sanitizer = HtmlSanitizer()
+
+    for fragment in fragments:
+        if (output := sanitizer.feed(fragment)): yield output
+
+    yield sanitizer.close()
+
+    if sanitizer.read: Logger.info(f"Sanitized the report, saving {sanitizer.get_saved() / 1024:.1f} KiB ({sanitizer.get_saved() / sanitizer.read:.0%}).")
+
+class HtmlSanitizer:
+    """
+        A streaming HTML cleanup that never holds more than the current fragment and an incomplete tag. \n
+        A run of whitespace containing a line break becomes a single line break, other whitespace is left as-is.
+        The content of the raw text elements (i.e. '<pre>') is never touched, since its whitespace is significant.
+        The empty elements are only dropped when they have no attributes, since i.e. an id might be a link's target.
+    """
+
+    read: int # The amount of characters fed to the sanitizer.
+    written: int # The amount of characters the sanitizer returned.
+
+    buffer: str # The end of the last fragment, which might continue in the next one.
+    pending: list[tuple[str, list[str]]] # The open empty elements that might still get closed right away, with their tokens.
+    raw_tag: str | None # The raw text element whose content is currently being copied.
+    last: str # The last character that was written.
+
+    def __init__(self) -> None:
+        self.read, self.written = 0, 0
+        self.buffer, self.pending, self.raw_tag, self.last = "", [], None, ""
+
+    def get_saved(self) -> int:
+        return self.read - self.written
+
+    def feed(self, fragment: str) -> str:
+        """
+            Returns the cleaned up part of the given fragment.
+            The tokens that might continue in the next fragment are held back until it arrives.
+        """
+
+        self.read += len(fragment)
+        return self.process(self.buffer + fragment, False)
+
+    def close(self) -> str:
+        """
+            Returns the rest of the cleaned up stream, including any of the empty elements that were never closed.
+        """
+
+        output: str = self.process(self.buffer, True) + self.flush()
+        self.written += len(output)
+
+        return output
+
+    def process(self, html: str, final: bool) -> str:
+        output: list[str] = []
+        end: int = len(html) if final else self.get_complete_end(html)
+        position: int = 0
+
+        while position < end:
+            if self.raw_tag:
+                copied: int = self.copy_raw_text(html, position, end, final, output)
+
+                # Nothing more can be copied until the next fragment arrives:
+                if copied == position and self.raw_tag: break
+                position = copied
+                continue
+
+            match = HTML_TOKEN_PATTERN.match(html, position, end)
+            position = match.end()
+
+            token: str = match.group(0)
+            closing, name, attributes = match.group(1, 2, 3)
+
+            if name is None:
+                if token[0] == "<": self.write(token, output)
+                else: self.add_text(token, output)
+                continue
+
+            name = name.lower()
+
+            if closing:
+                # Closing an empty element right after opening it drops both of them, along with the whitespace in between:
+                if self.pending and self.pending[-1][0] == name: self.pending.pop()
+                else: self.write(token, output)
+            elif name in EMPTY_TAGS and not attributes.strip():
+                self.pending.append((name, [token]))
+            else:
+                self.write(token, output)
+                if name in RAW_TEXT_TAGS: self.raw_tag = name
+
+        self.buffer = html[position:]
+        result: str = "".join(output)
+
+        if not final: self.written += len(result)
+        return result
+
+    def get_complete_end(self, html: str) -> int:
+        """
+            Returns where the last complete token of the given HTML ends. \n
+            An unclosed tag or comment and the trailing whitespace might continue in the next fragment, so they're held back.
+        """
+
+        tag_start: int = html.rfind("<")
+        comment_start: int = html.rfind("<!--")
+
+        if comment_start != -1 and html.find("-->", comment_start) == -1: end: int = comment_start
+        elif tag_start != -1 and html.find(">", tag_start) == -1: end = tag_start
+        else: end = len(html)
+
+        return len(html[:end].rstrip())
+
+    def copy_raw_text(self, html: str, position: int, end: int, final: bool, output: list[str]) -> int:
+        """
+            Copies the content of the current raw text element as-is, up to its closing tag. Returns where the copying stopped.
+        """
+
+        match = RAW_TEXT_CLOSING_PATTERNS[self.raw_tag].search(html, position, end)
+
+        if match:
+            closing: int = match.start()
+            self.raw_tag = None
+        else:
+            # The closing tag might be split between this fragment and the next one:
+            closing = end if final else max(position, end - len(self.raw_tag) - 2)
+
+        self.write(html[position:closing], output)
+        return closing
+
+    def add_text(self, text: str, output: list[str]) -> None:
+        # The whitespace inside of an element that might still turn out empty is held back along with it:
+        if self.pending and text.isspace():
+            self.pending[-1][1].append(text)
+            return
+
+        # The pending elements are written first, since the line breaks are collapsed against what was written last:
+        if self.pending: output.append(self.flush())
+
+        if "\n" in text: text = LINE_BREAK_WHITESPACE_PATTERN.sub("\n", text)
+        # Only a single line break is kept between two lines:
+        if self.last == "\n" and text[0] == "\n": text = text[1:]
+
+        self.write(text, output)
+
+    def write(self, token: str, output: list[str]) -> None:
+        if not token: return
+
+        # An element that wasn't closed right away isn't empty after all:
+        if self.pending: output.append(self.flush())
+
+        output.append(token)
+        self.last = token[-1]
+
+    def flush(self) -> str:
+        """
+            Writes out the pending elements as they were, except for their whitespace which still gets collapsed.
+        """
+
+        pending, self.pending = self.pending, []
+        output: list[str] = []
+
+        for _, tokens in pending:
+            for token in tokens:
+                if token[0] == "<": self.write(token, output)
+                else: self.add_text(token, output)
+
+        return "".join(output)
@@ -0,0 +1,263 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from contextvars import copy_context
+
+from os import remove
+
+from os.path import join
+
+from re import DOTALL, compile as re_compile
+
+from typing import Iterable, TextIO
+
+from fitz import Document, Point, Rect, LINK_GOTO, LINK_NAMED
+
+from compiloor.constants.utils import HTML_REPORT_EXTENSION, RAW_TEXT_TAGS, REPORT_EXTENSION, SHARD_BREAK, VOID_TAGS
+from compiloor.services.environment.utils import ReportUtils
+from compiloor.services.logger import Logger
+from compiloor.services.parser.chromium import ChromiumPool, print_chromium_document
+from compiloor.services.parser.optimization import remove_timestamps
+from compiloor.services.parser.routing import AssetRouter
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+from compiloor.services.typings.compiler import ReportShardDict
+from compiloor.services.utils.timing import StageTimer
+
+
+# Matches a comment or a tag, along with whether it's a closing tag, its name and its attributes:
+HTML_TAG_PATTERN = re_compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>", DOTALL)
+# Matches the id of an element:
+HTML_ID_PATTERN = re_compile(r"""\sid\s*=\s*["']([^"']+)["']""")
+
+def create_sharded_chromium_document(
+    report: Iterable[str],
+    dir: str | None = None,
+    router: AssetRouter | None = None,
+    inline_assets: bool = False
+) -> str:
+    """
+        Creates a PDF document from the given HTML fragments like create_chromium_document,
+        but renders every shard of the report (see ReportCustomizer.stream_report) on its own Chromium worker and merges them. \n
+        A single print of a huge report runs on a single thread of a single browser and lays out every page at once,
+        while the shards are laid out and printed concurrently by as many browsers as the pool has workers.
+    """
+
+    dir = ReportUtils.create_report_directory(dir)
+    pdf_dir: str = f'{dir}/final{REPORT_EXTENSION}'
+
+    timer: StageTimer = StageTimer.current()
+
+    fragments: Iterable[str] = sanitize_html_stream(report)
+    if router and inline_assets: fragments = router.inline(fragments)
+
+    shards: list[ReportShardDict] = timer.run("write", write_report_shards, fragments, dir)
+
+    try:
+        timer.run("shards", print_report_shards, shards, router)
+        timer.run("merge", merge_report_shards, shards, pdf_dir)
+    finally:
+        for shard in shards:
+            remove(shard["html_dir"])
+
+            try: remove(shard["pdf_dir"])
+            except FileNotFoundError: pass
+
+    if router: router.log()
+    return pdf_dir
+
+def write_report_shards(fragments: Iterable[str], dir: str) -> list[ReportShardDict]:
+    """
+        Streams the given HTML fragments into a file per shard, splitting them wherever the customizer left a shard break. \n
+        Every shard after the first one starts with the report's head and the elements that are still open at the first break
+        (i.e. '<body>' and the findings section), which the previous shard closes again.
+    """
+
+    writer = ReportShardWriter(dir)
+
+    for fragment in fragments:
+        for index, part in enumerate(fragment.split(SHARD_BREAK)):
+            if index: writer.split()
+            writer.write(part)
+
+    writer.close()
+
+    Logger.info(f"Split the report into {len(writer.shards)} shards.")
+    return writer.shards
+
+class ReportShardWriter:
+    """
+        Writes the shards of a streamed report, keeping track of the elements that every shard has to reopen. \n
+        Only the HTML before the first break is tracked, the severity sections in between the breaks are always complete.
+    """
+
+    dir: str
+    shards: list[ReportShardDict]
+    file: TextIO | None # The file of the current shard.
+
+    stack: list[tuple[str, str]] # The name and the opening tag of every open element.
+    head: list[str] # The report's '<head>' element, which every shard needs for the stylesheet.
+    skeleton: str | None # The HTML that every shard after the first one starts with, known from the first break on.
+
+    raw_tag: str | None # The raw text element (i.e. '<style>') whose content is being skipped.
+    in_head: bool
+
+    def __init__(self, dir: str) -> None:
+        self.dir, self.shards, self.file = dir, [], None
+        self.stack, self.head, self.skeleton = [], [], None
+        self.raw_tag, self.in_head = None, False
+
+        self.open()
+
+    def open(self) -> None:
+        index: int = len(self.shards) + 1
+
+        self.shards.append({
+            "html_dir": join(self.dir, f"shard-{index}{HTML_REPORT_EXTENSION}"),
+            "pdf_dir": join(self.dir, f"shard-{index}{REPORT_EXTENSION}"),
+            "ids": []
+        })
+
+        self.file = open(self.shards[-1]["html_dir"], "w")
+        if self.skeleton: self.file.write(self.skeleton)
+
+    def write(self, html: str) -> None:
+        if not html: return
+
+        self.file.write(html)
+        self.shards[-1]["ids"].extend(HTML_ID_PATTERN.findall(html))
+
+        if self.skeleton is None: self.track(html)
+
+    def split(self) -> None:
+        """
+            Closes the current shard and starts the next one.
+        """
+
+        if self.skeleton is None:
+            self.skeleton = "<!DOCTYPE html>\n" + "".join(
+                tag + ("".join(self.head) if name == "html" else "") for name, tag in self.stack
+            )
+
+        self.file.write(self.get_destinations_html())
+        self.file.write("".join(f"</{name}>" for name, _ in reversed(self.stack)))
+        self.file.close()
+
+        self.open()
+
+    def close(self) -> None:
+        # The rest of the report already closed every element. The HTML parser moves anything after '</html>' into the body:
+        self.file.write(self.get_destinations_html())
+        self.file.close()
+
+    def get_destinations_html(self) -> str:
+        """
+            Returns a hidden link to every element of the current shard. \n
+            Chromium only emits a named destination for the elements that are linked from the same page,
+            and the links of the other shards have to be resolved against the destinations of this one when the shards are merged.
+        """
+
+        links: str = "".join(f'<a href="#{id}"></a>' for id in dict.fromkeys(self.shards[-1]["ids"]))
+
+        return f'<div style="display: none">{links}</div>' if links else ""
+
+    def track(self, html: str) -> None:
+        """
+            Updates the open elements and the report's head with the given HTML. \n
+            :note: The sanitizer never splits a tag between two fragments.
+        """
+
+        head_start: int = 0
+
+        for match in HTML_TAG_PATTERN.finditer(html):
+            closing, name, attributes = match.group(1, 2, 3)
+
+            # A comment:
+            if name is None: continue
+
+            name = name.lower()
+
+            # The content of i.e. a '<style>' might look like a tag:
+            if self.raw_tag:
+                if closing and name == self.raw_tag: self.raw_tag = None
+                continue
+
+            if name == "head":
+                if closing: self.head.append(html[head_start:match.end()])
+                else: head_start = match.start()
+
+                self.in_head = not closing
+                continue
+
+            if closing:
+                # Tolerating the closing tags that were implied by the parser (i.e. of a '<li>'):
+                index: int = next((index for index in range(len(self.stack) - 1, -1, -1) if self.stack[index][0] == name), -1)
+                if index != -1: del self.stack[index:]
+            elif name in RAW_TEXT_TAGS:
+                self.raw_tag = name
+            elif not name in VOID_TAGS and not attributes.rstrip().endswith("/") and not self.in_head:
+                self.stack.append((name, match.group(0)))
+
+        if self.in_head: self.head.append(html[head_start:])
+
+def print_report_shards(shards: list[ReportShardDict], router: AssetRouter | None = None) -> None:
+    """
+        Prints every shard to its PDF file concurrently, each one on the first idle worker of the Chromium pool.
+    """
+
+    timer: StageTimer = StageTimer.current()
+    pool: ChromiumPool = ChromiumPool.shared()
+
+    def print_shard(index: int, shard: ReportShardDict) -> None:
+        with timer.stage(f"shard {index}"):
+            # The task runs in a copy of this context, so that its stages are timed as a part of the shard's stage:
+            context = copy_context()
+            pool.render(lambda document: context.run(print_chromium_document, document, shard["html_dir"], shard["pdf_dir"], router))
+
+    # Each thread only waits for its worker, so there's one per shard:
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [executor.submit(copy_context().run, print_shard, index, shard) for index, shard in enumerate(shards, 1)]
+
+        for future in futures: future.result()
+
+def merge_report_shards(shards: list[ReportShardDict], pdf_dir: str) -> None:
+    """
+        Merges the printed shards into a single PDF document, in order. \n
+        Chromium prints a link to an element of another shard as a link to a named destination that its shard doesn't have,
+        so every named link is replaced with a link to the page of its destination in the merged document.
+        The page numbers and the findings legend are added to the merged document later on, just like for a single print.
+    """
+
+    merged = Document()
+
+    destinations: dict[str, tuple[int, Point]] = {} # The page and the position of every linked element in the merged document.
+    links: list[tuple[int, Rect, str]] = [] # The page, the area and the destination name of every named link.
+
+    for shard in shards:
+        offset: int = merged.page_count
+
+        with Document(shard["pdf_dir"]) as pdf:
+            for id in shard["ids"]:
+                page_index, x, y = pdf.resolve_link("#" + id)
+
+                if page_index >= 0 and not id in destinations: destinations[id] = (offset + page_index, Point(x, y))
+
+            for page in pdf.pages():
+                for link in page.get_links():
+                    if link["kind"] != LINK_NAMED: continue
+
+                    # The names come as the '#nameddest=' URL fragment that resolve_link takes:
+                    links.append((offset + page.number, link["from"], link["name"].removeprefix("nameddest=")))
+                    # The named links can't be carried over into the merged document:
+                    page.delete_link(link)
+
+            merged.insert_pdf(pdf)
+
+    for page_index, rect, name in links:
+        if not name in destinations: continue
+
+        target, point = destinations[name]
+        merged[page_index].insert_link({ "kind": LINK_GOTO, "from": rect, "page": target, "to": point })
+
+    # Saving without the timestamps and a new random ID, so that the same shards always merge into the same file:
+    remove_timestamps(merged)
+    merged.save(pdf_dir, no_new_id=True)
+    merged.close()
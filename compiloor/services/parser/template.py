@@ -0,0 +1,91 @@
+from hashlib import sha256
+
+from re import compile as re_compile
+
+from threading import Lock
+
+from typing import Callable, Iterable, Iterator
+
+
+# Matches the '{{variable}}', '{{config.variable}}' and '[[variable]]' placeholders:
+PLACEHOLDER_PATTERN = re_compile(r"(\{\{[\w.\-\[\]]+\}\}|\[\[[\w.\-]+\]\])")
+
+# A placeholder's value. Large values (i.e. the findings) are passed as a callable that yields their pieces,
+# so that they are streamed into the report instead of being held as one string:
+TemplateValue = str | Callable[[], Iterable[str]]
+
+def fill_placeholders(content: str, values: dict[str, str]) -> str:
+    """
+        Replaces the placeholders of the given content that have a value in a single pass, keeping the others as they are. \n
+        Used for the placeholders written inside of the inserted values (i.e. a '{{config.protocol_name}}' in a finding),
+        which the compiled template never sees.
+    """
+
+    # Most fragments don't contain any placeholders:
+    if not "{{" in content: return content
+
+    return PLACEHOLDER_PATTERN.sub(lambda match: values.get(match.group(0), match.group(0)), content)
+
+class CompiledTemplate:
+    """
+        A report template split into its literal segments and placeholders. \n
+        The template gets scanned once when it's compiled and every render is a single linear pass over the segments,
+        instead of copying the whole document for every replaced placeholder.
+    """
+
+    # The compiled templates keyed by their URL and the hash of their contents:
+    _compiled: dict[tuple[str, str], "CompiledTemplate"] = {}
+    _lock: Lock = Lock()
+
+    # Alternating literal segments and placeholders, always starting and ending with a (possibly empty) literal:
+    segments: list[str]
+    placeholders: set[str]
+
+    def __init__(self, template: str) -> None:
+        self.segments = PLACEHOLDER_PATTERN.split(template)
+        self.placeholders = set(self.segments[1::2])
+
+    @staticmethod
+    def get(url: str, template: str) -> "CompiledTemplate":
+        """
+            Returns the compiled version of the given template, compiling it only if this version wasn't compiled already.
+        """
+
+        key: tuple[str, str] = (url, sha256(template.encode()).hexdigest())
+
+        with CompiledTemplate._lock:
+            if not key in CompiledTemplate._compiled:
+                # Only keeping the latest version of each template:
+                CompiledTemplate._compiled = { _key: _template for _key, _template in CompiledTemplate._compiled.items() if _key[0] != url }
+                CompiledTemplate._compiled[key] = CompiledTemplate(template)
+
+            return CompiledTemplate._compiled[key]
+
+    def stream(self, values: dict[str, TemplateValue]) -> Iterator[str]:
+        """
+            Yields the template's segments with the placeholders replaced by their values.
+            Placeholders without a value are kept as they are.
+        """
+
+        for index, segment in enumerate(self.segments):
+            value: TemplateValue = values.get(segment, segment) if index % 2 else segment
+
+            if callable(value): yield from value()
+            else: yield value
+
+    def render(self, values: dict[str, TemplateValue]) -> str:
+        return "".join(self.stream(values))
+
+    def get_unknown_placeholders(self, values: dict[str, TemplateValue]) -> set[str]:
+        """
+            Returns the template's placeholders that don't have a value.
+        """
+
+        return self.placeholders - values.keys()
+
+    def get_unused_values(self, values: dict[str, TemplateValue]) -> set[str]:
+        """
+            Returns the values whose placeholders are not present in the template.
+        """
+
+        return values.keys() - self.placeholders
\ No newline at end of file
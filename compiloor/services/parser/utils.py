@@ -1,21 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from contextvars import copy_context
+
 from inspect import getmembers, ismethod
 
-from compiloor.constants.report import (
-    INFORMATION_TABLE_VARIABLES,
-    REPORT_SECTION_HEADINGS,
-    RISK_CLASSIFICATION_MAIN_CONTENT_MD,
-    RISK_CLASSIFICATION_IMPACT_CONTENT_MD,
-    RISK_CLASSIFICATION_LIKELIHOOD_CONTENT_MD,
-    RISK_CLASSIFICATION_ACTION_REQUIRED_CONTENT_MD
-)
-from compiloor.constants.utils import MAIN_REPORT_SECTIONS
+from typing import Callable, Iterator
+
+from compiloor.constants.report import INFORMATION_TABLE_VARIABLES, REPORT_SECTION_HEADINGS
+from compiloor.constants.utils import MAIN_REPORT_SECTIONS, SHARD_BREAK
 from compiloor.services.environment.utils import FileUtils, FindingUtils
+from compiloor.services.logger import Logger
 from compiloor.services.parser.finding import Finding
 from compiloor.services.parser.legend import create_finding_severities_legend_html
-from compiloor.services.parser.markdown import create_html_from_markdown
+from compiloor.services.parser.markdown import create_html_from_markdown, get_highlight_stylesheet
+from compiloor.services.parser.parallel import RenderPool
+from compiloor.services.parser.routing import get_report_asset_urls
 from compiloor.services.parser.table import TableUtils
+from compiloor.services.parser.template import CompiledTemplate, TemplateValue, fill_placeholders
 from compiloor.services.typings.config import ProtocolInformationConfigDict
 from compiloor.services.typings.finding import Severity
+from compiloor.services.utils.timing import StageTimer
 
 class ReportCustomizer:
     """
@@ -27,40 +31,102 @@ class ReportCustomizer:
     
     # Report template variables:
     report: str # The report template.
+    template: CompiledTemplate # The compiled report template, streamed by stream_report.
     stylesheet: str # The CSS stylesheet.
+    asset_urls: list[str] # The remote assets the report loads when it's rendered (i.e. the cover image, the fonts and the findings' images).
     
     # Finding report variables:
     total_findings_amount: int # The total amount of findings.
     finding_amounts_by_severity: dict[Severity, int] # The amount of findings per each severity.
-    findings: str # The finding fragments in HTML format.
+    findings: Callable[[], Iterator[str]] # Streams the finding fragments in HTML format.
+    finding_sections: list[tuple[str, str, int, list[Finding]]] # The HTML around each severity's findings, its index and its findings.
     serialized_findings: list[Finding] # The serialized findings in Finding object format.
+    shard_breaks: set[int] # The severity sections after which the streamed report gets split into shards.
     report_section_headings: list[str] # The report section headings.
     severity_to_index: dict[Severity, int] # The severity to index mapping.
+    template_values: dict[str, TemplateValue] # The report template's placeholder -> value mapping.
+    config_values: dict[str, str] # The '{{config.<key>}}' placeholder -> value mapping for the sections and the findings.
+    rendered_sections: dict[str, str] # The config's markdown sections rendered to HTML.
     
-    def __init__(self, markdown: bool) -> str:
+    def __init__(
+        self,
+        markdown: bool,
+        remote_files: dict[str, str] | None = None,
+        timer: StageTimer | None = None,
+        jobs: int = 1
+    ) -> str:
+        # Remote files (i.e. the template and the stylesheet) keyed by their URL.
+        # Long-running commands pass the same mapping to every compile so that they are only fetched once:
+        self.remote_files = remote_files if remote_files is not None else {}
+        self.timer = timer or StageTimer()
+        
+        # The amount of processes used for parsing and highlighting the findings and the sections:
+        self.jobs = jobs
+
         # Gets the report configuration:
-        self.config = FileUtils.read_config(json=True)
-        self.config["render_markdown"] = markdown
+        with self.timer.stage("config"):
+            self.config = FileUtils.read_config(json=True)
+            self.config["render_markdown"] = markdown
 
-        # Gets the stylesheet and report template fragment:         
-        self.report = FileUtils.read_file(self.config["template_url"], is_url=True)
-        self.stylesheet = FileUtils.read_file(self.config["stylesheet_url"], is_url=True, html_tag="style")
+        # The remote fetches and the findings parsing are independent until the assembly, so they run concurrently.
+        # Each stage runs in a copy of the current context so that it reads the files of the same project:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            # Gets the stylesheet and report template fragment:         
+            template = executor.submit(copy_context().run, self.timer.run, "template", self.read_remote_file, self.config["template_url"])
+            stylesheet = executor.submit(copy_context().run, self.timer.run, "stylesheet", self.read_remote_file, self.config["stylesheet_url"])
+            
+            # Gets the finding fragments:
+            # 8 is the hardcoded index of the findings section: Will be changed in a future update.
+            findings = executor.submit(copy_context().run, self.timer.run, "findings", self.fetch_finding_fragments, self.config, 8)
+            sections = executor.submit(copy_context().run, self.timer.run, "sections", self.render_sections)
+            
+            self.report = template.result()
+            # The code block styles are shared by all of the code blocks, so they are only added once:
+            self.stylesheet = f'<style>{stylesheet.result()}</style>{get_highlight_stylesheet()}'
+            
+            findings.result()
+            sections.result()
+            
+            # The findings and the sections can embed remote images as well (i.e. '![poc](https://...)'):
+            self.asset_urls = get_report_asset_urls(
+                self.config["cover_img_url"],
+                self.report,
+                stylesheet.result(),
+                [*self.rendered_sections.values(), *(finding.render_fragment for finding in self.serialized_findings)]
+            )
+        
+        self.timer.run("assembly", self.assemble_report) # Assembles the report.
+    
+    def read_remote_file(self, url: str) -> str:
+        """
+            Returns the contents of the file at the given URL, fetching it only if it wasn't fetched already.
+        """
+        
+        if not url in self.remote_files: self.remote_files[url] = FileUtils.read_file(url, is_url=True)
+        return self.remote_files[url]
+    
+    def render_sections(self) -> None:
+        """
+            Renders the config's markdown sections (the '_content' variables) in the render pool.
+        """
         
-        # Gets the finding fragments:
-        self.fetch_finding_fragments(self.config, 8) # 8 is the hardcoded index of the findings section: Will be changed in a future update.
+        # Signifies that the value is a markdown fragment:
+        # Parsing such content variables so that they can use markdown syntax:
+        keys: list[str] = [key for key in self.config.keys() if "_content" in key]
         
-        self.assemble_report() # Assembles the report.
+        self.rendered_sections = dict(
+            zip(keys, RenderPool.map(create_html_from_markdown, [str(self.config[key]) for key in keys], self.jobs))
+        )
     
     def add_report_config_variables(self) -> None:
-        for key in self.config.keys():
-            _value = str(self.config[key])
-            
-            # Signifies that the value is a markdown fragment:
-            # Parsing such content variables so that they can use markdown syntax:
-            if "_content" in key: _value = create_html_from_markdown(_value)
-            
-            # '{{config.<key>}}' syntax is very confusing when:
-            self.report = self.report.replace(f"{{{{config.{key}}}}}", _value)
+        # '{{config.<key>}}' syntax is very confusing when:
+        self.config_values = {
+            f"{{{{config.{key}}}}}": self.rendered_sections.get(key, str(self.config[key])) for key in self.config.keys()
+        }
+        
+        # The sections can use the config's placeholders as well (i.e. '{{config.protocol_name}}'):
+        for placeholder, _value in self.config_values.items():
+            self.template_values[placeholder] = fill_placeholders(_value, self.config_values)
 
     def add_information_table_variables_to_report(self, tag: str = "b") -> None:
         """
@@ -68,14 +134,11 @@ class ReportCustomizer:
         """
         
         for _key in INFORMATION_TABLE_VARIABLES.keys():
-            self.report = self.report.replace(
-                _key,
-                f'<{tag}>{INFORMATION_TABLE_VARIABLES[_key]}</{tag}>'
-            )
+            self.template_values[_key] = f'<{tag}>{INFORMATION_TABLE_VARIABLES[_key]}</{tag}>'
 
     def add_dynamic_tables_to_report(self) -> None:
         # Defines the table type -> callable arguments mapping:
-        # TODO: This needs to be converted into some modular system trough the config.
+        # TODO: This needs to be converted into some modular system through the config.
         kwargs: dict[str, list[any]] = {
             "severity_classification_table": [],
             "information_table": [self.config],
@@ -89,42 +152,38 @@ class ReportCustomizer:
         # Adding the tables to the report:
         for name in table_types.keys():
             callable, args = table_types[name], kwargs[name]
-            self.report = self.report.replace(f'{{{{{name}}}}}', callable(*args))
-        
-        # Adding no-wrap so that the table look doesn't break:
-        # TODO: Change with a modular CSS stylesheet.
-        self.report = self.report.replace("<td>[", '<td class="no-wrap-column">[')
+            
+            # Adding no-wrap so that the table look doesn't break:
+            # TODO: Change with a modular CSS stylesheet.
+            self.template_values[f'{{{{{name}}}}}'] = callable(*args).replace("<td>[", '<td class="no-wrap-column">[')
         
     def add_findings_legend(self) -> None:
         # Adding the legend manually:
-        # TODO: Change with a modular system trough the config.
+        # TODO: Change with a modular system through the config.
+        # 8 is the hardcoded index of the findings section. TODO: Change to a modular section system
         (findings, self.severity_to_index) = create_finding_severities_legend_html(8, self.serialized_findings)
-        self.report = self.report.replace(
-            '{{findings_legend}}',
-            # 8 is the hardcoded index of the findings section. TODO: Change to a modular section system
-            findings
-        )
+        self.template_values['{{findings_legend}}'] = findings
         
     def assemble_report(self) -> None:
+        # The placeholder -> value mapping that gets filled by the "add_" methods.
+        # The template is then rendered in a single pass instead of copying the whole report for each placeholder:
+        self.template_values = {}
+        
         # Adds the main parts of the report to the fragment:
         # i.e. The stylesheet, the findings, the total findings amount.
-                
-        section_to_attribute: dict[str, any] = {}
+        # f"{{{{{section}}}}}" looks like that due to the f string syntax.
+        # It equates to '{{<section>}}' in the report template.
         for section in MAIN_REPORT_SECTIONS:
-            section_to_attribute[str(section)] = getattr(self, section)
+            value = getattr(self, section)
+            # The findings are streamed when the report is written instead of being joined into one string:
+            self.template_values[f"{{{{{section}}}}}"] = value if callable(value) else str(value)
         
-        # Adding the section markdowns to the report:
-        # f"{{{{{part}}}}}" looks like that due to the f string syntax.
-        # It equates to '{{<part>}}' in the report template.
-        for part in section_to_attribute.keys():
-            self.report = self.report.replace(f"{{{{{part}}}}}", str(section_to_attribute[part]))
-        
-        # Getting all of the class's methods and calling all with the 'get_' prefix:
+        # Getting all of the class's methods and calling all with the 'add_' prefix:
         for method in getmembers(self, predicate=lambda x: ismethod(x)):
 
             # the "add_" is a prefix for all methods in the class
             # that add something in place of a placeholder in the report:
-            if not method[0].startswith("add_") or method[0] == "add_dynamic_tables_to_report": continue
+            if not method[0].startswith("add_") or method[0] in ["add_dynamic_tables_to_report", "add_findings_legend"]: continue
             # Calling the method:
             method[1]()
         
@@ -134,41 +193,87 @@ class ReportCustomizer:
         # Calling it here because it needs the severity_to_index mapping:
         self.add_dynamic_tables_to_report()
         
-        if self.config["render_markdown"]:
-            md_report: str = ""
+        self.template = CompiledTemplate.get(self.config["template_url"], self.report)
+        
+        self.report_template_placeholders(self.template)
             
-            heading_to_content: dict[str, str] = {
-                "Introduction": self.config["introduction_content"],
-                "Disclaimer": self.config["disclaimer_content"],
-                "About": self.config["about_author_content"],
-                f"About {self.config['protocol_name']}" : self.config["about_protocol_content"],
-                "Risk Classification": RISK_CLASSIFICATION_MAIN_CONTENT_MD,
-                "Impact": RISK_CLASSIFICATION_IMPACT_CONTENT_MD,
-                "Likelihood": RISK_CLASSIFICATION_LIKELIHOOD_CONTENT_MD,
-                "Action required for severity levels": RISK_CLASSIFICATION_ACTION_REQUIRED_CONTENT_MD,
-                "Security Assessment Summary": self.config["security_assessment_summary_content"],
-                "Findings": "\n".join([finding.fragment for finding in self.serialized_findings])
-            }
-                        
-            for heading in self.report_section_headings:                
-                # Removing double spaces:
-                heading = heading.strip().replace(" " * 2, " ")
-                
-                # Getting the heading's index | Supposed to be in the following format: X.Y.Z.
-                md_heading: str = (heading.split(" ")[0].count(".")) * "#"
-                
-                if self.report_section_headings.index(heading) != 0: md_heading = "\n" + md_heading
-
-                # Removing the heading index from the heading and crafting it back:
-                heading = " ".join(heading.split(" ")[1:]).split("</h2>")[0]
-                
-                if heading == "Executive Summary": continue
-                md_report += f"{md_heading} {heading}\n {heading_to_content[heading]}"
-                if heading == "Findings": break
-
+    def stream_findings(self) -> Iterator[str]:
+        """
+            Yields the findings HTML piece by piece, so that the findings are never joined into one string.
+        """
+        
+        for index, (opening, closing, severity_index, findings) in enumerate(self.finding_sections):
+            if index: yield "\n"
+            yield opening
+            
+            for finding_index, finding in enumerate(findings):
+                if finding_index: yield "\n"
                 
-            self.config["markdown_report"] = md_report
+                # Adding the link to the heading. The findings can contain tables and the config's placeholders as well:
+                yield fill_placeholders(
+                    finding.render_fragment.replace(
+                        f'[[{finding.severity.value}_severity_index]]', str(severity_index)
+                    ).replace("<td>[", '<td class="no-wrap-column">['),
+                    self.config_values
+                )
             
+            yield closing
+            
+            # Every severity section ends with a page break, so the pages of a shard never depend on the previous ones:
+            if index in self.shard_breaks: yield SHARD_BREAK
+    
+    def stream_report(self, shards: int = 1) -> Iterator[str]:
+        """
+            Yields the assembled report piece by piece. \n
+            :param shards: The amount of shards the report gets split into (see write_report_shards), at most one per severity section.
+            :note: The report is never held in memory as a whole, the consumers write it out as it's generated.
+            The findings are still rendered up front (in parallel), so the peak memory is that of the serialized findings plus a single finding.
+        """
+        
+        self.shard_breaks = self.get_shard_breaks(shards)
+        
+        return self.template.stream(self.template_values)
+    
+    def get_shard_breaks(self, shards: int) -> set[int]:
+        """
+            Returns the severity sections after which the report gets split, so that the shards hold about the same amount of findings HTML. \n
+            The content before and after the findings goes into the first and the last shard.
+            The report is always split into as many shards as ReportUtils.get_shard_count returns, since that's how many browsers get launched.
+        """
+        
+        sizes: list[int] = [sum(len(finding.render_fragment) for finding in findings) for _, _, _, findings in self.finding_sections]
+        total: int = sum(sizes)
+        shards = min(shards, len(sizes))
+        
+        breaks: set[int] = set()
+        size: int = 0
+        
+        # The last section is always followed by the end of the report, so it's never a break:
+        for index, section_size in enumerate(sizes[:-1]):
+            size += section_size
+            
+            if len(breaks) + 1 >= shards: break
+            # Every section that's left becomes a break once there are only as many of them as the shards still missing:
+            if size >= total * (len(breaks) + 1) / shards or len(sizes) - 1 - index <= shards - 1 - len(breaks): breaks.add(index)
+        
+        return breaks
+    
+    def report_template_placeholders(self, template: CompiledTemplate) -> None:
+        """
+            Warns about template placeholders that didn't get a value and report sections that the template doesn't use.
+        """
+        
+        # The page number placeholders get filled in after the PDF is rendered:
+        unknown = [placeholder for placeholder in template.get_unknown_placeholders(self.template_values) if not placeholder.endswith("_page}}")]
+        
+        # Most config keys (i.e. the URLs) and table headings are optional, so only the sections and the report parts are checked:
+        unused = [
+            value for value in template.get_unused_values(self.template_values)
+            if value.startswith("{{") and (not value.startswith("{{config.") or value.endswith("_content}}"))
+        ]
+        
+        if unknown: Logger.warning(f"The template contains placeholders without a value: {', '.join(sorted(unknown))}")
+        if unused: Logger.warning(f"The template doesn't use: {', '.join(sorted(unused))}")
             
     def fetch_finding_fragments(
         self,
@@ -182,7 +287,7 @@ class ReportCustomizer:
         """
         
         # Getting multiple different formats of the findings:
-        total_amount, amounts_by_severity, findings = FindingUtils.get_finding_fragments()
+        total_amount, amounts_by_severity, findings = self.timer.run("read", FindingUtils.get_finding_fragments)
 
         # Using this as a copy array with removed empty severity levels:
         # Remove empty severity levels
@@ -197,7 +302,7 @@ class ReportCustomizer:
         # Copy the non-empty severity levels
         findings = _findings
 
-        markdowns, _finding_fragments = [], []
+        finding_sections, _finding_fragments = [], []
 
         # Copying the static headings present in the report template:
         section_headings = REPORT_SECTION_HEADINGS.copy()
@@ -206,7 +311,7 @@ class ReportCustomizer:
         for severity in reversed(list(findings.keys())):
             _finding_fragments.extend(findings[severity])
 
-        serialized = [Finding(finding) for finding in _finding_fragments] # Serializing the findings into the Finding format.
+        serialized = self.timer.run("parse", Finding.serialize_all, _finding_fragments, self.jobs) # Serializing the findings into the Finding format.
 
         full_by_severity = {}
         current_severity, severity_index = None, 0
@@ -216,7 +321,7 @@ class ReportCustomizer:
             if not severity in findings: continue # Skip empty severity levels
             
             # Sort findings by severity level
-            full_by_severity[severity] = [finding.render_fragment for finding in serialized if finding.severity == severity]
+            full_by_severity[severity] = [finding for finding in serialized if finding.severity == severity]
 
         # Adding the `render_fragment` of each finding to the report:
         for finding in serialized:
@@ -235,31 +340,29 @@ class ReportCustomizer:
             # Adding the severity level heading to the section headings:
             section_headings.append(f"{findings_section_index}.{severity_index}. {severity_display} Findings")
 
-            # Get the HTML fragments in the correct order for the current severity:
-            html_fragments = "\n".join(full_by_severity[finding.severity])
-            
+            # The findings themselves are streamed in between by stream_findings, "\0" marks where they go:
             # TODO: Can this be done in a more elegant way?
-            markdowns.append(
-                f'''
+            opening, closing = f'''
                     <div id="section-{findings_section_index}-{severity_index}" class="page-break-after">
                         <{paragraph_subheading_tag} class="paragraph-subheading">
                             {findings_section_index}.{severity_index}. {severity_display} Findings
                         </{paragraph_subheading_tag}>
                         <div>
-                            {html_fragments}
+                            \0
                         </div>
                     </div>
-                '''
-            )
+                '''.split("\0")
 
-            # Adding the link to the heading:
-            markdowns[-1] = markdowns[-1].replace(f'[[{finding.severity.value}_severity_index]]', str(severity_index))
+            # Get the findings in the correct order for the current severity:
+            finding_sections.append((opening, closing, severity_index, full_by_severity[finding.severity]))
     
         # Currently 4. is hardcoded to be the about protocol section.
         section_headings[3] = section_headings[3] + " " + config["protocol_name"]
 
         self.total_findings_amount = total_amount
         self.finding_amounts_by_severity = amounts_by_severity
-        self.findings = "\n".join(markdowns)
+        self.finding_sections = finding_sections
+        self.shard_breaks = set()
+        self.findings = self.stream_findings
         self.serialized_findings = serialized
         self.report_section_headings = section_headings
\ No newline at end of file
@@ -0,0 +1,249 @@
+from re import compile as re_compile
+
+from typing import Iterable, Iterator
+
+from pygments.token import Comment, Generic, Operator, Punctuation, String, Text, _TokenType
+
+from compiloor.constants.utils import CODE_LINE_MAX_LENGTH
+
+
+Token = tuple[_TokenType, str]
+
+# The punctuation after which a line can be broken:
+BREAK_AFTER: set[str] = {",", ";", "(", "[", "{"}
+
+# Matches the marker of a single-line comment, i.e. '//' or '#':
+COMMENT_MARKER_PATTERN = re_compile(r"(//+|#+|--|;+)\s?")
+# Splits a comment into its words and the whitespace between them:
+COMMENT_WORD_PATTERN = re_compile(r"(\s+)")
+
+def wrap_tokens(tokens: Iterable[Token], width: int = CODE_LINE_MAX_LENGTH) -> Iterator[Token]:
+    """
+        Wraps the lines of the given Pygments token stream that are longer than the given width, in a single pass. \n
+        The lines are only broken at token boundaries: after commas and opening brackets, before operators and comments
+        and at whitespace. The continuation lines are indented two spaces further than the line they continue,
+        broken comments get their marker repeated and the lines of a diff (starting with '+' or '-') keep their marker.
+        A token that is longer than a whole line (i.e. a minified blob) is split as a last resort.
+    """
+
+    wrapper = LineWrapper(width)
+
+    for token_type, value in tokens:
+        yield from wrapper.feed(token_type, value)
+
+    yield from wrapper.flush()
+
+class LineWrapper:
+    """
+        Buffers the tokens of the current line and breaks it at the last break opportunity whenever it outgrows the width. \n
+        The tokens after a break opportunity are only carried over to the next line once, so wrapping is linear in the line's length.
+    """
+
+    width: int
+
+    line: list[Token] # The tokens of the current output line.
+    length: int # The length of the current output line.
+
+    # The last position in the line where it can be broken, along with the tokens that start the continuation line:
+    break_index: int | None
+    break_prefix: list[Token]
+
+    lead: str # The indentation (and diff marker) of the current source line, while it's still being read.
+    is_reading_lead: bool
+    marker: str # The diff marker of the current source line, if any.
+    prefix_length: int # The amount of tokens that start the current output line (i.e. the indentation of a continuation line).
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+        self.start_source_line()
+
+    def start_source_line(self) -> None:
+        self.line, self.length = [], 0
+        self.break_index, self.break_prefix = None, []
+        self.lead, self.is_reading_lead, self.marker = "", True, ""
+        self.prefix_length = 0
+
+    def get_indentation(self, extra: int = 0) -> str:
+        """
+            Returns the indentation of the continuation lines, capped so that there is always room left for the code.
+        """
+
+        return " " * min(len(self.lead) - len(self.marker) + extra, self.width // 2)
+
+    def feed(self, token_type: _TokenType, value: str) -> Iterator[Token]:
+        for index, piece in enumerate(value.split("\n")):
+            if index:
+                yield from self.flush()
+                yield (token_type, "\n")
+
+            if piece: yield from self.add(token_type, piece)
+
+    def flush(self) -> Iterator[Token]:
+        """
+            Emits the buffered line without its line break.
+        """
+
+        yield from self.line
+        self.start_source_line()
+
+    def add(self, token_type: _TokenType, value: str) -> Iterator[Token]:
+        if self.is_reading_lead:
+            lead: str = self.read_lead(token_type, value)
+
+            if lead:
+                self.lead += lead
+                self.append(token_type, lead)
+                value = value[len(lead):]
+
+                # The lead might continue in the next token:
+                if not value: return
+
+            self.is_reading_lead = False
+            self.prefix_length = len(self.line)
+
+        if token_type in Comment and self.length + len(value) > self.width:
+            yield from self.add_comment(token_type, value)
+            return
+
+        room: int = self.width - len(self.marker) - len(self.get_indentation(2))
+        is_oversized: bool = len(value) > room
+
+        # A string's quotes are tokens of their own that can't be separated from it, so the string needs room for them as well:
+        if token_type in String:
+            is_oversized = self.length + len(value) + 1 > self.width and len(value) + 1 > self.get_chunk_length(room)
+
+        if is_oversized:
+            yield from self.add_oversized(token_type, value, room)
+            return
+
+        if value.isspace(): self.set_break(self.get_continuation())
+        # Not breaking before an assignment, since it would separate i.e. a keyword argument from its value:
+        elif (token_type in Operator and value != "=") or token_type in Comment: self.set_break(self.get_continuation())
+
+        yield from self.append_and_wrap(token_type, value)
+
+        if value in BREAK_AFTER and (token_type in Punctuation or token_type in Operator): self.set_break(self.get_continuation())
+
+    def read_lead(self, token_type: _TokenType, value: str) -> str:
+        """
+            Returns the start of the given token that belongs to the lead of the source line, i.e. its diff marker and indentation. \n
+            The diff lexer emits a whole inserted or deleted line as a single token, so the lead is read from the start of any token.
+        """
+
+        marker: str = ""
+
+        # A diff marker is only recognized at the very start of the line:
+        if not self.lead and value[:1] in ("+", "-"):
+            if token_type in Generic.Inserted or token_type in Generic.Deleted or (token_type in Operator and len(value) == 1):
+                self.marker = marker = value[0]
+
+        rest: str = value[len(marker):]
+
+        return marker + rest[:len(rest) - len(rest.lstrip())]
+
+    def add_comment(self, token_type: _TokenType, value: str) -> Iterator[Token]:
+        """
+            Adds a comment that doesn't fit on the line word by word, so that it gets broken at the whitespace between its words.
+            The continuation lines of a single-line comment repeat its marker.
+        """
+
+        marker = COMMENT_MARKER_PATTERN.match(value) if token_type in Comment.Single else None
+        continuation: list[Token] = self.get_continuation(0) + ([(token_type, marker.group(1) + " ")] if marker else [])
+
+        self.set_break(self.get_continuation())
+
+        for word in COMMENT_WORD_PATTERN.split(value):
+            if not word: continue
+
+            if word.isspace():
+                self.set_break(continuation)
+                self.append(token_type, word)
+                continue
+
+            # A word that doesn't fit on any line is emitted as-is instead of being split:
+            yield from self.append_and_wrap(token_type, word)
+
+    def add_oversized(self, token_type: _TokenType, value: str, room: int) -> Iterator[Token]:
+        """
+            Adds a token that can't fit on any line (i.e. the rest of a diff line, a long string or a minified blob). \n
+            The token is broken at the whitespace between its words, and a word that still doesn't fit is split as a last resort.
+            A string is never broken right after its opening quote or right before its closing quote, which the lexer emits as tokens of their own.
+        """
+
+        is_splittable: bool = token_type in Generic or token_type in String or token_type in Text
+        words: list[str] = COMMENT_WORD_PATTERN.split(value) if is_splittable else [value]
+
+        if not token_type in String: self.set_break(self.get_continuation())
+
+        for word in words:
+            if not word: continue
+
+            if word.isspace():
+                self.set_break(self.get_continuation())
+                self.append(token_type, word)
+                continue
+
+            start: int = 0
+
+            while start < len(word):
+                if start: self.set_break(self.get_continuation())
+
+                # Leaving room for the closing quote of a string:
+                end: int = start + max(1, self.get_chunk_length(room) - (1 if token_type in String else 0))
+                yield from self.append_and_wrap(token_type, word[start:end])
+                start = end
+
+    def get_chunk_length(self, room: int) -> int:
+        """
+            Returns how much of an oversized token fits on the line it ends up on. \n
+            That's the rest of the current line if it can't be broken, otherwise the continuation line,
+            next to the tokens that get carried over to it (i.e. a string's opening quote).
+        """
+
+        if self.break_index is None: return max(1, self.width - self.length)
+
+        tail: list[Token] = self.line[self.break_index:]
+        # The whitespace at the break is dropped (see append_and_wrap):
+        while tail and tail[0][1].isspace(): tail = tail[1:]
+
+        return max(1, room - sum(len(token[1]) for token in tail))
+
+    def get_continuation(self, extra: int = 2) -> list[Token]:
+        """
+            Returns the tokens that start a continuation line of the current source line.
+        """
+
+        return [(Text, self.marker + self.get_indentation(extra))]
+
+    def set_break(self, prefix: list[Token]) -> None:
+        # Breaking before the first token of the line would only leave an empty line behind:
+        if len(self.line) <= self.prefix_length: return
+
+        self.break_index, self.break_prefix = len(self.line), prefix
+
+    def append(self, token_type: _TokenType, value: str) -> None:
+        self.line.append((token_type, value))
+        self.length += len(value)
+
+    def append_and_wrap(self, token_type: _TokenType, value: str) -> Iterator[Token]:
+        """
+            Appends the token and breaks the line at the last break opportunity if the token doesn't fit.
+        """
+
+        self.append(token_type, value)
+
+        if self.length <= self.width or self.break_index is None: return
+
+        head, tail = self.line[:self.break_index], self.line[self.break_index:]
+
+        # The whitespace at the break is dropped on both sides:
+        while head and head[-1][1].isspace(): head.pop()
+        while tail and tail[0][1].isspace(): tail.pop(0)
+
+        yield from head
+        yield (Text, "\n")
+
+        self.line = self.break_prefix + tail
+        self.length = sum(len(token[1]) for token in self.line)
+        self.prefix_length = len(self.break_prefix)
+        self.break_index = None
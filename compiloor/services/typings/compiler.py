@@ -0,0 +1,40 @@
+from enum import Enum
+
+from typing import TypedDict
+
+
+class ReportFormat(Enum):
+    """Annotation class for the output formats of a compile."""
+    PDF = "pdf"
+    HTML = "html" # A self-contained preview that skips Chromium and the PDF indexing.
+    MD = "md" # A markdown export that is read straight from the sources, without rendering any HTML.
+
+class CompileOptionsDict(TypedDict, total=False):
+    markdown: bool # Whether a markdown version of the report should be rendered as well.
+    use_cache: bool # Whether the rendered findings can be served from the fragment cache.
+    offline: bool # Whether remote assets should only be served from the asset cache.
+    jobs: int # The amount of processes used for parsing and highlighting the findings and the sections.
+    optimize: bool # Whether the final PDF should be rewritten with garbage collection, compression and subset fonts.
+    linearize: bool # Whether the final PDF should be linearized for fast web view (implies optimize).
+    format: ReportFormat # The output format, PDF by default.
+    shards: int # The amount of shards the PDF gets split into and rendered concurrently, split at the severity sections.
+    inline_assets: bool # Whether the report's remote assets (i.e. the cover image) should be inlined as data URIs before rendering.
+    profile: bool # Whether a table with the timings of every stage and sub-stage should be logged.
+    trace: str | None # The path a Chrome trace of the compile's stages gets written to.
+    profile_stage: str | None # The stage that gets profiled with cProfile, i.e. "indexing/redactions".
+
+class CompileResultDict(TypedDict):
+    root: str # The root of the compiled project.
+    report_path: str | None # The path of the compiled report or None if the compile failed.
+    duration: float # The time the compile took in seconds.
+    error: str | None # Why the compile failed.
+
+class ReportShardDict(TypedDict):
+    html_dir: str # The HTML file of the shard, which Chromium loads.
+    pdf_dir: str # The PDF file the shard gets printed to.
+    ids: list[str] # The ids of the shard's elements, the possible targets of the links in the other shards.
+
+class BuildStateDict(TypedDict):
+    version: int # The BUILD_STATE_VERSION the state was written with.
+    keys: dict[str, str] # The key of every build step whose artifact is up to date with it.
+    report_section_headings: list[str] # The section headings of the assembled report, used for indexing its PDF.
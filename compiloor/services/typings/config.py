@@ -20,5 +20,4 @@ class ProtocolInformationConfigDict(TypedDict):
     cover_img_url: str
     findings: str
     render_markdown: bool
-    markdown_report: str
     
\ No newline at end of file
@@ -1,5 +1,7 @@
 from enum import Enum
 
+from typing import TypedDict
+
 from compiloor.services.logger import Logger
 
 
@@ -127,4 +129,10 @@ class FindingStatusAnnotation(Enum):
     DISPUTED = "Disputed"
     RESOLVED = "Resolved"
     PARTIALLY_RESOLVED = "Partially Resolved"
-    
\ No newline at end of file
+
+class FindingManifestEntryDict(TypedDict):
+    name: str # The name of the finding's file. Example: "[M-03].md".
+    mtime: int # The modification time of the file in nanoseconds.
+    size: int # The size of the file in bytes.
+    hash: str # The SHA-256 hash of the file's contents.
+    asset_urls: list[str] # The remote assets the finding references (i.e. its images).
@@ -0,0 +1,201 @@
+from contextlib import contextmanager
+
+from contextvars import ContextVar
+
+from hashlib import sha256
+
+from json import dumps, loads
+
+from os import makedirs
+from os.path import isfile, join
+
+from shutil import rmtree
+
+from threading import Lock
+
+from time import time
+
+from typing import TYPE_CHECKING, Iterator
+
+from compiloor.constants.environment import ASSET_CACHE_DIRECTORY
+from compiloor.constants.utils import ASSET_REQUEST_TIMEOUT_SECONDS
+from compiloor.services.logger import Logger
+from compiloor.services.utils.config import ConfigUtils
+from compiloor.services.utils.stats import CacheStats
+from compiloor.services.utils.utils import write_atomically
+
+# requests is only imported once an asset actually gets fetched, since most commands never touch the network:
+if TYPE_CHECKING: from requests import Session
+
+# Whether the compile running in the current context serves the assets only from the cache, without touching the network, and its statistics.
+# They are context variables so that the concurrent compiles of "compiloor compile-all" can each have their own:
+ASSET_CACHE_OFFLINE: ContextVar[bool] = ContextVar("asset_cache_offline", default=False)
+ASSET_CACHE_STATS: ContextVar[CacheStats | None] = ContextVar("asset_cache_stats", default=None)
+
+class AssetCache:
+    """
+        A local cache for remote assets such as the report template and the stylesheet. \n
+        The asset bodies are stored by the hash of their content and indexed by their URL.
+        Cached assets are revalidated with conditional requests (If-None-Match / If-Modified-Since)
+        through a single pooled session and served as-is when the network is not available.
+    """
+
+    _session: "Session | None" = None
+    _lock: Lock = Lock()
+
+    @staticmethod
+    @contextmanager
+    def activate(offline: bool = False) -> Iterator[CacheStats]:
+        """
+            Sets whether the assets are only served from the cache for the current context inside of the wrapped block
+            and counts the cache's hits and misses from scratch.
+        """
+
+        offline_token, stats_token = ASSET_CACHE_OFFLINE.set(offline), ASSET_CACHE_STATS.set(CacheStats())
+
+        try: yield ASSET_CACHE_STATS.get()
+        finally:
+            ASSET_CACHE_OFFLINE.reset(offline_token)
+            ASSET_CACHE_STATS.reset(stats_token)
+
+    @staticmethod
+    def is_offline() -> bool:
+        return ASSET_CACHE_OFFLINE.get()
+
+    @staticmethod
+    def get_stats() -> CacheStats:
+        """
+            Returns the statistics of the compile running in the current context.
+            Outside of a compile the hits and misses get counted by a throwaway instance.
+        """
+
+        return ASSET_CACHE_STATS.get() or CacheStats()
+
+    @staticmethod
+    def get_directory() -> str:
+        return ConfigUtils.get_cache_directory(ASSET_CACHE_DIRECTORY)
+
+    @staticmethod
+    def get_object_location(digest: str) -> str:
+        return join(AssetCache.get_directory(), "objects", digest)
+
+    @staticmethod
+    def get_session() -> "Session":
+        """
+            Returns the session shared by all of the asset requests so that connections get reused.
+        """
+
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+
+        with AssetCache._lock:
+            if not AssetCache._session:
+                AssetCache._session = Session()
+                AssetCache._session.mount("http://", HTTPAdapter(pool_maxsize=16))
+                AssetCache._session.mount("https://", HTTPAdapter(pool_maxsize=16))
+
+        return AssetCache._session
+
+    @staticmethod
+    def read_index() -> dict[str, dict]:
+        """
+            Returns the URL -> cache entry mapping.
+        """
+
+        try: return loads(open(join(AssetCache.get_directory(), "index.json"), "r").read())
+        except (OSError, ValueError): return {}
+
+    @staticmethod
+    def read_cached(url: str) -> bytes | None:
+        """
+            Returns the last good copy of the asset at the given URL or None if it was never fetched.
+        """
+
+        return AssetCache.read_object(AssetCache.read_index().get(url, {}))
+
+    @staticmethod
+    def read_object(entry: dict) -> bytes | None:
+        if not entry or not isfile(AssetCache.get_object_location(entry["digest"])): return None
+
+        return open(AssetCache.get_object_location(entry["digest"]), "rb").read()
+
+    @staticmethod
+    def fetch(url: str, max_age: float = 0) -> bytes:
+        """
+            Returns the contents of the asset at the given URL, revalidating the cached copy if there is one. \n
+            :param max_age: The seconds for which a revalidated copy is served without asking the server again.
+            :raises ConnectionError: If the asset can't be fetched and was never cached.
+        """
+
+        entry: dict = AssetCache.read_index().get(url, {})
+        cached: bytes | None = AssetCache.read_object(entry)
+
+        if AssetCache.is_offline():
+            if cached is None: raise ConnectionError(f"{url} is not cached and can't be fetched in offline mode.")
+            AssetCache.get_stats().add(hits=1)
+            return cached
+
+        if cached is not None and time() - entry.get("validated_at", 0) < max_age:
+            AssetCache.get_stats().add(hits=1)
+            return cached
+
+        from requests import RequestException
+
+        headers: dict[str, str] = {}
+
+        if cached is not None:
+            if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = AssetCache.get_session().get(url, headers=headers, timeout=ASSET_REQUEST_TIMEOUT_SECONDS)
+            if response.status_code != 304: response.raise_for_status()
+        except RequestException as err:
+            if cached is None: raise ConnectionError(f"Couldn't fetch {url}: {err}")
+
+            Logger.warning(f"Couldn't fetch {url}, using the last cached copy instead.")
+            AssetCache.get_stats().add(hits=1)
+            return cached
+
+        if response.status_code == 304 and cached is not None:
+            AssetCache.get_stats().add(hits=1)
+            AssetCache.store(url, cached, entry)
+            return cached
+
+        AssetCache.get_stats().add(misses=1)
+        AssetCache.store(url, response.content, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+        })
+
+        return response.content
+
+    @staticmethod
+    def store(url: str, content: bytes, entry: dict) -> None:
+        """
+            Stores the given content as the last good copy of the asset at the given URL.
+        """
+
+        digest: str = sha256(content).hexdigest()
+
+        # A failure to write to the cache should never fail the compile:
+        try:
+            with AssetCache._lock:
+                makedirs(join(AssetCache.get_directory(), "objects"), exist_ok=True)
+
+                if not isfile(AssetCache.get_object_location(digest)):
+                    AssetCache.write(AssetCache.get_object_location(digest), content)
+
+                index = AssetCache.read_index()
+                index[url] = { **entry, "digest": digest, "size": len(content), "validated_at": time() }
+                AssetCache.write(join(AssetCache.get_directory(), "index.json"), dumps(index, indent=4).encode())
+        except OSError: pass
+
+    @staticmethod
+    def write(path: str, content: bytes) -> None:
+        with write_atomically(path) as temp_path, open(temp_path, "wb") as file: file.write(content)
+
+    @staticmethod
+    def clear() -> None:
+        with AssetCache._lock: rmtree(AssetCache.get_directory(), ignore_errors=True)
@@ -1,6 +1,6 @@
 from json import dumps
 
-from os import makedirs
+from os import environ, makedirs
 from os.path import expanduser, isfile, join
 
 from compiloor.constants.environment import BASE_CONFIG_SCHEMA, COMPILOOR_CACHE_DIRECTORY, CONFIG_NAME
@@ -38,6 +38,16 @@ class ConfigUtils:
             Logger.error("The stylesheet URL must be a valid URL.")
             exit(1)
     
+    @staticmethod
+    def get_cache_directory(*name: str) -> str:
+        """
+            Returns the location of compiloor's caches. Can be overridden with the COMPILOOR_CACHE_DIR environment variable.
+        """
+        return join(
+            environ.get("COMPILOOR_CACHE_DIR") or join(expanduser('~'), '.cache', COMPILOOR_CACHE_DIRECTORY),
+            *name
+        )
+    
     @staticmethod
     def get_base_config_location() -> str:
         """
@@ -0,0 +1,25 @@
+from threading import Lock
+
+
+class CacheStats:
+    """
+        The hits and misses of a cache during a single compile. \n
+        Every compile activates its own statistics (see FragmentCache.activate and AssetCache.activate),
+        so the concurrent compiles of "compiloor compile-all" never count each other's hits.
+        The stages of a compile that run on other threads share its statistics, so they're counted under a lock.
+    """
+
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self.hits, self.misses = 0, 0
+        self._lock = Lock()
+
+    def add(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def __str__(self) -> str:
+        return f"{self.hits} cache hits, {self.misses} cache misses"
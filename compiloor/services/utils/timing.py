@@ -0,0 +1,201 @@
+from concurrent.futures import Future
+
+from contextlib import contextmanager
+
+from contextvars import ContextVar
+
+from cProfile import Profile
+
+from io import StringIO
+
+from json import dump
+
+from os import getpid
+
+from pstats import Stats
+
+from rich.markup import escape
+
+from threading import Lock, current_thread
+
+from time import perf_counter
+
+from typing import Any, Callable, Iterator
+
+from compiloor.services.logger import Logger
+
+
+# The timer of the compile running in the current context and the stage that is currently timed.
+# They are context variables so that the nested stages (i.e. the indexing's redactions) can be timed without passing the timer around:
+CURRENT_TIMER: ContextVar["StageTimer | None"] = ContextVar("current_timer", default=None)
+CURRENT_STAGE: ContextVar[str | None] = ContextVar("current_stage", default=None)
+
+class StageTimer:
+    """
+        Records when each compile stage started and finished, including the stages that run concurrently. \n
+        A stage that starts inside of another one is recorded as its sub-stage, i.e. "indexing/redactions".
+    """
+
+    started: float
+    stages: dict[str, tuple[float, float]] # The start and end of each stage relative to the timer's start.
+    threads: dict[str, str] # The name of the thread each stage ran on.
+
+    # The stage that gets profiled with cProfile, if any:
+    profiled_stage: str | None
+
+    def __init__(self, profiled_stage: str | None = None) -> None:
+        self.started = perf_counter()
+        self.stages, self.threads = {}, {}
+        self.profiled_stage = profiled_stage
+        self._lock = Lock()
+
+    @staticmethod
+    def current() -> "StageTimer":
+        """
+            Returns the timer of the compile running in the current context.
+            Outside of a compile the stages get recorded by a throwaway timer.
+        """
+
+        return CURRENT_TIMER.get() or StageTimer()
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """
+            Makes this the timer of the current context inside of the wrapped block.
+        """
+
+        token = CURRENT_TIMER.set(self)
+        try: yield
+        finally: CURRENT_TIMER.reset(token)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+            Times the wrapped block as the stage with the given name.
+        """
+
+        parent: str | None = CURRENT_STAGE.get()
+        name = f"{parent}/{name}" if parent else name
+
+        token = CURRENT_STAGE.set(name)
+        profile: Profile | None = Profile() if name == self.profiled_stage else None
+
+        start: float = perf_counter()
+        if profile: profile.enable()
+
+        try: yield
+        finally:
+            if profile: profile.disable()
+
+            self.record(name, start, perf_counter())
+            CURRENT_STAGE.reset(token)
+
+            if profile: self.log_profile(name, profile)
+
+    def run(self, name: str, callable: Callable, *args) -> Any:
+        """
+            Calls the given callable and times it as the stage with the given name.
+        """
+
+        with self.stage(name): return callable(*args)
+
+    def track(self, name: str, future: Future) -> None:
+        """
+            Times the given future from now until it completes.
+        """
+
+        start: float = perf_counter()
+        future.add_done_callback(lambda _: self.record(name, start, perf_counter()))
+
+    def record(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.stages[name] = (start - self.started, end - self.started)
+            self.threads[name] = current_thread().name
+
+    def get_elapsed(self) -> float:
+        return perf_counter() - self.started
+
+    def get_stages(self) -> list[tuple[str, tuple[float, float]]]:
+        """
+            Returns the recorded stages in the order they started.
+        """
+
+        with self._lock: return sorted(self.stages.items(), key=lambda stage: stage[1][0])
+
+    def log(self) -> None:
+        """
+            Logs the duration of every top-level stage and compares the wall-clock time against running them one after another.
+        """
+
+        stages = [(name, timing) for name, timing in self.get_stages() if not "/" in name]
+
+        breakdown: str = ", ".join(f"{name} {end - start:.2f}s" for name, (start, end) in stages)
+        sequential: float = sum(end - start for _, (start, end) in stages)
+
+        Logger.info(f"Stage timings: {breakdown}.")
+        Logger.info(f"Compiled in {self.get_elapsed():.2f}s ({sequential:.2f}s if the stages ran one after another).")
+
+    def log_table(self) -> None:
+        """
+            Logs every stage, including the sub-stages, as a table.
+        """
+
+        elapsed: float = self.get_elapsed()
+        stages = dict(self.get_stages())
+
+        # The sub-stages are listed right under the stage they belong to:
+        def get_tree_position(name: str) -> list[float]:
+            parts: list[str] = name.split("/")
+            return [stages.get("/".join(parts[:depth]), (0, 0))[0] for depth in range(1, len(parts) + 1)]
+
+        Logger.table("Stage timings", ["Stage", "Thread", "Start", "Duration", "Share"], [
+            [
+                "  " * name.count("/") + name.split("/")[-1],
+                self.threads[name],
+                f"{stages[name][0]:.3f}s",
+                f"{stages[name][1] - stages[name][0]:.3f}s",
+                f"{(stages[name][1] - stages[name][0]) / elapsed:.0%}"
+            ]
+            for name in sorted(stages, key=get_tree_position)
+        ])
+
+    def write_trace(self, path: str) -> None:
+        """
+            Writes the stages to the given path in the Chrome trace event format (chrome://tracing or https://ui.perfetto.dev).
+        """
+
+        stages = self.get_stages()
+        thread_ids: dict[str, int] = { thread: index for index, thread in enumerate(dict.fromkeys(self.threads[name] for name, _ in stages)) }
+
+        events: list[dict] = [
+            { "name": "thread_name", "ph": "M", "pid": getpid(), "tid": thread_id, "args": { "name": thread } }
+            for thread, thread_id in thread_ids.items()
+        ]
+
+        for name, (start, end) in stages:
+            events.append({
+                "name": name.split("/")[-1],
+                "cat": "compile",
+                "ph": "X", # A complete event with a duration.
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": getpid(),
+                "tid": thread_ids[self.threads[name]],
+                "args": { "stage": name }
+            })
+
+        with open(path, "w") as file: dump({ "traceEvents": events, "displayTimeUnit": "ms" }, file)
+        Logger.info(f"Wrote the trace of the compile to {path}.")
+
+    @staticmethod
+    def log_profile(name: str, profile: Profile, limit: int = 25) -> None:
+        """
+            Logs the functions that took the most cumulative time in the given profile.
+            :note: cProfile only sees the thread the stage runs on, not the threads it waits for.
+        """
+
+        output = StringIO()
+        Stats(profile, stream=output).strip_dirs().sort_stats("cumulative").print_stats(limit)
+
+        # The profile contains square brackets, which would be read as markup:
+        Logger.info(f"Profile of the '{name}' stage:\n{escape(output.getvalue())}")
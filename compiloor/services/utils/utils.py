@@ -1,6 +1,45 @@
+from contextlib import contextmanager
+
+from os import remove, replace
+from os.path import dirname
+
+from re import compile as re_compile
+
+from tempfile import NamedTemporaryFile
+
+from typing import Iterator
+
 from urllib.parse import urlparse
 
 
+# Matches the source of a markdown image, i.e. '![poc](https://...)', which gets rendered to an '<img src="...">':
+MARKDOWN_IMAGE_PATTERN = re_compile(r"""!\[[^\]]*\]\(\s*<?([^\s)>]+)""")
+
 def validate_url(url: str) -> bool:
     result = urlparse(url)
-    return all([result.scheme, result.netloc])
\ No newline at end of file
+    return all([result.scheme, result.netloc])
+
+def get_markdown_asset_urls(markdown: str) -> list[str]:
+    """
+        Returns the remote images of the given markdown. The renderer escapes raw HTML, so the images are the only assets it can reference.
+    """
+
+    urls: list[str] = [match.group(1) for match in MARKDOWN_IMAGE_PATTERN.finditer(markdown)]
+
+    return list(dict.fromkeys(url for url in urls if urlparse(url).scheme in ("http", "https")))
+
+@contextmanager
+def write_atomically(path: str) -> Iterator[str]:
+    """
+        Yields the path of a temporary file next to the given one, which replaces it once the wrapped block is done. \n
+        Concurrent readers never see a partially written file, and the temporary file is removed if the write fails.
+    """
+
+    with NamedTemporaryFile(dir=dirname(path), suffix=".tmp", delete=False) as file: pass
+
+    try:
+        yield file.name
+        replace(file.name, path)
+    except BaseException:
+        remove(file.name)
+        raise
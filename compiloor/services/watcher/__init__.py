@@ -0,0 +1 @@
+from .watcher import *
\ No newline at end of file
@@ -0,0 +1,224 @@
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+
+from os import O_CLOEXEC, O_NONBLOCK, close, read, scandir, strerror
+from os.path import basename, dirname, join, relpath
+
+from select import select
+
+from struct import calcsize, unpack_from
+
+from sys import platform
+
+from time import monotonic, perf_counter, sleep
+
+from compiloor.constants.environment import CONFIG_NAME, FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.constants.utils import CHROMIUM_POOL_SIZE, WATCH_DEBOUNCE_SECONDS, WATCH_POLLING_INTERVAL_SECONDS
+from compiloor.services.compiler.pipeline import compile_pdf_report
+from compiloor.services.environment.setup import findings_directory_not_empty
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.logger import Logger
+from compiloor.services.parser.chromium import ChromiumPool
+from compiloor.services.typings.compiler import CompileOptionsDict, ReportFormat
+from compiloor.services.typings.finding import Severity
+from compiloor.services.utils.config import ConfigUtils
+
+
+class PollingFileWatcher:
+    """
+        Detects file changes by comparing the files of the watched directories between scans.
+        Used when inotify is not available.
+    """
+
+    directories: list[str]
+    interval: float
+    snapshot: dict[str, tuple[int, int]] # The modification time and size of every file.
+
+    def __init__(self, directories: list[str], interval: float = WATCH_POLLING_INTERVAL_SECONDS) -> None:
+        self.directories, self.interval = directories, interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        snapshot: dict[str, tuple[int, int]] = {}
+
+        for directory in self.directories:
+            try:
+                with scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_file(): continue
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            # The directory might get removed while watching it:
+            except FileNotFoundError: continue
+
+        return snapshot
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """
+            Blocks until some files change or the timeout expires and returns the paths of the changed files.
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+
+        while True:
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+
+            if changed: return changed
+            if deadline is None: sleep(self.interval); continue
+
+            remaining = deadline - monotonic()
+            if remaining <= 0: return changed
+            sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+class InotifyFileWatcher:
+    """
+        Detects file changes through the Linux inotify API.
+    """
+
+    # IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE.
+    # Listening for IN_CLOSE_WRITE instead of IN_MODIFY so that a save is only reported once it's complete:
+    EVENTS: int = 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+    # struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+    EVENT_HEADER: str = "iIII"
+
+    descriptor: int
+    directories: dict[int, str] # The watched directories by their watch descriptor.
+
+    def __init__(self, directories: list[str]) -> None:
+        libc = CDLL(find_library("c"), use_errno=True)
+
+        # IN_NONBLOCK and IN_CLOEXEC share their values with O_NONBLOCK and O_CLOEXEC:
+        self.descriptor = libc.inotify_init1(O_NONBLOCK | O_CLOEXEC)
+        if self.descriptor < 0: raise OSError(get_errno(), strerror(get_errno()))
+
+        self.directories = {}
+
+        for directory in directories:
+            watch_descriptor = libc.inotify_add_watch(self.descriptor, directory.encode(), self.EVENTS)
+            if watch_descriptor < 0: raise OSError(get_errno(), strerror(get_errno()), directory)
+            self.directories[watch_descriptor] = directory
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """
+            Blocks until some files change or the timeout expires and returns the paths of the changed files.
+        """
+
+        changed: set[str] = set()
+
+        if not select([self.descriptor], [], [], timeout)[0]: return changed
+
+        data, offset, header_size = read(self.descriptor, 64 * 1024), 0, calcsize(self.EVENT_HEADER)
+
+        while offset < len(data):
+            watch_descriptor, _, _, length = unpack_from(self.EVENT_HEADER, data, offset)
+            name = data[offset + header_size:offset + header_size + length].rstrip(b"\0").decode()
+            offset += header_size + length
+
+            if not name or not watch_descriptor in self.directories: continue
+            changed.add(join(self.directories[watch_descriptor], name))
+
+        return changed
+
+    def close(self) -> None:
+        close(self.descriptor)
+
+def create_file_watcher(directories: list[str]) -> InotifyFileWatcher | PollingFileWatcher:
+    """
+        Returns an inotify-based watcher on Linux and falls back to polling everywhere else.
+    """
+
+    if platform.startswith("linux"):
+        try: return InotifyFileWatcher(directories)
+        except (AttributeError, OSError): pass
+
+    return PollingFileWatcher(directories)
+
+class ReportWatcher:
+    """
+        Recompiles the report whenever a finding, a section or the config changes. \n
+        Everything that didn't change is reused between compiles: the serialized findings and the warm browser.
+        The template and the stylesheet are fetched through the asset cache on every compile,
+        so that they're revalidated (with a conditional request) instead of being held for the whole session.
+    """
+
+    options: CompileOptionsDict
+
+    def __init__(self, options: CompileOptionsDict) -> None:
+        self.options = options
+
+        self.main_directory = FileUtils.get_path(MAIN_DIRECTORY)
+        self.sections_directory = join(self.main_directory, "sections")
+        self.findings_directory = FileUtils.get_path(FINDINGS_DIRECTORY)
+
+        self.watcher = create_file_watcher([self.main_directory, self.sections_directory, self.findings_directory])
+
+    def is_relevant(self, path: str) -> bool:
+        """
+            Returns whether a change in the given file affects the report.
+        """
+
+        directory, name = dirname(path), basename(path)
+
+        # The main directory also holds the compiled reports:
+        if directory == self.main_directory: return name == CONFIG_NAME
+
+        # Skipping hidden files such as editor swap files:
+        return name.endswith(".md") and not name.startswith(".")
+
+    def watch(self) -> None:
+        # Starting the browsers while the first compile prepares the report.
+        # The report is only split at its severity sections, and any of them can get findings while watching:
+        shards: int = min(self.options.get("shards", 1), len(Severity))
+
+        if self.options.get("format", ReportFormat.PDF) == ReportFormat.PDF: ChromiumPool.shared(max(shards, CHROMIUM_POOL_SIZE)).warm()
+
+        self.rebuild(set())
+        Logger.info("Watching for changes. Press Ctrl+C to stop.")
+
+        try:
+            while True: self.rebuild(self.collect_changes())
+        except KeyboardInterrupt:
+            Logger.success("Stopped watching for changes!")
+        finally:
+            self.watcher.close()
+
+    def collect_changes(self) -> set[str]:
+        """
+            Blocks until a relevant file changes and returns all of the files changed during the burst of saves.
+        """
+
+        changed: set[str] = set()
+
+        while not changed: changed = set(filter(self.is_relevant, self.watcher.wait()))
+
+        # Debouncing bursts of saves (i.e. "save all" or editors writing through temporary files):
+        while True:
+            burst = set(filter(self.is_relevant, self.watcher.wait(WATCH_DEBOUNCE_SECONDS)))
+            if not burst: return changed
+            changed |= burst
+
+    def rebuild(self, changed: set[str]) -> None:
+        if changed: Logger.info(f"Detected changes in: {', '.join(sorted(relpath(path) for path in changed))}")
+
+        started: float = perf_counter()
+
+        try:
+            findings_directory_not_empty()
+            ConfigUtils.validate_config_template_urls(FileUtils.read_config(json=True))
+
+            # Only the findings whose fragments changed get re-parsed, everything else is reused:
+            compile_pdf_report(self.options)
+        # The failing step already logged why it exited:
+        except SystemExit:
+            Logger.warning("The report was not recompiled. Waiting for further changes.")
+            return
+        except Exception as err:
+            Logger.error(f"An error occured while recompiling the report: {err}")
+            return
+
+        Logger.info(f"Recompiled the report in {perf_counter() - started:.2f}s.")
\ No newline at end of file
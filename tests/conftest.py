@@ -0,0 +1,8 @@
+from pytest import MonkeyPatch, fixture
+
+
+@fixture(autouse=True)
+def cache_directory(tmp_path, monkeypatch: MonkeyPatch) -> str:
+    # The caches of the tests never mix with the user's caches:
+    monkeypatch.setenv("COMPILOOR_CACHE_DIR", str(tmp_path / ".cache"))
+    return str(tmp_path / ".cache")
@@ -0,0 +1,83 @@
+from os import devnull, makedirs
+from os.path import join
+
+from tracemalloc import get_traced_memory, start, stop
+
+from typing import Callable
+
+from compiloor.constants.environment import FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.sanitizer import sanitize_html_stream
+from compiloor.services.parser.template import CompiledTemplate
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.utils.timing import StageTimer
+
+
+FINDING: str = (
+    "# [H-{index:02}] Reentrancy in withdraw ({project})\n\n## Description\n\nThe balance is only updated after the external call.\n\n"
+    "```solidity\n" + "balances[msg.sender] -= amount; // Updated after the call.\n" * 20 + "```\n"
+)
+
+def create_project(root: str, findings: int) -> None:
+    makedirs(join(root, FINDINGS_DIRECTORY))
+    makedirs(join(root, MAIN_DIRECTORY))
+
+    for index in range(1, findings + 1):
+        # Every project has its own findings, so that none of them are reused from the previous compile:
+        open(join(root, FINDINGS_DIRECTORY, f"[H-{index:02}].md"), "w").write(FINDING.format(index=index, project=root))
+
+def write_streamed(customizer: ReportCustomizer) -> None:
+    with open(devnull, "w") as file:
+        for fragment in sanitize_html_stream(customizer.stream_report()): file.write(fragment)
+
+def write_joined(customizer: ReportCustomizer) -> None:
+    with open(devnull, "w") as file: file.write("".join(sanitize_html_stream([customizer.template.render(customizer.template_values)])))
+
+def measure(root: str, findings: int, write: Callable[[ReportCustomizer], None]) -> tuple[int, int]:
+    """
+        Reads, serializes and writes out the findings of a new project.
+        Returns the memory still held by the customizer afterwards and the peak memory allocated from before the findings were read.
+    """
+
+    create_project(root, findings)
+
+    with FileUtils.project_root(root):
+        start()
+
+        customizer = ReportCustomizer.__new__(ReportCustomizer)
+        customizer.timer, customizer.jobs = StageTimer(), 1
+
+        customizer.fetch_finding_fragments({ "protocol_name": "Protocol" }, 8)
+        customizer.template_values, customizer.config_values = { "{{findings}}": customizer.stream_findings }, {}
+        customizer.template = CompiledTemplate("<html><head></head><body>{{findings}}</body></html>")
+
+        write(customizer)
+
+        retained, peak = get_traced_memory()
+        stop()
+
+    return retained, peak
+
+def test_streamed_assembly_only_holds_one_finding_on_top_of_the_serialized_findings(tmp_path):
+    """
+        The findings are serialized (and rendered in parallel) up front, so the memory they hold grows with their amount.
+        Streaming the report bounds everything on top of them: the report is never held as a whole, only the finding being written.
+    """
+
+    # The renderer's lazy imports (i.e. of the lexers) aren't a part of the compile's memory:
+    measure(str(tmp_path / "warm-up"), 5, write_streamed)
+
+    small_retained, small_peak = measure(str(tmp_path / "small"), 50, write_streamed)
+    large_retained, large_peak = measure(str(tmp_path / "large"), 400, write_streamed)
+
+    assert large_retained > small_retained * 4
+
+    # The overhead stays the same while the amount of findings grows eightfold:
+    assert large_peak - large_retained < (small_peak - small_retained) * 1.5 + 64 * 1024
+    assert large_peak - large_retained < large_retained / 10
+
+def test_joined_assembly_holds_the_whole_report(tmp_path):
+    # A sanity check of the measurement, joining the report copies all of the findings at once:
+    retained, peak = measure(str(tmp_path / "joined"), 400, write_joined)
+
+    assert peak - retained > retained
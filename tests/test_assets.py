@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+
+from functools import partial
+
+from hashlib import sha256
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from threading import Thread
+
+from time import sleep
+
+from typing import Iterator
+
+from pytest import MonkeyPatch, fixture, raises
+from typer.testing import CliRunner
+
+from compiloor.services.cli.cli import cli
+from compiloor.services.utils import assets as assets_module
+from compiloor.services.utils.assets import AssetCache
+
+
+LAST_MODIFIED: str = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+class AssetServer:
+    """
+        The state of the local HTTP stand-in: the assets it serves by their path and the requests it received.
+    """
+
+    def __init__(self) -> None:
+        self.assets: dict[str, bytes] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.delay: float = 0 # The seconds every response is held back for, to stand in for a CDN that doesn't answer.
+        self.url: str = ""
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    """
+        Serves the assets with an ETag and a Last-Modified date, and answers the matching conditional requests with a 304.
+    """
+
+    def __init__(self, *args, state: AssetServer, **kwargs) -> None:
+        self.state = state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        self.state.requests.append((self.path, dict(self.headers)))
+
+        if self.state.delay: sleep(self.state.delay)
+
+        if not self.path in self.state.assets: return self.send_error(404)
+
+        content: bytes = self.state.assets[self.path]
+        etag: str = f'"{sha256(content).hexdigest()[:16]}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/css")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args) -> None:
+        pass
+
+@contextmanager
+def serve_assets(state: AssetServer) -> Iterator[str]:
+    """
+        Serves the given assets on localhost inside of the wrapped block and yields its base URL.
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(AssetRequestHandler, state=state))
+    server.daemon_threads = True
+
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try: yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@fixture
+def server() -> Iterator[AssetServer]:
+    state = AssetServer()
+    state.assets["/style.css"] = b"body { color: black; }"
+
+    with serve_assets(state) as url:
+        state.url = url
+        yield state
+
+def get_conditional_headers(server: AssetServer) -> list[tuple[str | None, str | None]]:
+    return [(headers.get("If-None-Match"), headers.get("If-Modified-Since")) for _, headers in server.requests]
+
+def test_revalidation_serves_the_cached_copy_on_304(server: AssetServer):
+    url: str = server.url + "/style.css"
+
+    with AssetCache.activate() as stats:
+        assert AssetCache.fetch(url) == b"body { color: black; }"
+        assert AssetCache.fetch(url) == b"body { color: black; }"
+
+    etag, last_modified = get_conditional_headers(server)[1]
+
+    assert etag and last_modified == LAST_MODIFIED
+    assert get_conditional_headers(server)[0] == (None, None)
+    assert (stats.hits, stats.misses) == (1, 1)
+
+def test_changed_asset_replaces_the_cached_copy(server: AssetServer):
+    url: str = server.url + "/style.css"
+
+    with AssetCache.activate() as stats:
+        AssetCache.fetch(url)
+        digest: str = AssetCache.read_index()[url]["digest"]
+
+        server.assets["/style.css"] = b"body { color: red; }"
+
+        assert AssetCache.fetch(url) == b"body { color: red; }"
+
+    assert AssetCache.read_index()[url]["digest"] != digest
+    assert AssetCache.read_cached(url) == b"body { color: red; }"
+    assert (stats.hits, stats.misses) == (0, 2)
+
+def test_revalidated_copy_is_served_without_a_request_while_fresh(server: AssetServer):
+    url: str = server.url + "/style.css"
+
+    AssetCache.fetch(url)
+    AssetCache.fetch(url, max_age=60)
+
+    assert len(server.requests) == 1
+
+def test_offline_mode_only_serves_cached_copies(server: AssetServer):
+    AssetCache.fetch(server.url + "/style.css")
+
+    with AssetCache.activate(offline=True) as stats:
+        assert AssetCache.fetch(server.url + "/style.css") == b"body { color: black; }"
+
+        with raises(ConnectionError): AssetCache.fetch(server.url + "/missing.css")
+
+    assert len(server.requests) == 1
+    assert stats.hits == 1
+
+def test_unreachable_server_falls_back_to_the_cached_copy():
+    state = AssetServer()
+    state.assets["/style.css"] = b"body { color: black; }"
+
+    with serve_assets(state) as url:
+        AssetCache.fetch(url + "/style.css")
+
+    # The server is gone, so the cached copy is the only one left:
+    assert AssetCache.fetch(url + "/style.css") == b"body { color: black; }"
+
+    with raises(ConnectionError): AssetCache.fetch(url + "/missing.css")
+
+def test_timeout_falls_back_to_the_cached_copy(server: AssetServer, monkeypatch: MonkeyPatch):
+    url: str = server.url + "/style.css"
+    AssetCache.fetch(url)
+
+    monkeypatch.setattr(assets_module, "ASSET_REQUEST_TIMEOUT_SECONDS", 0.2)
+    server.delay = 1
+
+    assert AssetCache.fetch(url) == b"body { color: black; }"
+
+    server.assets["/other.css"] = b"p { margin: 0; }"
+
+    with raises(ConnectionError): AssetCache.fetch(server.url + "/other.css")
+
+def test_cache_commands_list_and_clear_the_assets(server: AssetServer, tmp_path, monkeypatch: MonkeyPatch):
+    # Clearing the cache clears the build directory of the current project as well:
+    monkeypatch.chdir(tmp_path)
+
+    AssetCache.fetch(server.url + "/style.css")
+
+    listed = CliRunner().invoke(cli, ["cache", "ls"])
+    assert listed.exit_code == 0 and "1 cached assets" in listed.output
+
+    cleared = CliRunner().invoke(cli, ["cache", "clear"])
+    assert cleared.exit_code == 0
+
+    assert AssetCache.read_index() == {}
+    assert AssetCache.read_cached(server.url + "/style.css") is None
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from contextvars import copy_context
+
+from os import listdir, makedirs
+from os.path import join
+
+from threading import Barrier
+
+from pytest import raises
+
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.cache import FragmentCache
+from compiloor.services.parser.finding import Finding
+from compiloor.services.utils.stats import CacheStats
+
+
+def create_fragments(project: str, amount: int) -> list[str]:
+    return [f"# [M-{index:02}] Finding {index} of {project}\n\n## Description\n\nThe description.\n" for index in range(1, amount + 1)]
+
+def test_concurrent_compiles_have_their_own_stats_and_findings(tmp_path):
+    projects: dict[str, list[str]] = {
+        str(tmp_path / "first"): create_fragments("first", 3),
+        str(tmp_path / "second"): create_fragments("second", 5),
+    }
+
+    barrier = Barrier(len(projects))
+
+    def compile_project(root: str) -> tuple[int, int, int, int]:
+        with FileUtils.project_root(root):
+            with FragmentCache.activate() as stats:
+                # Both compiles render their findings at the same time:
+                barrier.wait()
+                Finding.serialize_all(projects[root])
+
+            # The findings of the other project never evict the ones of this project:
+            barrier.wait()
+
+            with FragmentCache.activate() as unchanged:
+                Finding.serialize_all(projects[root])
+
+        return stats.hits, stats.misses, unchanged.hits, unchanged.misses
+
+    with ThreadPoolExecutor(max_workers=len(projects)) as executor:
+        results = list(executor.map(lambda root: copy_context().run(compile_project, root), projects))
+
+    assert results == [(0, 3, 0, 0), (0, 5, 0, 0)]
+
+def test_disabling_the_cache_is_scoped_to_the_context():
+    with FragmentCache.activate(False):
+        assert not FragmentCache.is_enabled()
+        assert copy_context().run(FragmentCache.is_enabled) is False
+
+    assert FragmentCache.is_enabled()
+    # Outside of a compile the statistics go nowhere:
+    assert isinstance(FragmentCache.get_stats(), CacheStats)
+
+def test_failed_write_leaves_no_temporary_file():
+    makedirs(FragmentCache.get_directory())
+    path: str = join(FragmentCache.get_directory(), "entry.html")
+
+    # An entry can't replace a directory:
+    makedirs(path)
+
+    with raises(OSError): FragmentCache.write(path, "<p>The description.</p>")
+
+    assert listdir(FragmentCache.get_directory()) == ["entry.html"]
@@ -0,0 +1,21 @@
+from re import findall
+
+from compiloor.services.parser.finding import Finding
+from compiloor.services.parser.legend import create_finding_severities_legend_html
+
+
+def create_finding(finding_id: str) -> Finding:
+    return Finding(f"# [{finding_id}] Title of {finding_id}\n\n## Description\n\nThe description.\n")
+
+def test_legend_links_to_the_findings_after_a_gap():
+    findings = [create_finding(finding_id) for finding_id in ("M-01", "M-03", "L-02")]
+    legend, severity_to_index = create_finding_severities_legend_html(8, findings)
+
+    # The findings get their severity's index when the report is assembled:
+    ids = [
+        findall(r'id="([^"]+)"', finding.render_fragment.replace(f"[[{finding.severity.value}_severity_index]]", str(severity_to_index[finding.severity])))[0]
+        for finding in findings
+    ]
+
+    assert ids == ["section-8-1-1", "section-8-1-3", "section-8-2-2"]
+    assert [link for link in findall(r'href="#([^"]+)"', legend) if link.count("-") == 3] == ids
@@ -0,0 +1,44 @@
+from os import listdir
+
+from shutil import copyfile
+
+from fitz import Document
+
+from pytest import raises
+
+from compiloor.services.parser.optimization import save_optimized_pdf, save_reproducible_pdf
+
+
+def create_print(path: str) -> None:
+    # Stands in for the print of Chromium, which stamps the document with the date of the render:
+    pdf = Document()
+    pdf.new_page().insert_text((72, 72), "[H-01] Reentrancy in withdraw")
+    pdf.set_metadata({ "producer": "Skia/PDF", "creationDate": "D:20240101120000+00'00'", "modDate": "D:20240101120000+00'00'" })
+    pdf.save(path)
+    pdf.close()
+
+def test_reproducible_save_drops_the_timestamps_of_the_print(tmp_path):
+    create_print(str(tmp_path / "print.pdf"))
+
+    for name in ("first.pdf", "second.pdf"):
+        copyfile(tmp_path / "print.pdf", tmp_path / name)
+
+        pdf = Document(str(tmp_path / name))
+        pdf[0].insert_text((72, 144), "1")
+        save_reproducible_pdf(pdf, str(tmp_path / name))
+
+    content: bytes = (tmp_path / "first.pdf").read_bytes()
+
+    assert not b"D:2024" in content
+    assert content == (tmp_path / "second.pdf").read_bytes()
+
+def test_failed_save_leaves_the_report_and_no_temporary_file(tmp_path):
+    create_print(str(tmp_path / "report.pdf"))
+    content: bytes = (tmp_path / "report.pdf").read_bytes()
+
+    # A document without pages can't be saved:
+    for save in (save_optimized_pdf, save_reproducible_pdf):
+        with raises(ValueError): save(Document(), str(tmp_path / "report.pdf"))
+
+    assert listdir(tmp_path) == ["report.pdf"]
+    assert (tmp_path / "report.pdf").read_bytes() == content
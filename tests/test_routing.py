@@ -0,0 +1,20 @@
+from compiloor.services.parser.markdown import create_html_from_markdown
+from compiloor.services.parser.routing import AssetRouter, get_report_asset_urls
+from compiloor.services.utils.utils import get_markdown_asset_urls
+
+
+FINDING: str = "## Description\n\n![poc](https://images.example.com/poc.png \"PoC\")\n\n![local](./diagram.png)\n"
+
+def test_markdown_images_are_assets():
+    assert get_markdown_asset_urls(FINDING) == ["https://images.example.com/poc.png"]
+
+def test_rendered_finding_images_are_allowed():
+    urls = get_report_asset_urls(
+        "https://cdn.example.com/cover.png",
+        '<link rel="stylesheet" href="https://fonts.example.com/css">',
+        "",
+        [create_html_from_markdown(FINDING)]
+    )
+
+    assert urls == ["https://cdn.example.com/cover.png", "https://fonts.example.com/css", "https://images.example.com/poc.png"]
+    assert "images.example.com" in AssetRouter(urls).hosts
@@ -0,0 +1,42 @@
+from os import makedirs
+from os.path import join
+
+from types import SimpleNamespace
+
+from compiloor.constants.environment import FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.services.environment.utils import FileUtils, ReportUtils
+from compiloor.services.parser.utils import ReportCustomizer
+
+
+def create_project(root: str, finding_ids: list[str]) -> None:
+    makedirs(join(root, FINDINGS_DIRECTORY))
+    makedirs(join(root, MAIN_DIRECTORY))
+
+    for finding_id in finding_ids:
+        open(join(root, FINDINGS_DIRECTORY, f"[{finding_id}].md"), "w").write(f"# [{finding_id}] Title\n")
+
+def test_shards_are_clamped_to_the_severity_sections(tmp_path):
+    create_project(str(tmp_path / "project"), ["M-01", "M-03", "L-01"])
+
+    with FileUtils.project_root(str(tmp_path / "project")):
+        assert ReportUtils.get_shard_count(32) == 2
+        assert ReportUtils.get_shard_count(1) == 1
+
+def test_a_report_without_findings_is_a_single_shard(tmp_path):
+    create_project(str(tmp_path / "project"), [])
+
+    with FileUtils.project_root(str(tmp_path / "project")): assert ReportUtils.get_shard_count(4) == 1
+
+def get_shard_breaks(sizes: list[int], shards: int) -> set[int]:
+    customizer = ReportCustomizer.__new__(ReportCustomizer)
+    customizer.finding_sections = [("", "", index, [SimpleNamespace(render_fragment="x" * size)]) for index, size in enumerate(sizes)]
+
+    return customizer.get_shard_breaks(shards)
+
+def test_the_report_is_split_into_the_clamped_amount_of_shards():
+    # The first section is far smaller than the last one, but the report still gets the two shards its pool was sized for:
+    assert get_shard_breaks([1, 100], 2) == {0}
+    assert get_shard_breaks([1, 1, 100], 3) == {0, 1}
+    assert get_shard_breaks([100, 1, 1, 100], 2) == {1}
+    assert get_shard_breaks([1, 100], 32) == {0}
+    assert get_shard_breaks([1, 100], 1) == set()
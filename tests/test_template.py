@@ -0,0 +1,45 @@
+from os import makedirs
+from os.path import join
+
+from compiloor.constants.environment import FINDINGS_DIRECTORY, MAIN_DIRECTORY
+from compiloor.services.environment.utils import FileUtils
+from compiloor.services.parser.template import CompiledTemplate, fill_placeholders
+from compiloor.services.parser.utils import ReportCustomizer
+from compiloor.services.utils.timing import StageTimer
+
+
+def test_template_keeps_the_placeholders_without_a_value():
+    template = CompiledTemplate("<h1>{{config.title}}</h1>{{findings}}<p>{{[8.1]_page}}</p>")
+
+    assert template.render({ "{{config.title}}": "Report", "{{findings}}": lambda: iter(["<div>", "</div>"]) }) == (
+        "<h1>Report</h1><div></div><p>{{[8.1]_page}}</p>"
+    )
+
+def test_fill_placeholders_only_replaces_the_known_ones():
+    content: str = "<p>{{config.protocol_name}} on page {{[H-01]_page}}</p>"
+
+    assert fill_placeholders(content, { "{{config.protocol_name}}": "Vault" }) == "<p>Vault on page {{[H-01]_page}}</p>"
+
+def test_sections_and_findings_get_the_config_values(tmp_path):
+    root: str = str(tmp_path / "project")
+
+    makedirs(join(root, FINDINGS_DIRECTORY))
+    makedirs(join(root, MAIN_DIRECTORY))
+    open(join(root, FINDINGS_DIRECTORY, "[H-01].md"), "w").write("# [H-01] Reentrancy\n\n## Description\n\n{{config.protocol_name}} can be drained.\n")
+
+    with FileUtils.project_root(root):
+        customizer = ReportCustomizer.__new__(ReportCustomizer)
+        customizer.timer, customizer.jobs = StageTimer(), 1
+
+        customizer.config = { "protocol_name": "Vault", "about_protocol_content": "..." }
+        customizer.rendered_sections = { "about_protocol_content": "<p>{{config.protocol_name}} is a vault.</p>" }
+        customizer.template_values = {}
+
+        customizer.fetch_finding_fragments(customizer.config, 8)
+        customizer.add_report_config_variables()
+
+        findings: str = "".join(customizer.stream_findings())
+
+    assert customizer.template_values["{{config.about_protocol_content}}"] == "<p>Vault is a vault.</p>"
+    assert "Vault can be drained." in findings
+    assert not "{{config." in findings
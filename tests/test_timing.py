@@ -0,0 +1,18 @@
+from json import load
+
+from compiloor.services.utils.timing import StageTimer
+
+
+def test_trace_has_an_event_per_stage(tmp_path):
+    timer = StageTimer()
+
+    with timer.activate():
+        with timer.stage("render"): timer.run("indexing", lambda: None)
+
+    timer.write_trace(str(tmp_path / "trace.json"))
+
+    with open(tmp_path / "trace.json", "r") as file: trace = load(file)
+
+    stages = [event["args"]["stage"] for event in trace["traceEvents"] if event["ph"] == "X"]
+
+    assert sorted(stages) == ["render", "render/indexing"]
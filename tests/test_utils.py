@@ -0,0 +1,31 @@
+from os import listdir
+
+from pytest import raises
+
+from compiloor.services.utils.utils import write_atomically
+
+
+def test_atomic_write_replaces_the_file_once_it_is_written(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with write_atomically(str(path)) as temp_path:
+        with open(temp_path, "w") as file: file.write("new")
+
+        # The file is only replaced once the write is done:
+        assert path.read_text() == "old"
+
+    assert path.read_text() == "new"
+    assert listdir(tmp_path) == ["state.json"]
+
+def test_failed_atomic_write_leaves_no_temporary_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with raises(OSError):
+        with write_atomically(str(path)) as temp_path:
+            with open(temp_path, "w") as file: file.write("partial")
+            raise OSError("No space left on device")
+
+    assert path.read_text() == "old"
+    assert listdir(tmp_path) == ["state.json"]
@@ -0,0 +1,70 @@
+from pygments.lexers import get_lexer_by_name
+
+from compiloor.services.parser.wrapping import wrap_tokens
+
+
+def wrap(language: str, code: str, width: int = 80) -> list[str]:
+    tokens = get_lexer_by_name(language).get_tokens(code)
+    return "".join(value for _, value in wrap_tokens(tokens, width)).rstrip("\n").split("\n")
+
+def get_words(lines: list[str], marker: str = "") -> list[str]:
+    return " ".join(line.removeprefix(marker) for line in lines).split()
+
+def test_diff_lines_keep_their_marker_and_indentation():
+    line = "        require(shareholderBalances[msg.sender] >= amountToWithdraw, Errors.InsufficientBalanceForWithdrawal());"
+
+    for marker in ("+", "-"):
+        lines = wrap("diff", marker + line + "\n")
+
+        assert lines == [
+            marker + "        require(shareholderBalances[msg.sender] >= amountToWithdraw,",
+            marker + "          Errors.InsufficientBalanceForWithdrawal());",
+        ]
+
+def test_diff_context_lines_keep_their_indentation():
+    lines = wrap("diff", " " + " " * 8 + "emit Withdrawal(msg.sender, amountToWithdraw, block.timestamp, shareholderBalances[msg.sender]);\n")
+
+    assert all(len(line) <= 80 for line in lines)
+    assert all(line.startswith(" " * 11) for line in lines[1:])
+
+def test_long_string_is_broken_at_whitespace():
+    words = ["lorem", "ipsum", "dolor", "sit", "amet"] * 6
+    lines = wrap("python", '    message = "' + " ".join(words) + '"\n')
+
+    assert all(len(line) <= 80 for line in lines)
+    # Never breaking right after the opening quote:
+    assert lines[0].startswith('    message = "lorem')
+    assert all(line.startswith("      ") for line in lines[1:])
+    assert get_words(lines) == ["message", "=", '"lorem', *words[1:-1], 'amet"']
+
+def test_long_comment_repeats_its_marker():
+    words = ["the", "balance", "is", "only", "updated", "after", "the", "external", "call"] * 3
+    lines = wrap("solidity", "    // " + " ".join(words) + "\n")
+
+    assert len(lines) > 1
+    assert all(len(line) <= 80 for line in lines)
+    assert all(line.startswith("    // ") for line in lines)
+    assert get_words(lines, "    // ") == words
+
+def test_word_longer_than_a_line_is_split():
+    blob = "a" * 200
+    lines = wrap("python", "x = " + blob + "\n")
+
+    assert all(len(line) <= 80 for line in lines)
+    assert "".join(line.strip() for line in lines[1:]) == blob
+
+def test_short_lines_are_left_as_they_are():
+    code = "+    uint256 amount = balances[msg.sender];\n-    uint256 amount = balance;\n"
+
+    assert wrap("diff", code) == code.rstrip("\n").split("\n")
+
+def test_string_longer_than_a_line_is_split_within_the_width():
+    blob = "a" * 200
+
+    for width in (40, 80):
+        lines = wrap("python", "x = '" + blob + "'\n", width)
+
+        assert max(len(line) for line in lines) <= width
+        # The opening quote is carried over with the string instead of being left behind:
+        assert lines[0] == "x ="
+        assert "".join(line.strip() for line in lines[1:]) == "'" + blob + "'"